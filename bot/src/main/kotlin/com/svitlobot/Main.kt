@@ -14,6 +14,7 @@ import com.svitlobot.service.AddressService
 import mu.KotlinLogging
 import java.io.File
 import java.util.*
+import kotlin.concurrent.fixedRateTimer
 
 private val logger = KotlinLogging.logger {}
 
@@ -25,7 +26,7 @@ private fun sendCitiesPage(
     page: Int,
     addressService: AddressService
 ) {
-    val (cities, totalPages) = addressService.getCitiesPage(page, 20)
+    val (cities, totalPages) = addressService.getCitiesPage(page)
     val allCities = addressService.getCities()
 
     val citiesMessage = buildString {
@@ -77,7 +78,7 @@ private fun sendCitiesSelection(
     page: Int,
     addressService: AddressService
 ) {
-    val (cities, totalPages) = addressService.getCitiesPage(page, 10)
+    val (cities, totalPages) = addressService.getCitiesPage(page)
 
     val message = buildString {
         appendLine("🏙 Оберіть ваше місто/село:")
@@ -145,7 +146,7 @@ private fun sendStreetsSelection(
     page: Int,
     addressService: AddressService
 ) {
-    val (streets, totalPages) = addressService.getStreetsPage(city, page, 10)
+    val (streets, totalPages) = addressService.getStreetsPage(city, page)
 
     val message = buildString {
         appendLine("📍 Місто: $city")
@@ -220,7 +221,7 @@ private fun sendHousesSelection(
     page: Int,
     addressService: AddressService
 ) {
-    val (houses, totalPages) = addressService.getHousesPage(city, street, page, 15)
+    val (houses, totalPages) = addressService.getHousesPage(city, street, page)
 
     val message = buildString {
         appendLine("📍 Місто: $city")
@@ -297,9 +298,22 @@ fun main() {
 
     val addressesFilePath = config.getProperty("addresses.file.path", "../parser/addresses.json")
 
-    val addressService = AddressService(addressesFilePath)
+    val catalogFilePath = config.getProperty("catalog.file.path", "../parser/browse_catalog.json")
+
+    val statsFilePath = config.getProperty("stats.file.path", "../parser/stats_cube.json")
+
+    val translitFilePath = config.getProperty("translit.file.path", "../parser/translit_index.json")
+
+    val addressService = AddressService(addressesFilePath, catalogFilePath, statsFilePath, translitFilePath)
     logger.info { "Address service initialized. Total addresses: ${addressService.getTotalAddresses()}" }
 
+    val reloadSeconds = config.getProperty("addresses.reload.seconds", "5").toLongOrNull() ?: 5L
+    if (reloadSeconds > 0) {
+        fixedRateTimer("addresses-reload", daemon = true, initialDelay = reloadSeconds * 1000, period = reloadSeconds * 1000) {
+            addressService.reloadIfChanged()
+        }
+    }
+
     val bot = bot {
         token = botToken
 
@@ -386,6 +400,7 @@ fun main() {
                     }
                     appendLine()
                     appendLine("Всього адрес: ${addressService.getTotalAddresses()}")
+                    appendLine("Всього вулиць: ${addressService.getTotalStreets()}")
                 }
 
                 bot.sendMessage(chatId = chatId, text = statsMessage)
@@ -613,18 +628,26 @@ private fun handleAddressInput(
 
     bot.sendMessage(chatId = chatId, text = "🔍 Шукаю адресу...")
 
-    val foundAddress = addressService.smartSearch(addressText)
-
-    if (foundAddress != null) {
-        val resultMessage = """
-            ✅ Адресу знайдено!
-
-            📍 ${foundAddress.toDisplayString()}
-            ⚡ Черга відключень: ${foundAddress.queue_full}
+    val found = addressService.smartSearch(addressText)
 
-            ---
-            Філія: ${foundAddress.branch}
-        """.trimIndent()
+    if (found != null) {
+        val foundAddress = found.address
+        // Адрес найден без города или сразу в нескольких чергах — просим уточнить
+        val hint = when {
+            found.isAmbiguous -> "⚠️ Адреса є в кількох чергах — уточніть населений пункт"
+            found.confidence < AddressService.CONFIDENCE_EXACT -> "⚠️ Знайдено приблизно — перевірте адресу"
+            else -> null
+        }
+        val resultMessage = buildString {
+            append("""
+                ✅ Адресу знайдено!
+
+                📍 ${foundAddress.toDisplayString()}
+                ⚡ Черга відключень: ${foundAddress.queue_full}
+            """.trimIndent())
+            hint?.let { append("\n").append(it) }
+            append("\n\n---\nФілія: ${foundAddress.branch}")
+        }
 
         val keyboard = InlineKeyboardMarkup.create(
             listOf(
@@ -694,5 +717,29 @@ private fun loadConfig(): Properties {
         }
     }
 
+    if (!properties.containsKey("catalog.file.path")) {
+        val catalogPathFromEnv = System.getenv("CATALOG_FILE_PATH")
+        if (catalogPathFromEnv != null) {
+            properties.setProperty("catalog.file.path", catalogPathFromEnv)
+            logger.info { "Catalog file path loaded from CATALOG_FILE_PATH environment variable" }
+        }
+    }
+
+    if (!properties.containsKey("stats.file.path")) {
+        val statsPathFromEnv = System.getenv("STATS_FILE_PATH")
+        if (statsPathFromEnv != null) {
+            properties.setProperty("stats.file.path", statsPathFromEnv)
+            logger.info { "Stats file path loaded from STATS_FILE_PATH environment variable" }
+        }
+    }
+
+    if (!properties.containsKey("translit.file.path")) {
+        val translitPathFromEnv = System.getenv("TRANSLIT_FILE_PATH")
+        if (translitPathFromEnv != null) {
+            properties.setProperty("translit.file.path", translitPathFromEnv)
+            logger.info { "Translit file path loaded from TRANSLIT_FILE_PATH environment variable" }
+        }
+    }
+
     return properties
 }
@@ -23,6 +23,20 @@ data class Address(
     }
 }
 
+// Найденный адрес и уверенность поиска (как Match в parser/address_index.py)
+data class AddressMatch(
+    val address: Address,
+    val confidence: Double
+) {
+    companion object {
+        // Разные черги одного адреса в queue_full
+        const val QUEUE_SEPARATOR = "|"
+    }
+
+    val isAmbiguous: Boolean
+        get() = QUEUE_SEPARATOR in address.queue_full
+}
+
 enum class UserState {
     IDLE,
     WAITING_FOR_ADDRESS,
@@ -0,0 +1,87 @@
+package com.svitlobot.model
+
+data class CatalogNode(
+    val items: List<String>,
+    val pages: Int
+) {
+    companion object {
+        fun of(items: List<String>, pageSize: Int) = CatalogNode(items, (items.size + pageSize - 1) / pageSize)
+    }
+
+    // Страница — срез items, число страниц уже посчитано в pages
+    fun page(page: Int, pageSize: Int): List<String> {
+        val startIndex = page * pageSize
+        if (startIndex !in items.indices) return emptyList()
+        return items.subList(startIndex, minOf(startIndex + pageSize, items.size))
+    }
+}
+
+// Каталог навигации (parser/build_catalog.py); размер страницы свой на каждом уровне
+data class BrowseCatalog(
+    val version: Int,
+    val page_sizes: Map<String, Int>,
+    val cities: CatalogNode,
+    val streets: Map<String, CatalogNode>,
+    val houses: Map<String, Map<String, CatalogNode>>
+) {
+    companion object {
+        const val VERSION = 2
+        const val CITIES = "cities"
+        const val STREETS = "streets"
+        const val HOUSES = "houses"
+
+        // Столько кнопок на странице показывает бот; те же значения в PAGE_SIZES парсера
+        val DEFAULT_PAGE_SIZES = mapOf(CITIES to 10, STREETS to 10, HOUSES to 15)
+
+        private val housePattern = Regex("""^(\d+)\s*(?:/\s*(\d+))?\s*-?\s*(.*)$""")
+
+        val houseComparator: Comparator<String> = Comparator { a, b ->
+            compareValuesBy(houseSortKey(a), houseSortKey(b), { it.first }, { it.second }, { it.third })
+                .takeIf { it != 0 } ?: a.compareTo(b)
+        }
+
+        private fun houseSortKey(house: String): Triple<Long, Long, String> {
+            val text = house.trim()
+            val match = housePattern.find(text)
+                ?: return Triple(Long.MAX_VALUE, 0L, text.lowercase())
+            val number = match.groupValues[1].toLongOrNull() ?: Long.MAX_VALUE
+            val fraction = match.groupValues[2].toLongOrNull() ?: 0L
+            val suffix = match.groupValues[3].trim().lowercase()
+            return Triple(number, fraction, suffix)
+        }
+
+        fun fromAddresses(addresses: List<Address>, pageSizes: Map<String, Int> = DEFAULT_PAGE_SIZES): BrowseCatalog {
+            val tree = sortedMapOf<String, MutableMap<String, MutableSet<String>>>()
+            addresses.forEach { addr ->
+                if (addr.city.isNotBlank()) {
+                    tree.getOrPut(addr.city) { sortedMapOf() }
+                        .getOrPut(addr.street) { mutableSetOf() }
+                        .add(addr.house)
+                }
+            }
+
+            fun node(items: List<String>, level: String) = CatalogNode.of(items, pageSizes.getValue(level))
+
+            return BrowseCatalog(
+                version = VERSION,
+                page_sizes = pageSizes,
+                cities = node(tree.keys.toList(), CITIES),
+                streets = tree.mapValues { (_, streets) -> node(streets.keys.toList(), STREETS) },
+                houses = tree.mapValues { (_, streets) ->
+                    streets.mapValues { (_, houses) -> node(houses.sortedWith(houseComparator), HOUSES) }
+                }
+            )
+        }
+    }
+
+    fun pageSize(level: String): Int = page_sizes[level] ?: DEFAULT_PAGE_SIZES.getValue(level)
+
+    // Узлы с одинаковым ключом (например, 'м.Полтава' и 'м.полтава' в нижнем регистре) сливаются в один
+    fun <K> merge(nodes: List<Pair<K, CatalogNode>>, level: String): Map<K, CatalogNode> =
+        nodes.groupBy({ it.first }, { it.second }).mapValues { (_, group) ->
+            group.singleOrNull() ?: run {
+                val items = group.flatMap { it.items }.distinct()
+                CatalogNode.of(if (level == HOUSES) items.sortedWith(houseComparator) else items.sorted(), pageSize(level))
+            }
+        }
+}
@@ -0,0 +1,12 @@
+package com.svitlobot.model
+
+// manifest.json версии публикации (parser/publish.py): sha256 каждого файла версии
+data class PublicationManifest(
+    val version: String,
+    val source_sha256: String,
+    val files: Map<String, String>
+) {
+    companion object {
+        const val FILE_NAME = "manifest.json"
+    }
+}
@@ -0,0 +1,27 @@
+package com.svitlobot.model
+
+data class CubeCell(
+    val addresses: Int,
+    val streets: Int
+)
+
+// Куб описывает файл адресов с хешем source_sha256 (parser/stats_cube.py)
+data class StatsCube(
+    val version: Int,
+    val source_sha256: String?,
+    val dimensions: List<String>,
+    val groupings: Map<String, Map<String, CubeCell>>
+) {
+    companion object {
+        const val KEY_SEPARATOR = "|"
+        const val TOTAL = "total"
+        const val QUEUE_GROUPING = "queue+subqueue"
+    }
+
+    fun total(): CubeCell? = groupings[TOTAL]?.get("")
+
+    fun queueStats(): Map<String, Int>? = groupings[QUEUE_GROUPING]
+        ?.map { (key, cell) -> key.replace(KEY_SEPARATOR, ".") to cell.addresses }
+        ?.toMap()
+        ?.toSortedMap()
+}
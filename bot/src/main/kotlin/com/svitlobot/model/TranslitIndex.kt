@@ -0,0 +1,105 @@
+package com.svitlobot.model
+
+// Индекс транслита и неверной раскладки (parser/translit_index.py).
+// Ключи считаются теми же правилами, что в парсере: из названия и из запроса выходит один ключ
+data class TranslitIndex(
+    val version: Int,
+    val cities: Map<String, List<String>>,
+    val streets: Map<String, List<String>>
+) {
+    companion object {
+        private val translit = mapOf(
+            'а' to "a", 'б' to "b", 'в' to "v", 'г' to "h", 'ґ' to "g", 'д' to "d", 'е' to "e", 'є' to "ie",
+            'ж' to "zh", 'з' to "z", 'и' to "y", 'і' to "i", 'ї' to "i", 'й' to "i", 'к' to "k", 'л' to "l",
+            'м' to "m", 'н' to "n", 'о' to "o", 'п' to "p", 'р' to "r", 'с' to "s", 'т' to "t", 'у' to "u",
+            'ф' to "f", 'х' to "kh", 'ц' to "ts", 'ч' to "ch", 'ш' to "sh", 'щ' to "shch", 'ь' to "",
+            'ю' to "iu", 'я' to "ia", '\'' to "", 'ы' to "y", 'э' to "e", 'ъ' to "", 'ё' to "io"
+        )
+
+        private val translitFolds = listOf(
+            Regex("[^a-z0-9]") to "",
+            Regex("shch|sch") to "sh",
+            Regex("kh|x|g") to "h",
+            Regex("ts|tz") to "c",
+            Regex("w") to "v",
+            Regex("[yj]") to "i",
+            Regex("(.)\\1+") to "$1"
+        )
+
+        private const val LAYOUT_UA = "йцукенгшщзхїфівапролджєячсмитьбю.'"
+        private const val LAYOUT_EN = "qwertyuiop[]asdfghjkl;'zxcvbnm,./`"
+        private val layoutKeys = LAYOUT_UA.zip(LAYOUT_EN).filter { it.first.isLetter() }.toMap()
+        private val layoutBack = LAYOUT_EN.zip(LAYOUT_UA).filter { it.second.isLetter() }.toMap()
+        private val layoutShift = "<>:\"{}~".zip(",.;'[]`").toMap()
+        private const val LAYOUT_DROP = " '`./?"
+
+        private val houseLatin = mapOf('a' to 'а', 'e' to 'е', 'o' to 'о', 'c' to 'с', 'i' to 'і', 'k' to 'к')
+
+        private val prefixWords = listOf(
+            "м", "с", "смт", "місто", "село", "вул", "вулиця", "пров", "провулок",
+            "просп", "проспект", "пл", "площа", "бульв", "бульвар"
+        )
+
+        private val translitSplit = Regex("""[\s,;.]+""")
+        private val layoutSplit = Regex("""[\s/?]+""")
+
+        private fun unifyApostrophes(text: String) = text.lowercase().replace('’', '\'').replace('ʼ', '\'')
+
+        fun translitKey(text: String): String {
+            var key = buildString { unifyApostrophes(text).forEach { append(translit[it] ?: it) } }
+            translitFolds.forEach { (pattern, replacement) -> key = pattern.replace(key, replacement) }
+            return key
+        }
+
+        fun layoutKey(text: String): String = buildString {
+            unifyApostrophes(text).forEach { char ->
+                val key = layoutKeys[char] ?: layoutShift[char] ?: char
+                if (key !in LAYOUT_DROP) append(key)
+            }
+        }
+
+        private val keyModes: List<Pair<(String) -> String, Regex>> = listOf(
+            ::translitKey to translitSplit,
+            ::layoutKey to layoutSplit
+        )
+
+        private val prefixKeys = prefixWords.flatMap { word -> keyModes.map { (key, _) -> key(word) } }.toSet()
+
+        private fun splitHouse(text: String): Pair<String, String> {
+            val tokens = text.split(Regex("""\s+"""))
+            for (i in tokens.size - 1 downTo 1) {
+                if (tokens[i].firstOrNull()?.isDigit() == true) {
+                    return tokens.subList(0, i).joinToString(" ") to tokens.subList(i, tokens.size).joinToString(" ")
+                }
+            }
+            return text to ""
+        }
+    }
+
+    // Кандидаты (город, улица, дом) с исходными названиями; город пустой, если его не указали.
+    // Каждая часть запроса — один поиск в мапе по ключу
+    fun resolve(text: String): Sequence<Triple<String, String, String>> = sequence {
+        val (names, house) = splitHouse(text.trim())
+        if (house.isEmpty()) return@sequence
+
+        for ((mode, keyMode) in keyModes.withIndex()) {
+            val (key, splitter) = keyMode
+            val words = splitter.split(names).filter { it.isNotEmpty() }
+            // Последнее слово не отбрасывается: «Шкільний бульвар», «Соборна площа»
+            val filtered = words.dropLast(1).filter { key(it) !in prefixKeys } + words.takeLast(1)
+            // «10a» латиницей и «10f» в английской раскладке — это «10а»
+            val houseLetters = if (mode == 0) houseLatin else layoutBack
+            val queryHouse = house.lowercase().map { houseLetters[it] ?: it }.joinToString("")
+
+            for (i in filtered.indices) {
+                val streetNames = streets[key(filtered.subList(i, filtered.size).joinToString(""))] ?: continue
+                val cityNames = if (i == 0) listOf("") else cities[key(filtered.subList(0, i).joinToString(""))] ?: continue
+                for (city in cityNames) {
+                    for (street in streetNames) {
+                        yield(Triple(city, street, queryHouse))
+                    }
+                }
+            }
+        }
+    }
+}
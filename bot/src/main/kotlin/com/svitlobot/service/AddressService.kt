@@ -3,106 +3,257 @@ package com.svitlobot.service
 import com.google.gson.Gson
 import com.google.gson.reflect.TypeToken
 import com.svitlobot.model.Address
+import com.svitlobot.model.AddressMatch
+import com.svitlobot.model.BrowseCatalog
+import com.svitlobot.model.CatalogNode
+import com.svitlobot.model.PublicationManifest
+import com.svitlobot.model.StatsCube
+import com.svitlobot.model.TranslitIndex
 import mu.KotlinLogging
 import java.io.File
+import java.security.MessageDigest
 
 private val logger = KotlinLogging.logger {}
 
 
-class AddressService(private val jsonFilePath: String) {
+class AddressService(
+    private val jsonFilePath: String,
+    private val catalogFilePath: String? = null,
+    private val statsFilePath: String? = null,
+    private val translitFilePath: String? = null
+) {
+
+    // Уверенность поиска — те же значения, что в parser/address_index.py
+    companion object {
+        const val CONFIDENCE_EXACT = 1.0
+        const val CONFIDENCE_NO_CITY = 0.9
+        const val CONFIDENCE_SUBSTRING = 0.7
+        const val AMBIGUOUS_PENALTY = 0.5
+    }
+
+    private class Snapshot(
+        val addresses: List<Address>,
+        val catalog: BrowseCatalog,
+        val stats: StatsCube?,
+        val translit: TranslitIndex?,
+        val streetsByCity: Map<String, CatalogNode>,
+        val housesByStreet: Map<Pair<String, String>, CatalogNode>,
+        val addressesByCityStreetHouse: Map<Triple<String, String, String>, List<Address>>,
+        val addressesByStreetHouse: Map<Pair<String, String>, List<Address>>,
+        val sourceSignature: String
+    )
+
+    // Папка версии публикации, в которую вел current в момент загрузки, и ее manifest
+    private class Publication(val dir: File, val manifest: PublicationManifest)
 
-    private val addresses: List<Address>
     private val gson = Gson()
 
-    init {
+    @Volatile
+    private var snapshot: Snapshot = loadSnapshot()
+
+    private val addresses: List<Address>
+        get() = snapshot.addresses
+
+    private fun sourceSignature(file: File = File(jsonFilePath).canonicalFile): String {
+        return "${file.path}:${file.lastModified()}:${file.length()}"
+    }
+
+    private fun loadSnapshot(): Snapshot {
         logger.info { "Loading addresses from file: $jsonFilePath" }
 
-        val file = File(jsonFilePath)
+        // Симлинк current разворачивается один раз: все файлы снимка читаются из этой папки,
+        // даже если current переключится посреди загрузки
+        val file = File(jsonFilePath).canonicalFile
         if (!file.exists()) {
             throw IllegalArgumentException("Файл не знайдено: $jsonFilePath")
         }
+        val publication = loadPublication(file.parentFile)
 
-        val jsonString = file.readText()
+        val signature = sourceSignature(file)
+        val bytes = file.readBytes()
+        val addressesSha256 = sha256(bytes)
+        val expected = publication?.manifest?.files?.get(file.name)
+        if (expected != null && expected != addressesSha256) {
+            throw IllegalStateException("Файл ${file.path} не збігається з ${PublicationManifest.FILE_NAME}")
+        }
+        val jsonString = String(bytes, Charsets.UTF_8)
         val addressListType = object : TypeToken<List<Address>>() {}.type
-        addresses = gson.fromJson(jsonString, addressListType)
+        val loadedAddresses: List<Address> = gson.fromJson(jsonString, addressListType)
+
+        val version = publication?.let { " (publication ${it.manifest.version})" } ?: ""
+        logger.info { "Loaded ${loadedAddresses.size} addresses$version" }
 
-        logger.info { "Loaded ${addresses.size} addresses" }
+        val catalog = loadCatalog(loadedAddresses, companionFile(catalogFilePath, publication), publication)
+        return Snapshot(
+            addresses = loadedAddresses,
+            catalog = catalog,
+            stats = loadStats(addressesSha256, companionFile(statsFilePath, publication), publication),
+            translit = loadTranslit(companionFile(translitFilePath, publication), publication),
+            streetsByCity = catalog.merge(
+                catalog.streets.map { (city, node) -> city.lowercase() to node }, BrowseCatalog.STREETS
+            ),
+            housesByStreet = catalog.merge(
+                catalog.houses.flatMap { (city, streets) ->
+                    streets.map { (street, node) -> Pair(city.lowercase(), street.lowercase()) to node }
+                },
+                BrowseCatalog.HOUSES
+            ),
+            addressesByCityStreetHouse = loadedAddresses.groupBy {
+                Triple(it.city.lowercase(), it.street.lowercase(), it.house.lowercase())
+            },
+            addressesByStreetHouse = loadedAddresses.groupBy { Pair(it.street.lowercase(), it.house.lowercase()) },
+            sourceSignature = signature
+        )
     }
 
-    fun findQueue(city: String, street: String, house: String): Address? {
-        return addresses.find { it.matches(city, street, house) }
+    private fun loadPublication(dir: File): Publication? {
+        val manifestFile = File(dir, PublicationManifest.FILE_NAME)
+        if (!manifestFile.exists()) return null
+        return Publication(dir, gson.fromJson(manifestFile.readText(), PublicationManifest::class.java))
     }
 
-    fun getCities(): List<String> {
-        return addresses
-            .map { it.city }
-            .filter { it.isNotBlank() }
-            .distinct()
-            .sorted()
+    // Файл, настроенный рядом с адресами (published/current/...), берется из той же версии публикации
+    private fun companionFile(path: String?, publication: Publication?): File? {
+        if (path == null) return null
+        val file = File(path)
+        if (publication == null) return file
+        val configuredDir = File(jsonFilePath).absoluteFile.normalize().parentFile
+        return if (file.absoluteFile.normalize().parentFile == configuredDir) File(publication.dir, file.name) else file
     }
 
-    fun getCitiesPage(page: Int, pageSize: Int = 20): Pair<List<String>, Int> {
-        val allCities = getCities()
-        val totalPages = (allCities.size + pageSize - 1) / pageSize
-        val startIndex = page * pageSize
-        val endIndex = minOf(startIndex + pageSize, allCities.size)
+    // Текст файла снимка; файл из папки публикации принимается, только если sha256 совпадает с manifest
+    private fun readVerified(file: File, publication: Publication?): String? {
+        val bytes = file.readBytes()
+        if (publication != null && file.parentFile == publication.dir) {
+            val expected = publication.manifest.files[file.name]
+            if (expected != null && expected != sha256(bytes)) {
+                logger.warn { "File ${file.path} does not match ${PublicationManifest.FILE_NAME} of ${publication.manifest.version}" }
+                return null
+            }
+        }
+        return String(bytes, Charsets.UTF_8)
+    }
 
-        val citiesOnPage = if (startIndex < allCities.size) {
-            allCities.subList(startIndex, endIndex)
-        } else {
-            emptyList()
+    private fun loadCatalog(loadedAddresses: List<Address>, catalogFile: File?, publication: Publication?): BrowseCatalog {
+        if (catalogFile != null && catalogFile.exists()) {
+            logger.info { "Loading browse catalog from file: ${catalogFile.path}" }
+            val text = readVerified(catalogFile, publication)
+                ?: return BrowseCatalog.fromAddresses(loadedAddresses)
+            val catalog = gson.fromJson(text, BrowseCatalog::class.java)
+            if (catalog.version == BrowseCatalog.VERSION) {
+                return catalog
+            }
+            logger.warn { "Browse catalog ${catalogFile.path} has version ${catalog.version}, building catalog from addresses" }
+            return BrowseCatalog.fromAddresses(loadedAddresses)
         }
 
-        return Pair(citiesOnPage, totalPages)
+        logger.info { "Browse catalog file not found, building catalog from addresses" }
+        return BrowseCatalog.fromAddresses(loadedAddresses)
     }
 
-    fun getStreets(city: String): List<String> {
-        return addresses
-            .filter { it.city.equals(city, ignoreCase = true) }
-            .map { it.street }
-            .distinct()
-            .sorted()
+    private fun sha256(bytes: ByteArray): String =
+        MessageDigest.getInstance("SHA-256").digest(bytes).joinToString("") { "%02x".format(it) }
+
+    // Куб берется, только если он посчитан по этому же файлу адресов
+    private fun loadStats(addressesSha256: String, statsFile: File?, publication: Publication?): StatsCube? {
+        if (statsFile == null || !statsFile.exists()) {
+            logger.info { "Stats cube file not found, stats will be computed from addresses" }
+            return null
+        }
+
+        logger.info { "Loading stats cube from file: ${statsFile.path}" }
+        val cube = try {
+            val text = readVerified(statsFile, publication) ?: return null
+            gson.fromJson(text, StatsCube::class.java)
+        } catch (e: Exception) {
+            logger.warn(e) { "Cannot read stats cube, stats will be computed from addresses" }
+            return null
+        }
+        if (cube.source_sha256 != addressesSha256) {
+            logger.warn { "Stats cube ${statsFile.path} describes another addresses file, stats will be computed from addresses" }
+            return null
+        }
+        return cube
     }
 
-    fun getHouses(city: String, street: String): List<String> {
-        return addresses
-            .filter {
-                it.city.equals(city, ignoreCase = true) &&
-                it.street.equals(street, ignoreCase = true)
-            }
-            .map { it.house }
-            .distinct()
-            .sortedWith(compareBy({ it.filter { c -> c.isDigit() }.toIntOrNull() ?: 0 }, { it }))
+    private fun loadTranslit(translitFile: File?, publication: Publication?): TranslitIndex? {
+        if (translitFile == null || !translitFile.exists()) {
+            logger.info { "Translit index file not found, Latin and wrong-layout queries will not be resolved" }
+            return null
+        }
+
+        logger.info { "Loading translit index from file: ${translitFile.path}" }
+        return try {
+            val text = readVerified(translitFile, publication) ?: return null
+            gson.fromJson(text, TranslitIndex::class.java)
+        } catch (e: Exception) {
+            logger.warn(e) { "Cannot read translit index" }
+            null
+        }
     }
 
-    fun getStreetsPage(city: String, page: Int, pageSize: Int = 20): Pair<List<String>, Int> {
-        val allStreets = getStreets(city)
-        val totalPages = (allStreets.size + pageSize - 1) / pageSize
-        val startIndex = page * pageSize
-        val endIndex = minOf(startIndex + pageSize, allStreets.size)
+    @Synchronized
+    fun reloadIfChanged(): Boolean {
+        val signature = try {
+            sourceSignature()
+        } catch (e: Exception) {
+            logger.warn(e) { "Cannot stat addresses file: $jsonFilePath" }
+            return false
+        }
+        if (signature == snapshot.sourceSignature) {
+            return false
+        }
 
-        val streetsOnPage = if (startIndex < allStreets.size) {
-            allStreets.subList(startIndex, endIndex)
-        } else {
-            emptyList()
+        return try {
+            snapshot = loadSnapshot()
+            logger.info { "Addresses reloaded. Total addresses: ${snapshot.addresses.size}" }
+            true
+        } catch (e: Exception) {
+            logger.error(e) { "Failed to reload addresses, keeping previous data" }
+            false
         }
+    }
 
-        return Pair(streetsOnPage, totalPages)
+    // Страница узла каталога: срез и заранее посчитанное число страниц
+    private fun pageOf(catalog: BrowseCatalog, node: CatalogNode?, level: String, page: Int): Pair<List<String>, Int> {
+        if (node == null) return Pair(emptyList(), 0)
+        return Pair(node.page(page, catalog.pageSize(level)), node.pages)
     }
 
-    fun getHousesPage(city: String, street: String, page: Int, pageSize: Int = 20): Pair<List<String>, Int> {
-        val allHouses = getHouses(city, street)
-        val totalPages = (allHouses.size + pageSize - 1) / pageSize
-        val startIndex = page * pageSize
-        val endIndex = minOf(startIndex + pageSize, allHouses.size)
+    // Все строки адреса одной выборкой из мапы (город, улица, дом) без учета регистра
+    private fun rowsOf(city: String, street: String, house: String): List<Address>? =
+        snapshot.addressesByCityStreetHouse[Triple(city.lowercase(), street.lowercase(), house.lowercase())]
 
-        val housesOnPage = if (startIndex < allHouses.size) {
-            allHouses.subList(startIndex, endIndex)
-        } else {
-            emptyList()
-        }
+    fun findQueue(city: String, street: String, house: String): Address? {
+        return rowsOf(city, street, house)?.first()
+    }
+
+    fun getCities(): List<String> {
+        return snapshot.catalog.cities.items
+    }
+
+    fun getCitiesPage(page: Int): Pair<List<String>, Int> {
+        val current = snapshot
+        return pageOf(current.catalog, current.catalog.cities, BrowseCatalog.CITIES, page)
+    }
+
+    fun getStreets(city: String): List<String> {
+        return snapshot.streetsByCity[city.lowercase()]?.items ?: emptyList()
+    }
 
-        return Pair(housesOnPage, totalPages)
+    fun getHouses(city: String, street: String): List<String> {
+        return snapshot.housesByStreet[Pair(city.lowercase(), street.lowercase())]?.items ?: emptyList()
+    }
+
+    fun getStreetsPage(city: String, page: Int): Pair<List<String>, Int> {
+        val current = snapshot
+        return pageOf(current.catalog, current.streetsByCity[city.lowercase()], BrowseCatalog.STREETS, page)
+    }
+
+    fun getHousesPage(city: String, street: String, page: Int): Pair<List<String>, Int> {
+        val current = snapshot
+        val node = current.housesByStreet[Pair(city.lowercase(), street.lowercase())]
+        return pageOf(current.catalog, node, BrowseCatalog.HOUSES, page)
     }
 
     fun searchAddresses(query: String, limit: Int = 10): List<Address> {
@@ -137,20 +288,46 @@ class AddressService(private val jsonFilePath: String) {
         return null
     }
 
-    fun smartSearch(text: String): Address? {
+    // Как AddressIndex._pick в парсере: разные черги одного адреса — через '|', уверенность ниже
+    private fun pick(found: List<Address>, confidence: Double): AddressMatch {
+        val queues = found.map { it.queue_full }.distinct().sorted()
+        val first = found.first()
+        if (queues.size > 1) {
+            return AddressMatch(first.copy(queue_full = queues.joinToString(AddressMatch.QUEUE_SEPARATOR)), confidence * AMBIGUOUS_PENALTY)
+        }
+        return AddressMatch(first, confidence)
+    }
+
+    // Адрес без города: одна выборка из мапы (улица, дом), как no_city в AddressIndex
+    fun findWithoutCity(street: String, house: String): AddressMatch? {
+        val found = snapshot.addressesByStreetHouse[Pair(street.lowercase(), house.lowercase())] ?: return null
+        return pick(found, CONFIDENCE_NO_CITY)
+    }
+
+    // Точный адрес: одна выборка из мапы, несколько черг — через pick, как exact в AddressIndex
+    fun findExact(city: String, street: String, house: String): AddressMatch? {
+        val found = rowsOf(city, street, house) ?: return null
+        return pick(found, CONFIDENCE_EXACT)
+    }
+
+    fun smartSearch(text: String): AddressMatch? {
         parseAddressFromText(text)?.let { (city, street, house) ->
-            findQueue(city, street, house)?.let { return it }
+            findExact(city, street, house)?.let { return it }
             listOf("м.$city", "с.$city").forEach { cityVariant ->
                 listOf("вул. $street", "пров. $street", street).forEach { streetVariant ->
-                    findQueue(cityVariant, streetVariant, house)?.let { return it }
+                    findExact(cityVariant, streetVariant, house)?.let { return it }
                 }
             }
         }
-        val results = searchAddresses(text, 1)
-        return results.firstOrNull()
+        snapshot.translit?.resolve(text)?.forEach { (city, street, house) ->
+            val found = if (city.isEmpty()) findWithoutCity(street, house) else findExact(city, street, house)
+            found?.let { return it }
+        }
+        return searchAddresses(text, 1).firstOrNull()?.let { AddressMatch(it, CONFIDENCE_SUBSTRING) }
     }
 
     fun getQueueStats(): Map<String, Int> {
+        snapshot.stats?.queueStats()?.let { return it }
         return addresses
             .groupBy { it.queue_full }
             .mapValues { it.value.size }
@@ -158,4 +335,9 @@ class AddressService(private val jsonFilePath: String) {
     }
 
     fun getTotalAddresses(): Int = addresses.size
+
+    fun getTotalStreets(): Int {
+        snapshot.stats?.total()?.let { return it.streets }
+        return addresses.map { Pair(it.city, it.street) }.toSet().size
+    }
 }
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Нормализация адресов и хеш-индекс для поиска черги по адресу.
+- Нормализует населенный пункт, улицу и номер дома к единому виду
+- Разбирает свободный ввод: "м.Полтава, вул. Грабчака, 10", "Полтава Грабчака 10"
+- Ищет по хеш-ключу (місто, вулиця, будинок) с запасными вариантами
+"""
+
+import json
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+ADDRESSES_FILE = "addresses.json"
+
+CONFIDENCE_EXACT = 1.0
+CONFIDENCE_NO_CITY = 0.9
+CONFIDENCE_STREET_PREFIX = 0.7
+AMBIGUOUS_PENALTY = 0.5
+
+CITY_PREFIX = re.compile(r'^(?:смт|місто|село|м|с)(?:\.\s*|\s+)', re.IGNORECASE)
+STREET_PREFIX = re.compile(
+    r'^(?:вулиця|провулок|проспект|площа|бульвар|вул|пров|просп|пл|бульв)(?:\.\s*|\s+)',
+    re.IGNORECASE
+)
+APOSTROPHES = re.compile(r"[’ʼ`´‘]")
+HOUSE_LATIN = str.maketrans({'a': 'а', 'e': 'е', 'o': 'о', 'c': 'с', 'i': 'і', 'k': 'к'})
+
+class Match(NamedTuple):
+    branch: str
+    queue_full: str
+    city: str
+    street: str
+    house: str
+    confidence: float
+
+def normalize_text(text: Optional[str]) -> str:
+    """Нижний регистр, единый апостроф, одиночные пробелы"""
+    if not text:
+        return ''
+    text = APOSTROPHES.sub("'", text.lower())
+    return re.sub(r'\s+', ' ', text).strip(' ,;:.')
+
+def normalize_city(city: Optional[str]) -> str:
+    """'м.Полтава' / 'Полтава' / 'М. Полтава' -> 'полтава'"""
+    return CITY_PREFIX.sub('', normalize_text(city)).strip()
+
+def normalize_street(street: Optional[str]) -> str:
+    """'вул. Грабчака' / 'вулиця Грабчака' / 'Грабчака' -> 'грабчака'"""
+    return STREET_PREFIX.sub('', normalize_text(street)).strip()
+
+def normalize_house(house: Optional[str]) -> str:
+    """'10 А' / '10-а' / '10a' -> '10а'"""
+    text = normalize_text(house).replace(' ', '')
+    text = re.sub(r'^(\d+)-(?=\D)', r'\1', text)
+    return text.translate(HOUSE_LATIN)
+
+def address_key(city: Optional[str], street: Optional[str], house: Optional[str]) -> Tuple[str, str, str]:
+    """Нормализованный ключ адреса для хеш-индекса"""
+    return (normalize_city(city), normalize_street(street), normalize_house(house))
+
+def split_free_form(text: str, known_cities: Iterable[str] = ()) -> Tuple[str, str, str]:
+    """
+    Разбирает свободный ввод на (місто, вулиця, будинок).
+    Сначала по разделителям, затем по пробелам с опорой на известные города.
+    Части, которые не удалось определить, возвращаются пустыми строками.
+    """
+    text = re.sub(r'\s+', ' ', text or '').strip()
+    parts = [p.strip() for p in re.split(r'[,;]', text) if p.strip()]
+
+    if len(parts) >= 3:
+        return parts[0], parts[1], ' '.join(parts[2:])
+
+    if len(parts) == 2:
+        head, tail = parts
+        if re.match(r'^\d', tail):
+            city, street = _split_city_street(head, known_cities)
+            return city, street, tail
+        return head, tail, ''
+
+    tokens = text.split(' ')
+    house_idx = None
+    for i in range(len(tokens) - 1, 0, -1):
+        if re.match(r'^\d', tokens[i]):
+            house_idx = i
+            break
+
+    if house_idx is None:
+        city, street = _split_city_street(text, known_cities)
+        return city, street, ''
+
+    house = ' '.join(tokens[house_idx:])
+    city, street = _split_city_street(' '.join(tokens[:house_idx]), known_cities)
+    return city, street, house
+
+def _split_city_street(text: str, known_cities: Iterable[str]) -> Tuple[str, str]:
+    """Отделяет населенный пункт от улицы по самому длинному известному префиксу"""
+    known = known_cities if isinstance(known_cities, (set, frozenset, dict)) else set(known_cities)
+    tokens = text.split(' ')
+
+    for i in range(len(tokens) - 1, 0, -1):
+        candidate = ' '.join(tokens[:i])
+        if normalize_city(candidate) in known:
+            return candidate, ' '.join(tokens[i:])
+
+    if len(tokens) > 1 and CITY_PREFIX.match(text) and not STREET_PREFIX.match(text):
+        return tokens[0], ' '.join(tokens[1:])
+
+    return '', text
+
+class AddressIndex:
+    """
+    Хеш-индекс адресов.
+    exact:       (місто, вулиця, будинок) -> список найденных строк
+    no_city:     (вулиця, будинок)        -> список найденных строк
+    street_keys: отсортированные пары (вулиця, місто) для поиска по префиксу
+    """
+
+    def __init__(self, rows: Iterable[Dict[str, object]]):
+        self.exact: Dict[Tuple[str, str, str], List[Tuple[str, str, str, str, str]]] = {}
+        self.no_city: Dict[Tuple[str, str], List[Tuple[str, str, str, str, str]]] = {}
+        self.cities: Dict[str, str] = {}
+        street_keys = set()
+
+        for row in rows:
+            key = address_key(row['city'], row['street'], row['house'])
+            value = (row['branch'], row['queue_full'], row['city'], row['street'], row['house'])
+
+            bucket = self.exact.setdefault(key, [])
+            if value not in bucket:
+                bucket.append(value)
+
+            bucket = self.no_city.setdefault(key[1:], [])
+            if value not in bucket:
+                bucket.append(value)
+
+            if key[0]:
+                self.cities.setdefault(key[0], row['city'])
+            street_keys.add((key[1], key[0]))
+
+        self.street_keys: List[Tuple[str, str]] = sorted(street_keys)
+
+    @classmethod
+    def from_file(cls, path: str = ADDRESSES_FILE) -> 'AddressIndex':
+        """Загружает индекс из addresses.json"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def __len__(self) -> int:
+        return len(self.exact)
+
+    @staticmethod
+    def _pick(found: List[Tuple[str, str, str, str, str]], confidence: float) -> Match:
+        """Собирает результат; несколько разных черг снижают уверенность"""
+        queues = sorted({v[1] for v in found})
+        branch, _, city, street, house = found[0]
+        if len(queues) > 1:
+            return Match(branch, '|'.join(queues), city, street, house, confidence * AMBIGUOUS_PENALTY)
+        return Match(branch, queues[0], city, street, house, confidence)
+
+    def lookup_key(self, key: Tuple[str, str, str]) -> Optional[Match]:
+        """Поиск по нормализованному ключу: точный, затем без города"""
+        city, street, house = key
+        if not street or not house:
+            return None
+
+        found = self.exact.get(key)
+        if found:
+            return self._pick(found, CONFIDENCE_EXACT)
+
+        found = self.no_city.get((street, house))
+        if found:
+            if not city:
+                return self._pick(found, CONFIDENCE_NO_CITY)
+            cityless = [v for v in found if not v[2]]
+            if cityless:
+                return self._pick(cityless, CONFIDENCE_NO_CITY)
+
+        return None
+
+    def lookup(self, city: str, street: str, house: str) -> Optional[Match]:
+        """Поиск по уже разделенным частям адреса"""
+        return self.lookup_key(address_key(city, street, house))
+
+    def lookup_text(self, text: str) -> Optional[Match]:
+        """Поиск по свободному вводу"""
+        return self.lookup(*split_free_form(text, self.cities))
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Компактное представление строк с адресами в памяти.
+- AddressRow — запись со __slots__ вместо словаря из 7–8 ключей
+- StringPool — словарь строк: одинаковые філія, чергa, город, улица и номер дома
+  хранятся одним объектом на весь набор данных
+- В словари строки превращаются только при записи (to_dict, dump_rows)
+
+Для совместимости со скриптами исправлений запись поддерживает row['city'] и row.get().
+
+Отчет о памяти (tracemalloc) — словари против AddressRow:
+    python3 address_rows.py addresses.json --repeat 10
+"""
+
+import argparse
+import json
+import tracemalloc
+from json.encoder import encode_basestring
+from typing import Dict, Iterable, List, Optional, Tuple
+
+FIELDNAMES = ['branch', 'queue', 'subqueue', 'queue_full', 'city', 'street', 'house']
+
+class StringPool:
+    """Интернирование строк в пределах одного набора данных"""
+
+    def __init__(self):
+        self.strings: Dict[str, str] = {}
+        self.queues: Dict[Tuple[int, int], str] = {}
+
+    def intern(self, text: Optional[str]) -> Optional[str]:
+        """Каноничный экземпляр строки"""
+        if text is None:
+            return None
+        return self.strings.setdefault(text, text)
+
+    def queue_full(self, queue: int, subqueue: int) -> str:
+        """'1.1' для пары (черга, підчерга) — одна строка на пару, без f-string на каждый адрес"""
+        key = (queue, subqueue)
+        value = self.queues.get(key)
+        if value is None:
+            value = self.queues[key] = self.intern(f"{queue}.{subqueue}")
+        return value
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+class AddressRow:
+    """Одна строка результата (поля как в FIELDNAMES плюс source)"""
+
+    __slots__ = ('branch', 'queue', 'subqueue', 'queue_full', 'city', 'street', 'house', 'source')
+
+    def __init__(self, branch: Optional[str], queue: int, subqueue: int, queue_full: str,
+                 city: str, street: str, house: str, source: Optional[tuple] = None):
+        self.branch = branch
+        self.queue = queue
+        self.subqueue = subqueue
+        self.queue_full = queue_full
+        self.city = city
+        self.street = street
+        self.house = house
+        self.source = source
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, object], pool: StringPool) -> 'AddressRow':
+        """Строка из словаря (JSON), все строки — через pool"""
+        return cls(
+            pool.intern(data['branch']), data['queue'], data['subqueue'], pool.intern(data['queue_full']),
+            pool.intern(data['city']), pool.intern(data['street']), pool.intern(data['house']),
+            data.get('source')
+        )
+
+    def to_dict(self) -> Dict[str, object]:
+        """Словарь для записи в JSON/CSV (без source)"""
+        return {
+            'branch': self.branch, 'queue': self.queue, 'subqueue': self.subqueue,
+            'queue_full': self.queue_full, 'city': self.city, 'street': self.street, 'house': self.house
+        }
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key: str, value):
+        try:
+            setattr(self, key, value)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, AddressRow):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    # Намеренно нехешируемая: скрипты исправлений меняют поля (row['city'] = ...),
+    # и хеш по полям устарел бы у записи внутри set/dict. Для множеств — address_index.address_key()
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"AddressRow({self.to_dict()!r})"
+
+def load_rows(path: str, pool: Optional[StringPool] = None) -> List[AddressRow]:
+    """Читает JSON с адресами сразу в AddressRow (словарь живет только на время одной строки)"""
+    if pool is None:
+        pool = StringPool()
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f, object_hook=lambda data: AddressRow.from_dict(data, pool))
+
+def encode_value(value) -> str:
+    """Скаляр в JSON (строки без экранирования кириллицы, как ensure_ascii=False)"""
+    if value is None:
+        return 'null'
+    if isinstance(value, str):
+        return encode_basestring(value)
+    if type(value) is int:
+        return str(value)
+    return json.dumps(value)
+
+def dump_rows(rows: Iterable[AddressRow], f):
+    """
+    Пишет строки в открытый файл байт в байт как json.dump(..., ensure_ascii=False, indent=2).
+    Записи плоские, поэтому каждая форматируется шаблоном без промежуточного словаря
+    и сразу уходит в файл.
+    """
+    separator = '[\n'
+    for row in rows:
+        fields = [f'    "{name}": {encode_value(getattr(row, name))}' for name in FIELDNAMES]
+        f.write(separator + '  {\n' + ',\n'.join(fields) + '\n  }')
+        separator = ',\n'
+    f.write('[]' if separator == '[\n' else '\n]')
+
+def measure(load) -> Tuple[int, int, int]:
+    """(число строк, память после загрузки, пик) в байтах"""
+    tracemalloc.start()
+    data = load()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(data), current, peak
+
+def main():
+    parser = argparse.ArgumentParser(description="Отчет о памяти: словари против AddressRow")
+    parser.add_argument('path', nargs='?', default="addresses.json", help="JSON с адресами")
+    parser.add_argument('--repeat', type=int, default=1,
+                        help="загрузить файл несколько раз подряд (имитация документа на всю область)")
+    args = parser.parse_args()
+
+    def load_dicts():
+        data = []
+        for _ in range(args.repeat):
+            with open(args.path, 'r', encoding='utf-8') as f:
+                data.extend(json.load(f))
+        return data
+
+    def load_compact():
+        pool = StringPool()
+        data = []
+        for _ in range(args.repeat):
+            data.extend(load_rows(args.path, pool))
+        return data
+
+    count, dict_current, dict_peak = measure(load_dicts)
+    _, row_current, row_peak = measure(load_compact)
+    if not count:
+        raise SystemExit(f"В {args.path} нет адресов, сравнивать нечего")
+
+    mb = 1024 * 1024
+    print("\n" + "="*60)
+    print(f"ПАМЯТЬ: {args.path} x{args.repeat} ({count} строк)")
+    print("="*60)
+    print(f"{'':12}{'после загрузки':>18}{'пик':>12}{'на строку':>12}")
+    print(f"{'dict':12}{dict_current / mb:>15.1f} МБ{dict_peak / mb:>9.1f} МБ{dict_current / count:>10.0f} Б")
+    print(f"{'AddressRow':12}{row_current / mb:>15.1f} МБ{row_peak / mb:>9.1f} МБ{row_current / count:>10.0f} Б")
+    print(f"\nЭкономия: {1 - row_current / dict_current:.1%} (пик: {1 - row_peak / dict_peak:.1%})")
+    print("="*60)
+
+if __name__ == '__main__':
+    main()
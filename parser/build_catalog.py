@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Построение каталога для навигации в боте: місто → вулиця → будинок.
+- Списки уже дедуплицированы и отсортированы
+- Номера домов сортируются натурально: номер, дробь, буквенный суффикс
+- Количество страниц посчитано заранее с размером страницы своего уровня (столько
+  кнопок показывает бот), любую страницу можно отдать срезом
+"""
+
+import json
+import re
+import sys
+from typing import Dict, List, Tuple
+
+INPUT_FILE = "addresses.json"
+OUTPUT_FILE = "browse_catalog.json"
+
+CATALOG_VERSION = 2
+# Размер страницы на каждом уровне — столько кнопок на странице в боте (Main.kt)
+PAGE_SIZES = {'cities': 10, 'streets': 10, 'houses': 15}
+
+HOUSE_PATTERN = re.compile(r'^(\d+)\s*(?:/\s*(\d+))?\s*-?\s*(.*)$')
+
+def house_sort_key(house: str) -> Tuple[int, int, int, str, str]:
+    """
+    Ключ натуральной сортировки номера дома: (номер, дробь, суффикс).
+    Пример: '1/49' < '10' < '10а' < '10/2' < '149'
+    Номера без цифр в начале уходят в конец списка.
+    """
+    text = house.strip()
+    match = HOUSE_PATTERN.match(text)
+    if not match:
+        return (1, sys.maxsize, 0, text.lower(), text)
+
+    number = int(match.group(1))
+    fraction = int(match.group(2)) if match.group(2) else 0
+    suffix = match.group(3).strip().lower()
+    return (0, number, fraction, suffix, text)
+
+def total_pages(count: int, page_size: int) -> int:
+    """Количество страниц для списка заданной длины"""
+    return (count + page_size - 1) // page_size
+
+def make_node(items: List[str], level: str) -> Dict[str, object]:
+    """Узел каталога: отсортированный список и число страниц его уровня"""
+    return {
+        'items': items,
+        'pages': total_pages(len(items), PAGE_SIZES[level])
+    }
+
+def build_catalog(data: List[Dict[str, object]]) -> Dict[str, object]:
+    """Строит каталог из списка адресов за один проход"""
+    tree: Dict[str, Dict[str, set]] = {}
+
+    for addr in data:
+        city = addr['city']
+        if not city or not city.strip():
+            continue
+        streets = tree.setdefault(city, {})
+        streets.setdefault(addr['street'], set()).add(addr['house'])
+
+    cities = sorted(tree)
+
+    streets_catalog = {}
+    houses_catalog = {}
+    for city in cities:
+        streets = tree[city]
+        streets_catalog[city] = make_node(sorted(streets), 'streets')
+        houses_catalog[city] = {
+            street: make_node(sorted(houses, key=house_sort_key), 'houses')
+            for street, houses in sorted(streets.items())
+        }
+
+    return {
+        'version': CATALOG_VERSION,
+        'page_sizes': PAGE_SIZES,
+        'cities': make_node(cities, 'cities'),
+        'streets': streets_catalog,
+        'houses': houses_catalog
+    }
+
+def get_page(catalog: Dict[str, object], level: str, node: Dict[str, object], page: int) -> List[str]:
+    """Возвращает страницу узла каталога срезом"""
+    page_size = catalog['page_sizes'][level]
+    start = page * page_size
+    return node['items'][start:start + page_size]
+
+def main():
+    print(f"Загрузка данных из {INPUT_FILE}...")
+    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    print(f"Всего адресов: {len(data)}")
+
+    catalog = build_catalog(data)
+
+    print(f"Сохранение каталога в {OUTPUT_FILE}...")
+    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+        json.dump(catalog, f, ensure_ascii=False, indent=2)
+
+    street_count = sum(len(node['items']) for node in catalog['streets'].values())
+    house_count = sum(
+        len(node['items'])
+        for streets in catalog['houses'].values()
+        for node in streets.values()
+    )
+
+    print("\n" + "="*60)
+    print("СТАТИСТИКА КАТАЛОГА")
+    print("="*60)
+    print(f"Населенных пунктов: {len(catalog['cities']['items'])}")
+    print(f"Улиц: {street_count}")
+    print(f"Домов: {house_count}")
+    print("Размер страницы: " + ", ".join(f"{level} {size}" for level, size in catalog['page_sizes'].items()))
+    print("\n" + "="*60)
+    print(f"✓ Готово! Каталог сохранен в {OUTPUT_FILE}")
+    print("="*60)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Массовое сопоставление списка адресов с чергами.
+- Читает входной CSV потоково, пачками
+- Нормализует каждый адрес и ищет его в хеш-индексе
+- Для промахов делает sort-merge по отсортированным улицам (совпадение по префиксу)
+- Пачки обрабатываются в нескольких процессах, в памяти держится ограниченное число пачек
+- Пишет выходной CSV: исходные колонки + черга, філія и уверенность сопоставления
+
+Запуск:
+    python3 bulk_join.py customers.csv queues.csv --column address --workers 4
+"""
+
+import argparse
+import csv
+import os
+import time
+from collections import deque
+from multiprocessing import Pool
+from typing import Iterator, List, Optional, Tuple
+
+from address_index import (
+    ADDRESSES_FILE, AMBIGUOUS_PENALTY, CONFIDENCE_STREET_PREFIX, AddressIndex, Match, address_key, split_free_form
+)
+
+BATCH_SIZE = 5000
+OUTPUT_COLUMNS = ['queue_full', 'branch', 'matched_city', 'matched_street', 'matched_house', 'confidence']
+
+_index: Optional[AddressIndex] = None
+
+def init_worker(addresses_file: str):
+    """Загружает индекс один раз на процесс"""
+    global _index
+    _index = AddressIndex.from_file(addresses_file)
+
+def merge_fallback(index: AddressIndex, misses: List[Tuple[int, Tuple[str, str, str]]]) -> List[Tuple[int, Match]]:
+    """
+    Sort-merge по улицам для адресов, не найденных в хеш-индексе.
+    Промахи сортируются по улице и проходят одним проходом по index.street_keys;
+    кандидаты — улицы индекса, начинающиеся с введенного названия.
+    """
+    found = []
+    keys = index.street_keys
+    j = 0
+
+    for pos, (city, street, house) in sorted(misses, key=lambda m: m[1][1]):
+        if not street or not house:
+            continue
+
+        while j < len(keys) and keys[j][0] < street:
+            j += 1
+
+        matches = []
+        k = j
+        while k < len(keys) and keys[k][0].startswith(street):
+            cand_street, cand_city = keys[k]
+            if not city or cand_city == city:
+                match = index.lookup_key((cand_city, cand_street, house))
+                if match:
+                    matches.append(match)
+            k += 1
+
+        if matches:
+            queues = {m.queue_full for m in matches}
+            confidence = CONFIDENCE_STREET_PREFIX * min(m.confidence for m in matches)
+            best = matches[0]
+            if len(queues) > 1:
+                best = best._replace(queue_full='|'.join(sorted(queues)), confidence=confidence * AMBIGUOUS_PENALTY)
+            else:
+                best = best._replace(confidence=confidence)
+            found.append((pos, best))
+
+    return found
+
+def join_batch(addresses: List[str]) -> List[Optional[Match]]:
+    """Сопоставляет пачку адресов: хеш-поиск, затем sort-merge для промахов"""
+    index = _index
+    results: List[Optional[Match]] = [None] * len(addresses)
+    misses = []
+
+    for pos, text in enumerate(addresses):
+        key = address_key(*split_free_form(text, index.cities))
+        match = index.lookup_key(key)
+        if match:
+            results[pos] = match
+        else:
+            misses.append((pos, key))
+
+    for pos, match in merge_fallback(index, misses):
+        results[pos] = match
+
+    return results
+
+def read_batches(reader: Iterator[List[str]], column: int, size: int) -> Iterator[Tuple[List[List[str]], List[str]]]:
+    """Режет поток строк CSV на пачки (строки, адреса)"""
+    rows = []
+    for row in reader:
+        rows.append(row)
+        if len(rows) >= size:
+            yield rows, [r[column] if column < len(r) else '' for r in rows]
+            rows = []
+    if rows:
+        yield rows, [r[column] if column < len(r) else '' for r in rows]
+
+def format_match(match: Optional[Match]) -> List[str]:
+    """Колонки результата для одной строки"""
+    if not match:
+        return ['', '', '', '', '', '0.00']
+    return [match.queue_full, match.branch, match.city, match.street, match.house, f"{match.confidence:.2f}"]
+
+def main():
+    parser = argparse.ArgumentParser(description="Массовое сопоставление адресов с чергами")
+    parser.add_argument('input', help="входной CSV с адресами")
+    parser.add_argument('output', help="выходной CSV")
+    parser.add_argument('--column', default='address', help="имя колонки с адресом (по умолчанию address)")
+    parser.add_argument('--addresses', default=ADDRESSES_FILE, help="распарсенные адреса (addresses.json)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="число процессов")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="строк в пачке")
+    args = parser.parse_args()
+
+    stats = {'rows': 0, 'matched': 0, 'fallback': 0, 'ambiguous': 0}
+    started = time.time()
+
+    with open(args.input, 'r', newline='', encoding='utf-8-sig') as fin, \
+         open(args.output, 'w', newline='', encoding='utf-8') as fout:
+        reader = csv.reader(fin)
+        writer = csv.writer(fout)
+
+        header = next(reader, None)
+        if header is None:
+            print(f"Пустой входной файл: {args.input}")
+            return
+        if args.column not in header:
+            raise SystemExit(f"Колонка '{args.column}' не найдена в {args.input}: {header}")
+        column = header.index(args.column)
+        writer.writerow(header + OUTPUT_COLUMNS)
+
+        def write_batch(rows: List[List[str]], results: List[Optional[Match]]):
+            for row, match in zip(rows, results):
+                writer.writerow(row + format_match(match))
+                stats['rows'] += 1
+                if match:
+                    stats['matched'] += 1
+                    if match.confidence < 1.0 and '|' not in match.queue_full:
+                        stats['fallback'] += 1
+                    if '|' in match.queue_full:
+                        stats['ambiguous'] += 1
+
+        batches = read_batches(reader, column, args.batch_size)
+
+        if args.workers <= 1:
+            init_worker(args.addresses)
+            for rows, addresses in batches:
+                write_batch(rows, join_batch(addresses))
+        else:
+            max_inflight = args.workers * 2
+            with Pool(args.workers, initializer=init_worker, initargs=(args.addresses,)) as pool:
+                pending = deque()
+                for rows, addresses in batches:
+                    pending.append((rows, pool.apply_async(join_batch, (addresses,))))
+                    if len(pending) >= max_inflight:
+                        done_rows, result = pending.popleft()
+                        write_batch(done_rows, result.get())
+                while pending:
+                    done_rows, result = pending.popleft()
+                    write_batch(done_rows, result.get())
+
+    elapsed = time.time() - started
+    matched_pct = 100.0 * stats['matched'] / stats['rows'] if stats['rows'] else 0.0
+
+    print("\n" + "="*60)
+    print("РЕЗУЛЬТАТ СОПОСТАВЛЕНИЯ")
+    print("="*60)
+    print(f"Строк: {stats['rows']}")
+    print(f"Найдено: {stats['matched']} ({matched_pct:.1f}%)")
+    print(f"  Неточных совпадений: {stats['fallback']}")
+    print(f"  Неоднозначных (несколько черг): {stats['ambiguous']}")
+    print(f"Время: {elapsed:.1f} с ({stats['rows'] / elapsed if elapsed else 0:.0f} строк/с)")
+    print(f"\n✓ Результат сохранен в {args.output}")
+    print("="*60)
+
+if __name__ == '__main__':
+    main()
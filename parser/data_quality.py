@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Проверка качества распарсенных адресов набором правил.
+- Строки один раз раскладываются в столбцы (branch, queue_full, city, street, house, страница)
+- Каждое правило — один проход по своему столбцу. Строки в наборе интернированы (address_rows),
+  поэтому условие считается один раз на уникальное значение, а по строкам идет только
+  проверка вхождения во множество найденных значений
+- Отчет об аномалиях группируется по правилу, странице PDF и філії
+
+Правила: пустой город, неполное название населенного пункта (м.І, с.В), организация
+или название улицы в номере дома, неразвернутый диапазон ('10-250'), подозрительно
+длинная серия подряд идущих номеров (в отчете — одна запись на серию с ее длиной).
+Правила из DROP_RULES использует cleanup_invalid_cities, short_city — fix_short_cities_manual.
+
+Запуск:
+    python3 data_quality.py addresses.json
+    python3 data_quality.py addresses.json --repeat 20   # тот же набор ×20 — масштаб области
+"""
+
+import argparse
+import json
+import re
+import time
+from collections import Counter
+from itertools import compress, count, islice, repeat
+from operator import attrgetter, eq, ne, sub
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from address_rows import AddressRow, load_rows
+from keyword_matcher import CELL_MATCHER, ORGANISATION
+
+OUTPUT_FILE = "quality_report.json"
+EXAMPLES_PER_GROUP = 5
+
+# Один диапазон разворачивается максимум в 101 дом (expand_house_range, ширина до 100);
+# серия длиннее — несколько диапазонов встык в одной ячейке. Более широкий диапазон
+# остается строкой '10-250' (правило house_range)
+RANGE_RUN_LIMIT = 101
+# Вместо номера, который не число: разность с любым номером дома далека от 1
+NOT_A_NUMBER = -1 << 40
+
+COLUMNS = ('branch', 'queue_full', 'city', 'street', 'house', 'source')
+RUN_KEY = ('branch', 'queue_full', 'city', 'street', 'source')
+CITY_PREFIXES = re.compile(r'смт\.|м\.|с\.')
+HOUSE_QUOTES = re.compile(r'["«»“”„(]')
+HOUSE_WORD = re.compile(r"[^\W\d_][^\W\d_'’]{2,}")
+HOUSE_RANGE = re.compile(r'^\d+\s*-\s*\d+$')
+
+Columns = Dict[str, list]
+# (первая строка, конец) серии строк
+Span = Tuple[int, int]
+
+class Rule(NamedTuple):
+    name: str
+    field: str
+    description: str
+    # столбцы -> номера строк с аномалией
+    find: Callable[[Columns], List[int]]
+    # для правил по сериям строк: столбцы -> серии; в отчете одна запись на серию
+    runs: Optional[Callable[[Columns], List[Span]]] = None
+
+def columns(rows: Iterable[AddressRow]) -> Columns:
+    """Строки -> столбцы; страница берется из source (есть только у строк прямо из парсера)"""
+    rows = list(rows)
+    result = {field: list(map(attrgetter(field), rows)) for field in COLUMNS}
+    pages = {source: source[0] if source else None for source in set(result['source'])}
+    result['page'] = list(map(pages.get, result['source']))
+    return result
+
+def value_rule(field: str, predicate: Callable[[str], bool]) -> Callable[[Columns], List[int]]:
+    """Правило по значению: условие на уникальных значениях, затем один проход по столбцу"""
+    def find(cols: Columns) -> List[int]:
+        column = cols[field]
+        flagged = {value for value in set(column) if predicate(value)}
+        if not flagged:
+            return []
+        return [i for i, value in enumerate(column) if value in flagged]
+    return find
+
+def is_empty(value: Optional[str]) -> bool:
+    return not value
+
+def is_short_city(city: Optional[str]) -> bool:
+    """'м.І', 'с.В' — от названия после префикса осталось не больше двух символов"""
+    return bool(city) and len(CITY_PREFIXES.sub('', city).strip()) <= 2
+
+def has_organisation(house: Optional[str]) -> bool:
+    """'51/2 АТ "Полтавахолод"' — форма собственности, кавычки или скобка в номере дома"""
+    return bool(house) and (HOUSE_QUOTES.search(house) is not None or CELL_MATCHER.has(house, ORGANISATION))
+
+def has_words(house: Optional[str]) -> bool:
+    """'53. Артема Амеліна' — в номер дома попало слово из трех и больше букв"""
+    return bool(house) and HOUSE_WORD.search(house) is not None
+
+def is_unexpanded_range(house: Optional[str]) -> bool:
+    """'10-250', '9-1' — диапазон, который парсер не развернул (шире 100 или убывающий)"""
+    return bool(house) and HOUSE_RANGE.match(house) is not None
+
+def consecutive(values: List[int]) -> List[int]:
+    """Номера i, для которых values[i] == values[i - 1] + 1 (без цикла на Python)"""
+    return list(compress(count(1), map(eq, map(sub, islice(values, 1, None), values), repeat(1))))
+
+def consecutive_breaks(steps: List[int]) -> List[int]:
+    """Позиции j, с которых начинается новая серия подряд идущих номеров в steps"""
+    return list(compress(count(1), map(ne, map(sub, islice(steps, 1, None), steps), repeat(1))))
+
+def range_runs(cols: Columns) -> List[Span]:
+    """
+    Серии подряд идущих номеров домов длиннее RANGE_RUN_LIMIT в пределах одной ячейки PDF
+    (для строк без source — одной улицы той же черги).
+    Шаги +1 и их серии ищутся разностями соседних элементов; ключи сравниваются
+    только внутри уже найденных длинных серий.
+    """
+    house = cols['house']
+    numbers = {value: int(value) for value in set(house) if value and value.isascii() and value.isdigit()}
+    steps = consecutive(list(map(numbers.get, house, repeat(NOT_A_NUMBER, len(house)))))
+    if not steps:
+        return []
+
+    # Серия шагов steps[a:b] — это строки steps[a] - 1 ... steps[b - 1]
+    breaks = [0] + consecutive_breaks(steps) + [len(steps)]
+    keys = [cols[field] for field in RUN_KEY]
+    runs: List[Span] = []
+    for a, b in zip(breaks, breaks[1:]):
+        if b - a < RANGE_RUN_LIMIT:
+            continue
+        first, last = steps[a] - 1, steps[b - 1] + 1
+        # Внутри серии номеров может смениться улица или ячейка
+        run_keys = list(zip(*(column[first:last] for column in keys)))
+        splits = [0] + list(compress(count(1), map(ne, run_keys[1:], run_keys))) + [len(run_keys)]
+        for start, end in zip(splits, splits[1:]):
+            if end - start > RANGE_RUN_LIMIT:
+                runs.append((first + start, first + end))
+    return runs
+
+def find_range_runs(cols: Columns) -> List[int]:
+    """Все строки длинных серий"""
+    return [i for start, end in range_runs(cols) for i in range(start, end)]
+
+RULES = [
+    Rule('empty_city', 'city', "Пустой населенный пункт", value_rule('city', is_empty)),
+    Rule('short_city', 'city', "Неполное название населенного пункта", value_rule('city', is_short_city)),
+    Rule('house_organisation', 'house', "Организация в номере дома", value_rule('house', has_organisation)),
+    Rule('house_words', 'house', "Слова (название улицы) в номере дома", value_rule('house', has_words)),
+    Rule('house_range', 'house', "Неразвернутый диапазон домов", value_rule('house', is_unexpanded_range)),
+    Rule('range_run', 'house', f"Серия подряд идущих домов длиннее {RANGE_RUN_LIMIT}", find_range_runs, range_runs),
+]
+RULES_BY_NAME = {rule.name: rule for rule in RULES}
+
+# Строки с такими аномалиями не попадают в итоговый набор
+DROP_RULES = ('empty_city', 'short_city')
+
+def find(cols: Columns, *names: str) -> List[int]:
+    """Номера строк (по возрастанию), нарушающих хотя бы одно из правил"""
+    found = set()
+    for name in names:
+        found.update(RULES_BY_NAME[name].find(cols))
+    return sorted(found)
+
+def group_anomalies(cols: Columns, rule: Rule, found: List[int]) -> Dict[str, object]:
+    """Аномалии одного правила по (страница, філія) с примерами"""
+    groups = Counter((cols['page'][i], cols['branch'][i] or '') for i in found)
+    examples: Dict[tuple, List[str]] = {}
+    for i in found:
+        bucket = examples.setdefault((cols['page'][i], cols['branch'][i] or ''), [])
+        if len(bucket) < EXAMPLES_PER_GROUP:
+            bucket.append(f"{cols['queue_full'][i]} | {cols['city'][i]} | {cols['street'][i]} | {cols['house'][i]}")
+
+    return {
+        'rule': rule.name,
+        'field': rule.field,
+        'description': rule.description,
+        'count': len(found),
+        'groups': [
+            {'page': page, 'branch': branch, 'count': count, 'examples': examples[(page, branch)]}
+            for (page, branch), count in sorted(groups.items(), key=lambda item: (item[0][0] or 0, item[0][1]))
+        ],
+    }
+
+def describe_runs(cols: Columns, rule: Rule, runs: List[Span]) -> Dict[str, object]:
+    """Аномалии правила по сериям: одна запись на серию с ее длиной"""
+    return {
+        'rule': rule.name,
+        'field': rule.field,
+        'description': rule.description,
+        'count': len(runs),
+        'rows': sum(end - start for start, end in runs),
+        'runs': [
+            {
+                'page': cols['page'][start],
+                'branch': cols['branch'][start] or '',
+                'length': end - start,
+                'example': f"{cols['queue_full'][start]} | {cols['city'][start]} | {cols['street'][start]} | "
+                           f"{cols['house'][start]}-{cols['house'][end - 1]}",
+            }
+            for start, end in runs
+        ],
+    }
+
+def validate(rows: Iterable[AddressRow]) -> Dict[str, object]:
+    """Прогоняет все правила и собирает отчет"""
+    started = time.perf_counter()
+    cols = columns(rows)
+    found = {rule.name: rule.runs(cols) if rule.runs else rule.find(cols) for rule in RULES}
+    elapsed = time.perf_counter() - started
+
+    return {
+        'rows': len(cols['city']),
+        'elapsed_ms': round(elapsed * 1000, 2),
+        'rules': [
+            describe_runs(cols, rule, found[rule.name]) if rule.runs else group_anomalies(cols, rule, found[rule.name])
+            for rule in RULES
+        ],
+    }
+
+def format_report(report: Dict[str, object]) -> str:
+    """Краткая сводка для консоли"""
+    lines = [f"Проверено строк: {report['rows']} за {report['elapsed_ms']:.1f} мс"]
+    for rule in report['rules']:
+        entries = rule['runs'] if 'runs' in rule else rule['groups']
+        pages = {entry['page'] for entry in entries} - {None}
+        where = f", страниц: {len(pages)}" if pages else ""
+        count = f"серий: {rule['count']}, строк: {rule['rows']}" if 'runs' in rule else rule['count']
+        lines.append(f"  {rule['description']}: {count}{where}")
+    return '\n'.join(lines)
+
+def save_report(report: Dict[str, object], path: str = OUTPUT_FILE):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(description="Проверка качества распарсенных адресов")
+    parser.add_argument('path', nargs='?', default="addresses.json", help="JSON с адресами")
+    parser.add_argument('--out', default=OUTPUT_FILE, help="файл отчета")
+    parser.add_argument('--repeat', type=int, default=1, help="повторить набор N раз (замер на большом объеме)")
+    args = parser.parse_args()
+
+    print(f"Загрузка данных из {args.path}...")
+    rows = load_rows(args.path) * args.repeat
+    report = validate(rows)
+    save_report(report, args.out)
+
+    print("\n" + "="*60)
+    print("ПРОВЕРКА КАЧЕСТВА ДАННЫХ")
+    print("="*60)
+    print(format_report(report))
+    print("\n" + "="*60)
+    print(f"✓ Готово! Отчет сохранен в {args.out}")
+    print("="*60)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Дифференциальная проверка двух реализаций парсера.
+- Оба парсера получают одни и те же закешированные страницы (page_cache)
+- Результаты выравниваются по исходной ячейке таблицы (страница, таблица, строка);
+  если один из парсеров работает по тексту, выравнивание идет по странице
+- В отчет попадают построчные различия: пропущенные, лишние, адреса с другой чергой
+  и адреса с теми же чергами, но другим числом строк (дубли), а также время работы каждого парсера
+
+Запуск:
+    python3 diff_parsers.py v2 improved
+    python3 diff_parsers.py v2 my_fast_parser:parse_tables --fail-on-diff
+"""
+
+import argparse
+import importlib
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List, Tuple
+
+from address_index import address_key
+from page_cache import DEFAULT_PARTS, load_pages
+
+PDF_FILE = "HPV_25_26-zminy-hruden.pdf"
+REPORT_FILE = "diff_report.txt"
+REPORT_EXAMPLES = 20
+
+# Известные парсеры: имя -> (модуль, функция, дополнительные аргументы)
+ENGINES = {
+    'v2': ('parse_pdf_v2', 'parse_tables', {'verbose': False}),
+    'improved': ('parse_pdf_improved', 'parse_tables', {'verbose': False}),
+    'legacy': ('parse_pdf', 'parse_text_pages', {}),
+}
+
+# Парсеры, которым кроме таблиц нужен текст страниц (для модуль:функция — флаг --text)
+TEXT_ENGINES = {'legacy'}
+
+def resolve_engine(spec: str) -> Callable[[List[Dict[str, object]]], List[Dict[str, object]]]:
+    """Возвращает функцию парсера по имени из ENGINES или по строке 'модуль:функция'"""
+    if spec in ENGINES:
+        module_name, func_name, kwargs = ENGINES[spec]
+    elif ':' in spec:
+        module_name, func_name = spec.split(':', 1)
+        kwargs = {}
+    else:
+        raise SystemExit(f"Неизвестный парсер '{spec}'. Доступны: {', '.join(ENGINES)} или модуль:функция")
+
+    func = getattr(importlib.import_module(module_name), func_name)
+    return lambda pages: func(pages, **kwargs)
+
+def run_engine(spec: str, pages: List[Dict[str, object]], repeat: int) -> Tuple[List[Dict[str, object]], float]:
+    """Запускает парсер repeat раз, возвращает результат и лучшее время"""
+    engine = resolve_engine(spec)
+    best = float('inf')
+    rows = []
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        rows = engine(pages)
+        best = min(best, time.perf_counter() - started)
+    return rows, best
+
+def row_queue(row: Dict[str, object]) -> str:
+    """Черга строки: queue_full, если есть, иначе номер черги"""
+    return str(row.get('queue_full') or row.get('queue') or '')
+
+def group_rows(rows: List[Dict[str, object]], by_cell: bool) -> Dict[tuple, Dict[Tuple[str, str, str], List[str]]]:
+    """Группирует строки по исходной ячейке (или странице): {ячейка: {адрес: [черги]}}"""
+    groups = defaultdict(lambda: defaultdict(list))
+    for row in rows:
+        source = tuple(row['source'])
+        cell = source if by_cell else source[:1]
+        key = address_key(row['city'], row['street'], row['house'])
+        groups[cell][key].append(row_queue(row))
+    return groups
+
+def diff_rows(rows_a: List[Dict[str, object]], rows_b: List[Dict[str, object]]) -> Dict[str, object]:
+    """Сравнивает два результата построчно внутри выровненных ячеек"""
+    by_cell = all(row['source'][1] >= 0 for row in rows_a + rows_b)
+    groups_a = group_rows(rows_a, by_cell)
+    groups_b = group_rows(rows_b, by_cell)
+
+    cells = sorted(set(groups_a) | set(groups_b))
+
+    result = {
+        'by_cell': by_cell,
+        'cells_a': len(groups_a),
+        'cells_b': len(groups_b),
+        'cells_total': len(cells),
+        'cells_equal': 0,
+        'cells_only_a': 0,
+        'cells_only_b': 0,
+        'missing': [],
+        'extra': [],
+        'changed': [],
+        'duplicates': [],
+    }
+
+    for cell in cells:
+        addrs_a = groups_a.get(cell, {})
+        addrs_b = groups_b.get(cell, {})
+
+        if not addrs_b:
+            result['cells_only_a'] += 1
+        elif not addrs_a:
+            result['cells_only_b'] += 1
+
+        differs = False
+        for key in sorted(set(addrs_a) | set(addrs_b)):
+            queues_a = sorted(addrs_a.get(key, []))
+            queues_b = sorted(addrs_b.get(key, []))
+            if queues_a == queues_b:
+                continue
+            differs = True
+            if not queues_b:
+                result['missing'].append((cell, key, queues_a))
+            elif not queues_a:
+                result['extra'].append((cell, key, queues_b))
+            elif set(queues_a) != set(queues_b):
+                result['changed'].append((cell, key, sorted(set(queues_a)), sorted(set(queues_b))))
+            else:
+                # Черги те же, отличается только число строк (например, адрес продублирован)
+                result['duplicates'].append((cell, key, queues_a, queues_b))
+
+        if not differs:
+            result['cells_equal'] += 1
+
+    return result
+
+def format_cell(cell: tuple) -> str:
+    """Человекочитаемое обозначение ячейки"""
+    if len(cell) == 1:
+        return f"стр. {cell[0]}"
+    return f"стр. {cell[0]}, табл. {cell[1]}, строка {cell[2]}"
+
+def format_address(key: Tuple[str, str, str]) -> str:
+    """Нормализованный адрес одной строкой"""
+    city, street, house = key
+    return f"{city or '?'}, {street}, {house}"
+
+def format_counts(queues: List[str]) -> str:
+    """Черги с числом строк: '1.1 ×6, 2.1'"""
+    return ', '.join(queue if count == 1 else f"{queue} ×{count}" for queue, count in sorted(Counter(queues).items()))
+
+def write_report(path: str, spec_a: str, spec_b: str, stats_a: Tuple[int, float],
+                 stats_b: Tuple[int, float], diff: Dict[str, object]):
+    """Сохраняет полный отчет о различиях"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"=== Сравнение парсеров: A={spec_a}, B={spec_b} ===\n\n")
+        f.write(f"A: {stats_a[0]} адресов за {stats_a[1] * 1000:.1f} мс\n")
+        f.write(f"B: {stats_b[0]} адресов за {stats_b[1] * 1000:.1f} мс\n")
+        f.write(f"Выравнивание: {'по ячейкам' if diff['by_cell'] else 'по страницам'}\n\n")
+
+        f.write(f"Пропущено в B ({len(diff['missing'])}):\n")
+        for cell, key, queues in diff['missing']:
+            f.write(f"  [{format_cell(cell)}] {format_address(key)} — {', '.join(queues)}\n")
+
+        f.write(f"\nЛишние в B ({len(diff['extra'])}):\n")
+        for cell, key, queues in diff['extra']:
+            f.write(f"  [{format_cell(cell)}] {format_address(key)} — {', '.join(queues)}\n")
+
+        f.write(f"\nДругая черга ({len(diff['changed'])}):\n")
+        for cell, key, queues_a, queues_b in diff['changed']:
+            f.write(f"  [{format_cell(cell)}] {format_address(key)}: "
+                    f"{', '.join(queues_a)} → {', '.join(queues_b)}\n")
+
+        f.write(f"\nДругое число строк ({len(diff['duplicates'])}):\n")
+        for cell, key, queues_a, queues_b in diff['duplicates']:
+            f.write(f"  [{format_cell(cell)}] {format_address(key)}: "
+                    f"{format_counts(queues_a)} → {format_counts(queues_b)}\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Дифференциальная проверка двух парсеров")
+    parser.add_argument('engine_a', help="эталонный парсер (v2, improved, legacy или модуль:функция)")
+    parser.add_argument('engine_b', help="проверяемый парсер")
+    parser.add_argument('--pdf', default=PDF_FILE, help="PDF с графиком")
+    parser.add_argument('--repeat', type=int, default=3, help="сколько раз запускать каждый парсер")
+    parser.add_argument('--report', default=REPORT_FILE, help="файл полного отчета")
+    parser.add_argument('--fail-on-diff', action='store_true', help="код возврата 1 при любых различиях")
+    parser.add_argument('--text', action='store_true', help="извлечь и текст страниц (для модуль:функция)")
+    args = parser.parse_args()
+
+    need_text = args.text or bool({args.engine_a, args.engine_b} & TEXT_ENGINES)
+    parts = DEFAULT_PARTS + ('text',) if need_text else DEFAULT_PARTS
+
+    print(f"Загрузка страниц {args.pdf}...")
+    pages = load_pages(args.pdf, parts=parts)
+    print(f"Страниц: {len(pages)}")
+
+    rows_a, time_a = run_engine(args.engine_a, pages, args.repeat)
+    rows_b, time_b = run_engine(args.engine_b, pages, args.repeat)
+
+    diff = diff_rows(rows_a, rows_b)
+    write_report(args.report, args.engine_a, args.engine_b, (len(rows_a), time_a), (len(rows_b), time_b), diff)
+
+    total_diff = len(diff['missing']) + len(diff['extra']) + len(diff['changed']) + len(diff['duplicates'])
+
+    print("\n" + "="*60)
+    print(f"СРАВНЕНИЕ: A={args.engine_a}  B={args.engine_b}")
+    print("="*60)
+    print(f"A: {len(rows_a)} адресов, {time_a * 1000:.1f} мс")
+    print(f"B: {len(rows_b)} адресов, {time_b * 1000:.1f} мс")
+    if time_b > 0:
+        print(f"Ускорение B относительно A: {time_a / time_b:.2f}x")
+    unit = 'ячеек' if diff['by_cell'] else 'страниц'
+    print(f"\nСовпадающих {unit}: {diff['cells_equal']} из {diff['cells_total']}")
+    print(f"Только в A: {diff['cells_only_a']}, только в B: {diff['cells_only_b']}")
+    print(f"\nПропущено в B: {len(diff['missing'])}")
+    print(f"Лишние в B:    {len(diff['extra'])}")
+    print(f"Другая черга:  {len(diff['changed'])}")
+
+    for cell, key, queues_a, queues_b in diff['changed'][:REPORT_EXAMPLES]:
+        print(f"  [{format_cell(cell)}] {format_address(key)}: {', '.join(queues_a)} → {', '.join(queues_b)}")
+
+    print(f"Другое число строк: {len(diff['duplicates'])}")
+    for cell, key, queues_a, queues_b in diff['duplicates'][:REPORT_EXAMPLES]:
+        print(f"  [{format_cell(cell)}] {format_address(key)}: {format_counts(queues_a)} → {format_counts(queues_b)}")
+
+    print(f"\nПолный отчет: {args.report}")
+    print("="*60)
+
+    if args.fail_on_diff and total_diff:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
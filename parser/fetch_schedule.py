@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Загрузка графика по URL с условными запросами.
+- Опрашивает адрес графика с If-None-Match (ETag) и If-Modified-Since: пока файл
+  не менялся, сервер отвечает 304 и тело не скачивается
+- Новое тело пишется на диск потоково, блоками, SHA-256 считается по ходу записи
+- Хеш сравнивается с исходником последней публикации (published/current/manifest.json):
+  если документ тот же (сервер не поддерживает условные запросы или перевыложил файл),
+  конвейер не запускается вовсе — pdfplumber даже не импортируется
+- Новый документ обрабатывается тем же конвейером, что и в watch_inbox.py
+
+ETag и Last-Modified сохраняются только после обработки документа. Оборванная загрузка
+(тело короче Content-Length, разрыв соединения) повторится на следующем опросе, а хеш
+документа, на котором упал конвейер, запоминается: он не разбирается заново, пока
+содержимое не изменится.
+
+Запуск:
+    python3 fetch_schedule.py --url https://example.com/grafik.pdf            # опрос каждые 10 мин
+    python3 fetch_schedule.py --url http://127.0.0.1:8000/grafik.pdf --once
+    python3 fetch_schedule.py --url ... --no-run   # только положить PDF в inbox/ для watch_inbox
+"""
+
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from publish import CURRENT_LINK, MANIFEST_FILE, PUBLISH_DIR, atomic_write_json, fsync_dir
+
+INBOX_DIR = "inbox"
+STATE_FILE = os.path.join(".cache", "fetch_state.json")
+POLL_INTERVAL = 600.0
+CHUNK_SIZE = 1 << 16
+TIMEOUT = 60.0
+USER_AGENT = "svitlo-kremen-parser/1.0"
+
+def load_state(path: str) -> Dict[str, str]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def last_parsed_hash(publish_dir: str) -> Optional[str]:
+    """SHA-256 исходного PDF текущей публикации"""
+    path = os.path.join(publish_dir, CURRENT_LINK, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('source_sha256')
+
+def conditional_headers(state: Dict[str, str], url: str) -> Dict[str, str]:
+    """Заголовки условного запроса по сохраненному ответу для того же URL"""
+    headers = {'User-Agent': USER_AGENT}
+    if state.get('url') != url:
+        return headers
+    if state.get('etag'):
+        headers['If-None-Match'] = state['etag']
+    if state.get('last_modified'):
+        headers['If-Modified-Since'] = state['last_modified']
+    return headers
+
+def download(response, directory: str) -> Tuple[str, str, int]:
+    """Потоково пишет тело ответа во временный файл. Возвращает (путь, sha256, байт)"""
+    os.makedirs(directory, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    # Точка в начале имени: watch_inbox не возьмет недокачанный файл
+    fd, tmp_path = tempfile.mkstemp(prefix='.fetch-', suffix='.part', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in iter(lambda: response.read(CHUNK_SIZE), b''):
+                f.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path, digest.hexdigest(), size
+
+def fetch_once(url: str, inbox_dir: str, publish_dir: str, state_path: str, run: bool = True) -> str:
+    """
+    Один опрос. Возвращает итог: 'not_modified', 'unchanged', 'skipped' (документ, на котором
+    конвейер уже упал), 'queued', 'published', 'failed'.
+    """
+    state = load_state(state_path)
+    request = urllib.request.Request(url, headers=conditional_headers(state, url))
+    started = time.time()
+
+    try:
+        response = urllib.request.urlopen(request, timeout=TIMEOUT)
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            print(f"[fetch] 304 Not Modified ({(time.time() - started) * 1000:.0f} мс)")
+            return 'not_modified'
+        print(f"[fetch] ✗ HTTP {e.code} {e.reason}")
+        return 'failed'
+    except (urllib.error.URLError, OSError) as e:
+        print(f"[fetch] ✗ Сервер недоступен: {e}")
+        return 'failed'
+
+    try:
+        with response:
+            tmp_path, sha256, size = download(response, inbox_dir)
+            expected = response.headers.get('Content-Length')
+            new_state = {
+                'url': url,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'sha256': sha256,
+                'fetched_at': datetime.now().isoformat(timespec='seconds'),
+            }
+    except (http.client.HTTPException, OSError) as e:
+        print(f"[fetch] ✗ Загрузка оборвалась: {e!r}")
+        return 'failed'
+
+    if expected is not None and expected.isdigit() and int(expected) != size:
+        os.unlink(tmp_path)
+        print(f"[fetch] ✗ Получено {size} байт из {expected} (Content-Length), документ отброшен")
+        return 'failed'
+    print(f"[fetch] Скачано {size / 1024:.0f} КБ за {time.time() - started:.1f} с, sha256 {sha256[:12]}")
+
+    if sha256 == state.get('failed_sha256'):
+        os.unlink(tmp_path)
+        atomic_write_json(state_path, {**new_state, 'sha256': state.get('sha256'), 'failed_sha256': sha256})
+        print("[fetch] Этот документ уже не удалось обработать, ждем новую версию")
+        return 'skipped'
+
+    known = {last_parsed_hash(publish_dir)}
+    if not run:
+        # Переданный в inbox документ может быть еще не опубликован
+        known.add(state.get('sha256'))
+    if sha256 in known:
+        os.unlink(tmp_path)
+        atomic_write_json(state_path, new_state)
+        print("[fetch] Документ не изменился, конвейер не запускается")
+        return 'unchanged'
+
+    pdf_path = os.path.join(inbox_dir, f"schedule-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{sha256[:12]}.pdf")
+    os.replace(tmp_path, pdf_path)
+    fsync_dir(inbox_dir)
+
+    if not run:
+        atomic_write_json(state_path, new_state)
+        print(f"[fetch] Новый документ передан в {pdf_path}")
+        return 'queued'
+
+    # Конвейер (и pdfplumber) импортируется только для нового документа
+    from watch_inbox import process_pdf
+
+    if process_pdf(pdf_path, inbox_dir, publish_dir) is None:
+        # Тот же документ не разбирается на каждом опросе; прежний sha256 остается для --no-run
+        atomic_write_json(state_path, {**new_state, 'sha256': state.get('sha256'), 'failed_sha256': sha256})
+        return 'failed'
+    atomic_write_json(state_path, new_state)
+    return 'published'
+
+def main():
+    parser = argparse.ArgumentParser(description="Загрузка графика по URL с условными запросами")
+    parser.add_argument('--url', default=os.environ.get('SCHEDULE_URL'), help="адрес PDF (или SCHEDULE_URL)")
+    parser.add_argument('--inbox', default=INBOX_DIR, help="папка для скачанных PDF")
+    parser.add_argument('--publish', default=PUBLISH_DIR, help="папка публикации")
+    parser.add_argument('--state', default=STATE_FILE, help="ETag, Last-Modified и хеш последнего ответа")
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL, help="интервал опроса, с")
+    parser.add_argument('--once', action='store_true', help="один опрос и выход")
+    parser.add_argument('--no-run', action='store_true', help="не запускать конвейер, только положить PDF в inbox")
+    args = parser.parse_args()
+
+    if not args.url:
+        raise SystemExit("Не задан адрес графика: --url или переменная SCHEDULE_URL")
+
+    publish_dir = os.path.abspath(args.publish)
+    print(f"[fetch] Опрос {args.url}" + ("" if args.once else f" каждые {args.interval:.0f} с"))
+    try:
+        while True:
+            result = fetch_once(args.url, args.inbox, publish_dir, args.state, run=not args.no_run)
+            if args.once:
+                raise SystemExit(1 if result == 'failed' else 0)
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("\n[fetch] Остановлено")
+
+if __name__ == '__main__':
+    main()
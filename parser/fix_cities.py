@@ -5,8 +5,10 @@
 - Исправляет неполные/обрывочные названия
 """
 
-import json
+from address_rows import dump_rows, load_rows
 from collections import defaultdict
+from data_quality import is_short_city
+from stats_cube import load_cube, save_cube
 
 INPUT_FILE = "addresses.json"
 OUTPUT_FILE = "addresses_fixed.json"
@@ -35,56 +37,47 @@ def normalize_city_prefix(city):
 
     return city
 
-def is_short_city_name(city):
-    """Проверяет, является ли название неполным (слишком коротким)"""
-    if not city:
-        return False
-
-    # Убираем префикс и проверяем длину
-    name = city.replace('м.', '').replace('с.', '').replace('смт.', '').strip()
-    return len(name) <= 2
-
 def find_correct_city_by_context(address, prev_addresses):
     """
     Пытается найти правильное название города по контексту:
     - По предыдущим адресам с той же улицей
     - По филиалу и черге
     """
-    street = address['street']
-    branch = address['branch']
-    queue = address['queue_full']
+    street = address.street
+    branch = address.branch
+    queue = address.queue_full
 
     # Ищем в предыдущих адресах с той же улицей
     for prev in reversed(prev_addresses[-100:]):  # Смотрим последние 100 адресов
-        if (prev['street'] == street and
-            prev['branch'] == branch and
-            prev['city'] and
-            not is_short_city_name(prev['city'])):
-            return prev['city']
+        if (prev.street == street and
+            prev.branch == branch and
+            prev.city and
+            not is_short_city(prev.city)):
+            return prev.city
 
     # Ищем по филиалу и черге с похожей улицей
     for prev in reversed(prev_addresses[-200:]):
-        if (prev['branch'] == branch and
-            prev['queue_full'] == queue and
-            prev['city'] and
-            not is_short_city_name(prev['city'])):
+        if (prev.branch == branch and
+            prev.queue_full == queue and
+            prev.city and
+            not is_short_city(prev.city)):
             # Если это соседние адреса (похожие номера домов на одной улице)
-            if prev['street'] == street:
-                return prev['city']
+            if prev.street == street:
+                return prev.city
 
     return None
 
 def main():
     print(f"Загрузка данных из {INPUT_FILE}...")
-    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = load_rows(INPUT_FILE)
+    cube = load_cube(INPUT_FILE, data)
 
     print(f"Всего адресов: {len(data)}")
 
     # Создаем бэкап
     print(f"Создание бэкапа в {BACKUP_FILE}...")
     with open(BACKUP_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+        dump_rows(data, f)
 
     # Статистика
     stats = {
@@ -99,35 +92,35 @@ def main():
 
     print("\nОбработка адресов...")
     for i, addr in enumerate(data):
-        original_city = addr['city']
+        original_city = addr.city
 
         # Нормализуем префикс
-        normalized_city = normalize_city_prefix(addr['city'])
+        normalized_city = normalize_city_prefix(addr.city)
         if normalized_city != original_city:
             stats['normalized_prefix'] += 1
-            addr['city'] = normalized_city
+            cube.set_field(addr, 'city', normalized_city)
 
         # Проверяем на короткое название
-        if is_short_city_name(addr['city']):
+        if is_short_city(addr.city):
             # Пытаемся найти правильное название по контексту
             correct_city = find_correct_city_by_context(addr, processed_addresses)
 
             if correct_city:
                 short_city_examples[original_city].append({
-                    'old': addr['city'],
+                    'old': addr.city,
                     'new': correct_city,
-                    'street': addr['street'],
-                    'house': addr['house']
+                    'street': addr.street,
+                    'house': addr.house
                 })
-                addr['city'] = correct_city
+                cube.set_field(addr, 'city', correct_city)
                 stats['fixed_short_names'] += 1
             else:
                 short_city_examples[original_city].append({
-                    'old': addr['city'],
+                    'old': addr.city,
                     'new': None,
-                    'street': addr['street'],
-                    'house': addr['house'],
-                    'branch': addr['branch']
+                    'street': addr.street,
+                    'house': addr.house,
+                    'branch': addr.branch
                 })
                 stats['unfixed_short_names'] += 1
 
@@ -136,7 +129,8 @@ def main():
     # Сохраняем исправленные данные
     print(f"\nСохранение исправленных данных в {OUTPUT_FILE}...")
     with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(processed_addresses, f, ensure_ascii=False, indent=2)
+        dump_rows(processed_addresses, f)
+    save_cube(cube, OUTPUT_FILE)
 
     # Выводим статистику
     print("\n" + "="*60)
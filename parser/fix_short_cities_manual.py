@@ -3,34 +3,32 @@
 Ручное исправление коротких названий городов на основе анализа улиц
 """
 
-import json
+from address_rows import dump_rows, load_rows
+from data_quality import columns, find
+from stats_cube import load_cube, save_cube
 
 INPUT_FILE = "addresses_fixed.json"
 OUTPUT_FILE = "addresses.json"
 
-# Словарь исправлений на основе улиц и контекста
-# Формат: (город_короткий, улица, филиал) -> правильный_город
-MANUAL_FIXES = {
-    # м.І - судя по улицам (Набережна, Портова, Строни) и филиалу - это часть м.Горішні плавні
-    ('м.І', 'вул. Набережна', 'Кременчуцька'): 'м.Горішні плавні',
-    ('м.І', 'вул. Портова', 'Кременчуцька'): 'м.Горішні плавні',
-    ('м.І', 'вул. Строни', 'Кременчуцька'): 'м.Горішні плавні',
-
-    # м.В - судя по вул. Набережна - это м.Горішні плавні
-    ('м.В', 'вул. Набережна', 'Кременчуцька'): 'м.Горішні плавні',
-
-    # м.М - вул. Строни - скорее всего тоже м.Горішні плавні
-    ('м.М', 'вул. Строни', 'Кременчуцька'): 'м.Горішні плавні',
-
-    # с.М - вул. Строни - может быть село рядом с Горішні плавні, оставим как есть
-    # Но скорее всего это тоже часть Горішні плавні
-    ('с.М', 'вул. Строни', 'Кременчуцька'): 'м.Горішні плавні',
-
-    # м.А - вул. Троїцька - это точно м.Кременчук (Троїцька есть только там)
-    ('м.А', 'вул. Троїцька', 'Кременчуцька'): 'м.Кременчук',
-
-    # с.В - судя по улицам (Куценка, Греблянська, Миру) - нужно проверить
-    # Но скорее всего это село, оставим как "с.В" пока не уточним
+# Исправления адресов с неполным названием (правило short_city в data_quality):
+# філія -> улица -> короткий город -> правильный город. Город определен по улицам и контексту;
+# короткий город в ключе обязателен — на той же улице может быть другой населенный пункт
+STREET_CITY_FIXES = {
+    'Кременчуцька': {
+        # м.І - судя по улицам (Набережна, Портова, Строни) и филиалу - это часть м.Горішні плавні
+        # м.В - судя по вул. Набережна - это м.Горішні плавні
+        # м.М - вул. Строни - скорее всего тоже м.Горішні плавні
+        # с.М - вул. Строни - может быть село рядом с Горішні плавні, но скорее всего тоже его часть
+        'вул. Набережна': {'м.І': 'м.Горішні плавні', 'м.В': 'м.Горішні плавні'},
+        'вул. Портова': {'м.І': 'м.Горішні плавні'},
+        'вул. Строни': {'м.І': 'м.Горішні плавні', 'м.М': 'м.Горішні плавні', 'с.М': 'м.Горішні плавні'},
+
+        # м.А - вул. Троїцька - это точно м.Кременчук (Троїцька есть только там)
+        'вул. Троїцька': {'м.А': 'м.Кременчук'},
+
+        # с.В - судя по улицам (Куценка, Греблянська, Миру) - нужно проверить
+        # Но скорее всего это село, оставим как "с.В" пока не уточним
+    },
 }
 
 # Дополнительные исправления по шаблонам (для оставшихся)
@@ -42,17 +40,10 @@ PATTERN_FIXES = {
     }
 }
 
-def is_short_city_name(city):
-    """Проверяет, является ли название неполным"""
-    if not city:
-        return False
-    name = city.replace('м.', '').replace('с.', '').replace('смт.', '').strip()
-    return len(name) <= 2
-
 def main():
     print(f"Загрузка данных из {INPUT_FILE}...")
-    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = load_rows(INPUT_FILE)
+    cube = load_cube(INPUT_FILE, data)
 
     stats = {
         'total': len(data),
@@ -63,16 +54,13 @@ def main():
     fixed_examples = {}
 
     print("Применение ручных исправлений...")
-    for addr in data:
-        if not is_short_city_name(addr['city']):
-            continue
-
-        key = (addr['city'], addr['street'], addr['branch'])
+    for i in find(columns(data), 'short_city'):
+        addr = data[i]
+        new_city = STREET_CITY_FIXES.get(addr.branch, {}).get(addr.street, {}).get(addr.city)
 
-        if key in MANUAL_FIXES:
-            old_city = addr['city']
-            new_city = MANUAL_FIXES[key]
-            addr['city'] = new_city
+        if new_city:
+            old_city = addr.city
+            cube.set_field(addr, 'city', new_city)
             stats['fixed_manual'] += 1
 
             if old_city not in fixed_examples:
@@ -80,8 +68,8 @@ def main():
             fixed_examples[old_city].append({
                 'old': old_city,
                 'new': new_city,
-                'street': addr['street'],
-                'house': addr['house']
+                'street': addr.street,
+                'house': addr.house
             })
         else:
             stats['still_short'] += 1
@@ -89,7 +77,8 @@ def main():
     # Сохраняем исправленные данные
     print(f"\nСохранение в {OUTPUT_FILE}...")
     with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+        dump_rows(data, f)
+    save_cube(cube, OUTPUT_FILE)
 
     # Статистика
     print("\n" + "="*60)
@@ -113,11 +102,11 @@ def main():
         print("\n" + "="*60)
         print("ОСТАЛОСЬ НЕИСПРАВЛЕННЫХ:")
         print("="*60)
-        remaining = [d for d in data if is_short_city_name(d['city'])]
+        remaining = [data[i] for i in find(columns(data), 'short_city')]
         from collections import defaultdict
         by_city = defaultdict(list)
         for r in remaining:
-            by_city[r['city']].append(f"{r['street']} [{r['branch']}]")
+            by_city[r.city].append(f"{r.street} [{r.branch}]")
 
         for city, streets in sorted(by_city.items()):
             print(f"\n{city}: {len(streets)} адресов")
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Фаззинг регулярок разбора ячеек на патологических входах.
+- Для каждой регулярки parse_pdf_v2 и для parse_address_line целиком прогоняются
+  семейства враждебных строк растущей длины (длинные ряды букв без номеров домов,
+  незакрытые префиксы м./вул., хвосты после цифры...) и случайные ячейки из токенов
+- Для каждой пары (регулярка, семейство) записывается худшее время и показатель роста:
+  время ~ длина^k, k≈1 — линейно, k≈2 — квадратичное перебирание с возвратами
+- Каждый прогон ограничен сторожевым таймером (parse_budget.alarm_guard), фаззер сам не зависает;
+  семейство, упершееся в таймаут, перемеряется с потолком MEASURE_BUDGET, чтобы у него
+  тоже был показатель роста
+- Сравнение с fuzz_baseline.json ловит регрессии: рост показателя или новый таймаут
+
+Запуск:
+    python3 fuzz_parser.py
+    python3 fuzz_parser.py --baseline fuzz_baseline.json
+    python3 fuzz_parser.py --save-baseline fuzz_baseline.json
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+from parse_budget import CellTimeout, alarm_guard, with_budget
+from parse_pdf_v2 import (
+    CITY_PATTERN, NEXT_CITY_PATTERN, STREET_PATTERN, parse_address_line, simple_streets
+)
+
+REPORT_FILE = "fuzz_report.json"
+SIZES = [250, 500, 1000, 2000]
+REPEAT = 5
+RANDOM_SAMPLES = 300
+RANDOM_TOKENS = 600
+SEED = 2025
+# Потолок на один прогон фаззера, секунд
+RUN_BUDGET = 1.0
+# Потолок на прогон при перемере семейства, не уложившегося в RUN_BUDGET, секунд
+MEASURE_BUDGET = 20.0
+# Прогоны дольше этого не повторяются: шум уже не важен, секунд
+SLOW_RUN = 0.05
+# Время меньше этого слишком шумное для оценки роста, секунд
+MIN_TIME = 0.005
+# Допустимый прирост показателя относительно эталона
+EXPONENT_SLACK = 0.5
+
+TARGETS: Dict[str, Callable[[str], object]] = {
+    'city': lambda text: list(CITY_PATTERN.finditer(text)),
+    'street': lambda text: list(STREET_PATTERN.finditer(text)),
+    'next_city': lambda text: NEXT_CITY_PATTERN.search(text),
+    'simple_street': simple_streets,
+    'parse_address_line': parse_address_line,
+}
+
+# Семейство: n -> строка, длина растет линейно с n
+FAMILIES: Dict[str, Callable[[int], str]] = {
+    'letters_spaces': lambda n: 'аа ' * n,
+    'city_unterminated': lambda n: 'м.' + 'Абв ' * n,
+    'city_prefixes': lambda n: 'с. а ' * n,
+    'street_no_house': lambda n: 'вул. ' + 'Абв ' * n,
+    'streets_repeated': lambda n: 'вул. Абв ' * n,
+    'digit_tail': lambda n: 'Абв 1' + 'бвг' * n,
+    'digit_tail_prefix': lambda n: 'Абв 1' + 'бвг' * n + ' м.',
+    'apostrophes_hyphens': lambda n: "Аб'-" * n,
+    'whitespace': lambda n: 'м.' + ' ' * (3 * n) + 'А',
+}
+
+RANDOM_ALPHABET = [
+    'м.', 'с.', 'смт.', 'вул.', 'пров.', 'просп.', 'пл.', 'Абв', 'гд', 'а', 'А', ' ', '  ',
+    ',', ';', ':', '.', '-', "'", '(', ')', 'б.', '1', '12', '3а', '5/7', '10-20',
+]
+
+def time_run(target: Callable[[str], object], text: str, budget: float = RUN_BUDGET) -> Tuple[float, bool]:
+    """Лучшее из REPEAT время прогона (секунд) и признак таймаута"""
+    guarded = with_budget(target, budget)
+    best = float('inf')
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        try:
+            guarded(text)
+        except CellTimeout:
+            return budget, True
+        best = min(best, time.perf_counter() - started)
+        if best > SLOW_RUN:
+            break
+    return best, False
+
+def growth_exponent(points: List[Tuple[int, float]]) -> float:
+    """Показатель k в time ~ length^k по двум самым длинным входам"""
+    (len_a, time_a), (len_b, time_b) = points[-2], points[-1]
+    if time_b < MIN_TIME or time_a <= 0:
+        return 1.0
+    return math.log(time_b / time_a) / math.log(len_b / len_a)
+
+def fuzz_family(target: Callable[[str], object], family: Callable[[int], str],
+                budget: float = RUN_BUDGET) -> Dict[str, object]:
+    """Прогон одного семейства на всех размерах"""
+    points = []
+    timeouts = 0
+    for n in SIZES:
+        text = family(n)
+        elapsed, timed_out = time_run(target, text, budget)
+        timeouts += timed_out
+        points.append((len(text), elapsed))
+        if timed_out:
+            break
+
+    return {
+        'worst_ms': round(max(t for _, t in points) * 1000, 3),
+        'max_length': points[-1][0],
+        'exponent': round(growth_exponent(points), 2) if len(points) > 1 else None,
+        'timeouts': timeouts,
+    }
+
+def random_cell(rng: random.Random) -> str:
+    """Случайная ячейка из токенов адреса"""
+    return ''.join(rng.choice(RANDOM_ALPHABET) for _ in range(rng.randint(1, RANDOM_TOKENS)))
+
+def fuzz_random(target: Callable[[str], object], samples: int, seed: int) -> Dict[str, object]:
+    """Худший случай на случайных ячейках"""
+    rng = random.Random(seed)
+    worst, worst_text, timeouts = 0.0, '', 0
+    for _ in range(samples):
+        text = random_cell(rng)
+        elapsed, timed_out = time_run(target, text)
+        timeouts += timed_out
+        if elapsed > worst:
+            worst, worst_text = elapsed, text
+    return {
+        'worst_ms': round(worst * 1000, 3),
+        'worst_input': worst_text[:120],
+        'worst_length': len(worst_text),
+        'timeouts': timeouts,
+    }
+
+def measure_family(target: Callable[[str], object], family: Callable[[int], str]) -> Dict[str, object]:
+    """
+    Прогон семейства; при таймауте показатель роста и худшее время берутся из перемера
+    с потолком MEASURE_BUDGET (если не уложился и он — показатель занижен, 'exponent_bound')
+    """
+    result = fuzz_family(target, family)
+    if not result['timeouts']:
+        return result
+    measured = fuzz_family(target, family, MEASURE_BUDGET)
+    return dict(measured, timeouts=result['timeouts'], exponent_bound=bool(measured['timeouts']))
+
+def run_fuzz(samples: int, seed: int) -> Dict[str, Dict[str, object]]:
+    """{регулярка: {'families': {...}, 'random': {...}}}"""
+    report = {}
+    for name, target in TARGETS.items():
+        families = {family_name: measure_family(target, family) for family_name, family in FAMILIES.items()}
+        report[name] = {'families': families, 'random': fuzz_random(target, samples, seed)}
+    return report
+
+def baseline_value(family: Dict[str, object]):
+    """Что хранится в эталоне: показатель роста (для таймаутов — из перемера)"""
+    return family['exponent']
+
+def compare_baseline(report: Dict[str, Dict[str, object]], baseline: Dict[str, Dict[str, object]]) -> List[str]:
+    """Регрессии относительно эталона: новый таймаут линейного семейства или заметный рост показателя"""
+    problems = []
+    for name, result in report.items():
+        for family_name, family in result['families'].items():
+            expected = baseline.get(name, {}).get(family_name)
+            if isinstance(expected, str):
+                problems.append(f"{name}/{family_name}: в эталоне '{expected}' вместо показателя, "
+                                f"пересохраните его через --save-baseline")
+                continue
+            if family['timeouts']:
+                # Таймаут уже сверхлинейного семейства зависит от скорости машины
+                if expected is None or expected <= 1 + EXPONENT_SLACK:
+                    problems.append(f"{name}/{family_name}: таймаут {RUN_BUDGET:.0f} с")
+            # Показатель таймаута измерен с потолком MEASURE_BUDGET и сравнивается так же
+            if expected is not None and family['exponent'] is not None \
+                    and family['exponent'] > max(expected, 1.0) + EXPONENT_SLACK:
+                problems.append(f"{name}/{family_name}: рост n^{family['exponent']:.2f}, было n^{expected:.2f}")
+        if result['random']['timeouts']:
+            problems.append(f"{name}/random: {result['random']['timeouts']} таймаутов")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="Фаззинг регулярок разбора ячеек")
+    parser.add_argument('--samples', type=int, default=RANDOM_SAMPLES, help="случайных ячеек на регулярку")
+    parser.add_argument('--seed', type=int, default=SEED, help="зерно генератора")
+    parser.add_argument('--report', default=REPORT_FILE, help="полный отчет в JSON")
+    parser.add_argument('--baseline', help="эталон показателей роста; при регрессии код возврата 1")
+    parser.add_argument('--save-baseline', help="сохранить текущие показатели роста как эталон")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with alarm_guard():
+        report = run_fuzz(args.samples, args.seed)
+
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print("\n" + "="*72)
+    print(f"ФАЗЗИНГ РАЗБОРА ЯЧЕЕК ({time.perf_counter() - started:.1f} с)")
+    print("="*72)
+    print(f"{'регулярка':20}{'худшее, мс':>12}  {'семейство':22}{'рост':>8}{'случайные, мс':>15}")
+    for name, result in report.items():
+        family_name, family = max(result['families'].items(), key=lambda item: item[1]['worst_ms'])
+        exponent = max((f['exponent'] or 1.0) for f in result['families'].values())
+        growth = 'таймаут' if family['timeouts'] else f'n^{exponent:.1f}'
+        print(f"{name:20}{family['worst_ms']:>12.1f}  {family_name:22}{growth:>8}"
+              f"{result['random']['worst_ms']:>15.1f}")
+    print(f"\nПолный отчет: {args.report}")
+
+    if args.save_baseline:
+        baseline = {
+            name: {family_name: baseline_value(family) for family_name, family in result['families'].items()}
+            for name, result in report.items()
+        }
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2)
+        print(f"Эталон сохранен: {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            problems = compare_baseline(report, json.load(f))
+        if problems:
+            print("\nРЕГРЕССИИ:")
+            for problem in problems:
+                print(f"  ✗ {problem}")
+            print("="*72)
+            sys.exit(1)
+        print("✓ Регрессий относительно эталона нет")
+    print("="*72)
+
+if __name__ == '__main__':
+    main()
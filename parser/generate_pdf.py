@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Генератор синтетических PDF с графиком отключений для нагрузочных тестов.
+- Та же двухколоночная таблица, что ожидает parse_pdf_v2: номер строки и текст адресов,
+  заголовки черг, підчерг и філій в объединенных ячейках
+- Ячейки с населенными пунктами, улицами, домами (в том числе диапазоны "12-16"),
+  продолжения без города и строки предприятий (ТОВ, ПАТ, КП...)
+- Рядом с PDF сохраняется эталон: ожидаемые адреса и предприятия
+- С --check PDF сразу разбирается парсером и сверяется с эталоном
+
+Запуск:
+    python3 generate_pdf.py --pages 1140 --density 9 --out synthetic_x10.pdf --check
+
+Требуется reportlab (pip install reportlab) и TTF-шрифт с кириллицей.
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+OUT_PDF = "synthetic.pdf"
+PAGES = 114
+DENSITY = 9
+SEED = 2025
+
+FONT_CANDIDATES = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/TTF/DejaVuSans.ttf",
+    "/Library/Fonts/Arial.ttf",
+    "C:/Windows/Fonts/arial.ttf",
+]
+
+QUEUE_NAMES = ['Перша', 'Друга', 'Третя', 'Четверта', "П'ята", 'Шоста']
+SUBQUEUE_NAMES = ['І', 'ІІ']
+BRANCHES = ['Полтавська', 'Кременчуцька', 'Лубенська', 'Миргородська', 'Хорольська', 'Гадяцька']
+
+CITIES = [
+    'м.Полтава', 'м.Кременчук', 'м.Лубни', 'м.Миргород', 'м.Хорол', 'м.Гадяч', 'м.Горішні Плавні',
+    'м.Кобеляки', 'м.Пирятин', 'м.Глобине', 'смт.Котельва', 'смт.Чутове', 'с.Щербані', 'с.Розсошенці',
+    'с.Солонці', 'с.Попівка', 'с.Куми', 'с.Омельник', 'с.Піски', 'с.Мачухи', 'с.Стасі', 'с.Потоки',
+]
+STREET_PREFIXES = ['вул.', 'вул.', 'вул.', 'пров.', 'просп.']
+STREETS = [
+    'Грабчака', 'Зіньківська', 'Шевченка', 'Соборності', 'Європейська', 'Героїв України', 'Миру',
+    'Набережна', 'Садова', 'Квітнева', 'Решетилівська', 'Паркова', 'Гожулівська', 'Кучеренка',
+    'Виноградна', 'Комбайнерів', 'Механізаторів', 'Троїцька', 'Вітчизняна', 'Майора Пугача',
+    'Короленка', 'Гетьманська', 'Степана Бандери', 'Березова', 'Ляшика', 'Шкільна', 'Лесі Українки',
+    'Івана Франка', 'Небесної Сотні', 'Соборна', 'Молодіжна', 'Польова', 'Лугова', 'Заводська',
+    'Першотравнева', 'Незалежності', 'Пушкарівська', 'Котляревського', 'Сковороди', 'Остапа Вишні',
+]
+ORG_FORMS = ['ТОВ', 'ПАТ', 'ПрАТ', 'КП', 'АТ', 'ФОП', 'ДП', 'ПП']
+ORG_NAMES = [
+    'Літіз', 'Домінік', 'Епіцентр К', 'Спектр', 'Кредмаш', 'Лідер', 'Аврора', 'Голді Груп',
+    'Кварц', 'Інтер-ліс', 'Дніпробетон', 'Електромотор', 'Полтавахолод', 'Агродім', 'Нива',
+]
+
+def pick_house(rng: random.Random) -> Tuple[str, List[str]]:
+    """Текст одного номера дома и развернутый список домов"""
+    kind = rng.random()
+    number = rng.randint(1, 180)
+    if kind < 0.6:
+        return str(number), [str(number)]
+    if kind < 0.75:
+        # Без 'б': парсер вырезает его как обозначение корпуса ("б. 5")
+        house = f"{number}{rng.choice('авгд')}"
+        return house, [house]
+    if kind < 0.85:
+        house = f"{number}/{rng.randint(1, 60)}"
+        return house, [house]
+    end = number + rng.randint(1, 12)
+    return f"{number}-{end}", [str(i) for i in range(number, end + 1)]
+
+def make_street(rng: random.Random) -> Tuple[str, List[str]]:
+    """'вул. Грабчака, 10, 12-14' и ожидаемые дома"""
+    prefix = rng.choice(STREET_PREFIXES)
+    name = rng.choice(STREETS)
+    texts, houses = [], []
+    for _ in range(rng.randint(1, 8)):
+        text, expanded = pick_house(rng)
+        texts.append(text)
+        houses.extend(expanded)
+    return f"{prefix} {name}, {', '.join(texts)}", [(f"{prefix} {name}", h) for h in houses]
+
+def make_address_cell(rng: random.Random, last_city: Optional[str]) -> Tuple[str, List[Tuple[str, str, str]], str]:
+    """
+    Ячейка с адресами.
+    Возвращает (текст, [(місто, вулиця, будинок)], последний упомянутый город).
+    Иногда город опускается — парсер берет его из предыдущей ячейки.
+    """
+    expected = []
+    parts = []
+
+    if last_city and rng.random() < 0.15:
+        streets = [make_street(rng) for _ in range(rng.randint(1, 3))]
+        text = '; '.join(s[0] for s in streets)
+        for _, pairs in streets:
+            expected.extend((last_city, street, house) for street, house in pairs)
+        return text, expected, last_city
+
+    city = last_city
+    for _ in range(rng.randint(1, 2)):
+        city = rng.choice(CITIES)
+        streets = [make_street(rng) for _ in range(rng.randint(1, 4))]
+        parts.append(f"{city}: " + '; '.join(s[0] for s in streets))
+        for _, pairs in streets:
+            expected.extend((city, street, house) for street, house in pairs)
+
+    return '; '.join(parts), expected, city
+
+def make_enterprise_cell(rng: random.Random) -> Tuple[str, List[Tuple[str, str]]]:
+    """Ячейка с одним или несколькими предприятиями и ожидаемые (форма, название)"""
+    items = []
+    for _ in range(1 if rng.random() < 0.8 else rng.randint(2, 3)):
+        form = rng.choice(ORG_FORMS)
+        items.append((form.upper(), f"{form} «{rng.choice(ORG_NAMES)}»"))
+    return ', '.join(name for _, name in items), items
+
+def generate_rows(pages: int, density: int, seed: int) -> Tuple[List[List[str]], Dict[str, list]]:
+    """
+    Строит строки таблицы (по density на страницу) и эталон.
+    Структура как в настоящем документе: черга → підчерга → філія → ячейки.
+    """
+    rng = random.Random(seed)
+    total_rows = pages * density
+    blocks = len(QUEUE_NAMES) * len(SUBQUEUE_NAMES) * len(BRANCHES)
+    header_rows = 1 + len(QUEUE_NAMES) * (1 + len(SUBQUEUE_NAMES)) + blocks
+    cells_total = max(blocks, total_rows - header_rows)
+    block_idx = 0
+
+    rows = [["Графік погодинного відключення електроенергії (синтетичний)", None]]
+    expected = {'addresses': [], 'enterprises': []}
+    last_city = None
+
+    for q_idx, queue_name in enumerate(QUEUE_NAMES, 1):
+        rows.append([f"{queue_name} черга", None])
+        for s_idx, sub_name in enumerate(SUBQUEUE_NAMES, 1):
+            rows.append([f"{queue_name} черга {sub_name} підчерга", None])
+            queue_full = f"{q_idx}.{s_idx}"
+            for branch in BRANCHES:
+                rows.append([f"{branch} філія АТ «ОБЛЕНЕРГО»", None])
+                # Остаток ячеек достается первым блокам
+                block_cells = cells_total // blocks + (1 if block_idx < cells_total % blocks else 0)
+                block_idx += 1
+                # Нумерация ячеек — своя в каждом блоке филиала, как в документе
+                for counter in range(1, block_cells + 1):
+                    if rng.random() < 0.12:
+                        text, items = make_enterprise_cell(rng)
+                        for kind, name in items:
+                            expected['enterprises'].append({
+                                'branch': branch, 'queue': q_idx, 'subqueue': s_idx,
+                                'queue_full': queue_full, 'kind': kind, 'name': name
+                            })
+                    else:
+                        text, addrs, last_city = make_address_cell(rng, last_city)
+                        for city, street, house in addrs:
+                            expected['addresses'].append({
+                                'branch': branch, 'queue': q_idx, 'subqueue': s_idx,
+                                'queue_full': queue_full, 'city': city, 'street': street, 'house': house
+                            })
+                    rows.append([str(counter), text])
+
+    return rows, expected
+
+def find_font(path: Optional[str]) -> str:
+    """TTF-шрифт с кириллицей"""
+    for candidate in ([path] if path else []) + FONT_CANDIDATES:
+        if candidate and os.path.exists(candidate):
+            return candidate
+    raise SystemExit("Не найден TTF-шрифт с кириллицей, укажите его через --font")
+
+def build_pdf(rows: List[List[str]], out_path: str, density: int, font_path: str):
+    """Рисует таблицу в PDF: альбомный Letter, рамки ячеек, заголовки на всю ширину"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import landscape, letter
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Table, TableStyle
+    from xml.sax.saxutils import escape
+
+    pdfmetrics.registerFont(TTFont('SchedFont', font_path))
+    style = ParagraphStyle('cell', fontName='SchedFont', fontSize=9, leading=11)
+
+    doc = SimpleDocTemplate(out_path, pagesize=landscape(letter),
+                            leftMargin=128, rightMargin=128, topMargin=57, bottomMargin=57)
+    col_widths = [22, doc.width - 22]
+
+    story = []
+    for start in range(0, len(rows), density):
+        chunk = rows[start:start + density]
+        data = []
+        commands = [
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('FONTNAME', (0, 0), (-1, -1), 'SchedFont'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+        ]
+        for i, (first, second) in enumerate(chunk):
+            if second is None:
+                data.append([Paragraph(escape(first), style), ''])
+                commands.append(('SPAN', (0, i), (1, i)))
+            else:
+                data.append([first, Paragraph(escape(second), style)])
+        story.append(Table(data, colWidths=col_widths, style=TableStyle(commands)))
+        story.append(PageBreak())
+
+    doc.build(story)
+
+def check_pdf(pdf_path: str, expected: Dict[str, list]) -> Dict[str, object]:
+    """Разбирает PDF парсером parse_pdf_v2 и сверяет с эталоном"""
+    from page_cache import extract_pages
+    from parse_pdf_v2 import FIELDNAMES, parse_tables
+
+    started = time.perf_counter()
+    pages = extract_pages(pdf_path)
+    extract_time = time.perf_counter() - started
+
+    enterprises = []
+    started = time.perf_counter()
+    rows = parse_tables(pages, verbose=False, enterprises=enterprises)
+    parse_time = time.perf_counter() - started
+
+    def addr_key(row):
+        return tuple(row[k] for k in FIELDNAMES)
+
+    def ent_key(row):
+        return (row['branch'], row['queue_full'], row['kind'], row['name'])
+
+    got_a, exp_a = Counter(map(addr_key, rows)), Counter(map(addr_key, expected['addresses']))
+    got_e, exp_e = Counter(map(ent_key, enterprises)), Counter(map(ent_key, expected['enterprises']))
+
+    matched_a = sum((got_a & exp_a).values())
+    matched_e = sum((got_e & exp_e).values())
+
+    return {
+        'pages': len(pages),
+        'extract_time': extract_time,
+        'parse_time': parse_time,
+        'addresses_expected': len(expected['addresses']),
+        'addresses_parsed': len(rows),
+        'addresses_matched': matched_a,
+        'enterprises_expected': len(expected['enterprises']),
+        'enterprises_parsed': len(enterprises),
+        'enterprises_matched': matched_e,
+    }
+
+def ratio(part: int, total: int) -> float:
+    return part / total if total else 1.0
+
+def main():
+    parser = argparse.ArgumentParser(description="Генератор синтетических PDF с графиком")
+    parser.add_argument('--pages', type=int, default=PAGES, help="число страниц")
+    parser.add_argument('--density', type=int, default=DENSITY, help="строк таблицы на странице")
+    parser.add_argument('--seed', type=int, default=SEED, help="зерно генератора")
+    parser.add_argument('--out', default=OUT_PDF, help="выходной PDF")
+    parser.add_argument('--font', help="TTF-шрифт с кириллицей")
+    parser.add_argument('--check', action='store_true', help="разобрать PDF и сверить с эталоном")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    rows, expected = generate_rows(args.pages, args.density, args.seed)
+    build_pdf(rows, args.out, args.density, find_font(args.font))
+    gen_time = time.perf_counter() - started
+
+    expected_path = os.path.splitext(args.out)[0] + '.expected.json'
+    with open(expected_path, 'w', encoding='utf-8') as f:
+        json.dump(expected, f, ensure_ascii=False, indent=2)
+
+    print(f"✓ PDF: {args.out} ({os.path.getsize(args.out) / 1024:.0f} КБ, {len(rows)} строк таблицы, {gen_time:.1f} с)")
+    print(f"✓ Эталон: {expected_path} ({len(expected['addresses'])} адресов, "
+          f"{len(expected['enterprises'])} предприятий)")
+
+    if not args.check:
+        return
+
+    result = check_pdf(args.out, expected)
+
+    print("\n" + "="*60)
+    print("ПРОВЕРКА ПАРСЕРА")
+    print("="*60)
+    print(f"Страниц: {result['pages']}")
+    print(f"Извлечение таблиц: {result['extract_time']:.1f} с")
+    print(f"Разбор: {result['parse_time']:.2f} с "
+          f"({result['addresses_parsed'] / result['parse_time'] if result['parse_time'] else 0:.0f} адресов/с)")
+    print(f"Адреса: разобрано {result['addresses_parsed']}, ожидалось {result['addresses_expected']}, "
+          f"совпало {result['addresses_matched']}")
+    print(f"  точность {ratio(result['addresses_matched'], result['addresses_parsed']):.2%}, "
+          f"полнота {ratio(result['addresses_matched'], result['addresses_expected']):.2%}")
+    print(f"Предприятия: разобрано {result['enterprises_parsed']}, ожидалось {result['enterprises_expected']}, "
+          f"совпало {result['enterprises_matched']}")
+    print("="*60)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Автомат Ахо–Корасик для классификации ячеек таблицы за один проход.
+Вместо цепочек `any(kw in text.lower() for kw in [...])` и пробных регулярок
+ячейка один раз прогоняется через автомат и получает набор категорий:
+адрес, организация, черга, филиал.
+"""
+
+from collections import deque
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+class Keyword(NamedTuple):
+    text: str
+    category: str
+    # Требовать границу слова перед/после совпадения
+    word_start: bool = False
+    word_end: bool = False
+
+class KeywordHit(NamedTuple):
+    start: int
+    end: int
+    keyword: Keyword
+
+ADDRESS = 'address'
+ORGANISATION = 'organisation'
+QUEUE = 'queue'
+SUBQUEUE = 'subqueue'
+BRANCH = 'branch'
+
+CELL_KEYWORDS = [
+    # Маркеры адреса (как в проверке parse_pdf_improved — без границ слова)
+    Keyword('вул.', ADDRESS), Keyword('пров.', ADDRESS), Keyword('просп.', ADDRESS),
+    Keyword('пл.', ADDRESS), Keyword('м.', ADDRESS), Keyword('с.', ADDRESS), Keyword('смт', ADDRESS),
+
+    # Организационно-правовые формы — отдельные слова
+    Keyword('тов', ORGANISATION, True, True), Keyword('тзов', ORGANISATION, True, True),
+    Keyword('пат', ORGANISATION, True, True), Keyword('прат', ORGANISATION, True, True),
+    Keyword('ат', ORGANISATION, True, True), Keyword('кп', ORGANISATION, True, True),
+    Keyword('дп', ORGANISATION, True, True), Keyword('пп', ORGANISATION, True, True),
+    Keyword('фоп', ORGANISATION, True, True), Keyword('вп', ORGANISATION, True, True),
+    Keyword('кнп', ORGANISATION, True, True), Keyword('фг', ORGANISATION, True, True),
+    Keyword('зат', ORGANISATION, True, True), Keyword('ват', ORGANISATION, True, True),
+    Keyword('ооо', ORGANISATION, True, True), Keyword('тд', ORGANISATION, True, True),
+    # Начало слова: філія/філії, завод/заводу
+    Keyword('філі', ORGANISATION, True, False), Keyword('завод', ORGANISATION, True, False),
+
+    # Заголовки
+    Keyword('черга', QUEUE, True, True),
+    Keyword('підчерга', SUBQUEUE, True, True),
+    Keyword('полтавська', BRANCH, True), Keyword('кременчуцька', BRANCH, True),
+    Keyword('лубенська', BRANCH, True), Keyword('миргородська', BRANCH, True),
+    Keyword('хорольська', BRANCH, True), Keyword('гадяцька', BRANCH, True),
+]
+
+def is_word_char(ch: str) -> bool:
+    """Буква или цифра (апостроф считается частью слова)"""
+    return ch.isalnum() or ch in "'ʼ’"
+
+class KeywordMatcher:
+    """
+    Предкомпилированный автомат Ахо–Корасик.
+    Поиск без учета регистра; границы слова проверяются для каждого ключевого слова отдельно.
+    """
+
+    def __init__(self, keywords: List[Keyword]):
+        self.keywords = list(keywords)
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[List[int]] = [[]]
+
+        for idx, kw in enumerate(self.keywords):
+            state = 0
+            for ch in kw.text.lower():
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                state = nxt
+            self.out[state].append(idx)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def iter_hits(self, text: str) -> Iterator[KeywordHit]:
+        """
+        Все совпадения в тексте (с учетом границ слова) в порядке окончания.
+        start/end — позиции в исходном text, даже если lower() удлиняет символ ('İ' -> 'i̇')
+        """
+        lowered = text.lower()
+        goto, fail, out, keywords = self.goto, self.fail, self.out, self.keywords
+        length = len(lowered)
+        state = 0
+
+        # lower() не укорачивает символы: при равной длине позиции совпадают один к одному,
+        # иначе для каждого символа lowered запоминается его символ в text
+        origin = None
+        if length != len(text):
+            origin = [i for i, ch in enumerate(text) for _ in ch.lower()]
+
+        for pos, ch in enumerate(lowered):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+
+            for idx in out[state]:
+                kw = keywords[idx]
+                end = pos + 1
+                start = end - len(kw.text)
+                if kw.word_start and start > 0 and is_word_char(lowered[start - 1]):
+                    continue
+                if kw.word_end and end < length and is_word_char(lowered[end]):
+                    continue
+                if origin is not None:
+                    start, end = origin[start], origin[end - 1] + 1
+                yield KeywordHit(start, end, kw)
+
+    def categories(self, text: str) -> Set[str]:
+        """Набор категорий, найденных в тексте"""
+        return {hit.keyword.category for hit in self.iter_hits(text)}
+
+    def first(self, text: str, category: str) -> Optional[KeywordHit]:
+        """Самое левое совпадение заданной категории"""
+        best = None
+        for hit in self.iter_hits(text):
+            if hit.keyword.category == category and (best is None or hit.start < best.start):
+                best = hit
+        return best
+
+    def has(self, text: str, category: str) -> bool:
+        """Есть ли в тексте хотя бы одно совпадение категории"""
+        return any(hit.keyword.category == category for hit in self.iter_hits(text))
+
+CELL_MATCHER = KeywordMatcher(CELL_KEYWORDS)
+
+def classify_cell(text: str) -> Tuple[Set[str], List[KeywordHit]]:
+    """Категории ячейки и все совпадения: один прогон автомата, совпадения можно переиспользовать"""
+    hits = list(CELL_MATCHER.iter_hits(text))
+    return {hit.keyword.category for hit in hits}, hits
@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный тест поиска черги по адресу.
+- Берет случайные адреса из addresses.json и искажает их так, как их набирают люди:
+  другие разделители, без «вул.», без «м.»/«с.», опечатки, ввод в английской раскладке
+- Проигрывает запросы с заданной частотой (открытый цикл: каждый запрос имеет плановое
+  время отправки, задержка считается от него, поэтому очередь не прячет медленные ответы)
+- Бэкенды поиска подключаемые: index — AddressIndex в процессе, sqlite — таблица с
+  нормализованными ключами, http — локальный HTTP-сервис (поднимается сам или --url)
+- Отчет: QPS, p50/p95/p99 задержки, доля найденных адресов и доля верных черг
+  (в целом и по каждому виду искажения)
+
+Запуск:
+    python3 load_test.py --backend index --queries 20000
+    python3 load_test.py --backend sqlite --rate 2000 --concurrency 4
+    python3 load_test.py --backend http --rate 500 --duration 10
+    python3 load_test.py --serve 8080
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import os
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs, quote, urlsplit
+
+from address_index import (
+    ADDRESSES_FILE, CITY_PREFIX, STREET_PREFIX, AddressIndex, address_key, split_free_form
+)
+from translit_index import LAYOUT_UA_TO_EN, TranslitIndex, load_translit, lookup_text
+
+REPORT_FILE = "load_test_report.json"
+QUERIES = 20000
+SEED = 2025
+SERVER_START_TIMEOUT = 30.0
+
+# Вес каждого вида искажения в смеси запросов
+MUTATION_WEIGHTS = {
+    'exact': 20,
+    'separators': 20,
+    'no_street_prefix': 20,
+    'no_city_prefix': 15,
+    'typo': 15,
+    'latin_layout': 10,
+}
+
+SEPARATORS = [' ', '  ', ' / ', ' - ', '; ', ',', ' , ']
+
+# Те же клавиши с Shift (заглавные Б, Ю, Ж, Х, Ї, Є)
+SHIFTED_KEYS = dict(zip(",.;'[]`", '<>:"{}~'))
+
+# Соседние клавиши для опечаток-замен
+KEYBOARD_ROWS = ["йцукенгшщзхї", "фівапролджє", "ячсмитьбю"]
+
+class Query(NamedTuple):
+    text: str
+    mutation: str
+    expected: str
+
+# --- Генерация запросов ---
+
+def strip_city_prefix(city: str) -> str:
+    return CITY_PREFIX.sub('', city.strip())
+
+def strip_street_prefix(street: str) -> str:
+    return STREET_PREFIX.sub('', street.strip())
+
+def neighbour_key(char: str, rng: random.Random) -> str:
+    """Соседняя клавиша в том же ряду (с сохранением регистра)"""
+    lower = char.lower()
+    for row in KEYBOARD_ROWS:
+        pos = row.find(lower)
+        if pos >= 0:
+            candidates = [row[i] for i in (pos - 1, pos + 1) if 0 <= i < len(row)]
+            replacement = rng.choice(candidates)
+            return replacement.upper() if char.isupper() else replacement
+    return char
+
+def english_layout(text: str) -> str:
+    """Текст, набранный с включенной английской раскладкой"""
+    typed = []
+    for char in text:
+        key = LAYOUT_UA_TO_EN.get(char.lower(), char)
+        typed.append(SHIFTED_KEYS.get(key, key.upper()) if char.isupper() else key)
+    return ''.join(typed)
+
+def typo(word: str, rng: random.Random) -> str:
+    """Одна опечатка в слове: пропуск, удвоение, перестановка или соседняя клавиша"""
+    letters = [i for i, ch in enumerate(word) if ch.isalpha()]
+    if len(letters) < 4:
+        return word
+    pos = rng.choice(letters[1:])
+    kind = rng.randrange(4)
+    if kind == 0:
+        return word[:pos] + word[pos + 1:]
+    if kind == 1:
+        return word[:pos] + word[pos] + word[pos:]
+    if kind == 2 and pos + 1 < len(word):
+        return word[:pos] + word[pos + 1] + word[pos] + word[pos + 2:]
+    return word[:pos] + neighbour_key(word[pos], rng) + word[pos + 1:]
+
+def mutate(city: str, street: str, house: str, mutation: str, rng: random.Random) -> str:
+    """Текст запроса для адреса с одним видом искажения"""
+    if mutation == 'separators':
+        sep = rng.choice(SEPARATORS)
+        return f"{city}{sep}{street}{sep}{house}"
+    if mutation == 'no_street_prefix':
+        return f"{city}, {strip_street_prefix(street)}, {house}"
+    if mutation == 'no_city_prefix':
+        return f"{strip_city_prefix(city)}, {street}, {house}"
+    if mutation == 'typo':
+        return f"{city}, {typo(street, rng)}, {house}"
+    if mutation == 'latin_layout':
+        return english_layout(f"{strip_city_prefix(city)} {strip_street_prefix(street)} {house}")
+    return f"{city}, {street}, {house}"
+
+def build_queries(rows: List[Dict[str, object]], count: int, seed: int,
+                  weights: Dict[str, int] = MUTATION_WEIGHTS) -> List[Query]:
+    """count запросов: случайный адрес + случайное по весам искажение"""
+    rng = random.Random(seed)
+    sample = [row for row in rows if row['city'] and row['street'] and row['house']]
+    mutations = list(weights)
+    cumulative = list(itertools.accumulate(weights[m] for m in mutations))
+
+    queries = []
+    for _ in range(count):
+        row = rng.choice(sample)
+        mutation = rng.choices(mutations, cum_weights=cumulative)[0]
+        text = mutate(row['city'], row['street'], row['house'], mutation, rng)
+        queries.append(Query(text, mutation, row['queue_full']))
+    return queries
+
+# --- Бэкенды ---
+# Бэкенд — фабрика: open() вызывается в каждом потоке нагрузки и возвращает
+# функцию text -> queue_full | None (несколько черг через '|')
+
+class IndexBackend:
+    """AddressIndex и TranslitIndex в том же процессе (общие для всех потоков)"""
+
+    name = 'index'
+
+    def __init__(self, rows: List[Dict[str, object]], translit: TranslitIndex):
+        self.index = AddressIndex(rows)
+        self.translit = translit
+
+    def open(self) -> Callable[[str], Optional[str]]:
+        def lookup(text: str) -> Optional[str]:
+            match = lookup_text(self.index, self.translit, text)
+            return match.queue_full if match else None
+        return lookup
+
+    def close(self):
+        pass
+
+class SqliteBackend:
+    """Таблица адресов с нормализованными ключами и индексом (вулиця, будинок, місто)"""
+
+    name = 'sqlite'
+
+    def __init__(self, rows: List[Dict[str, object]], translit: TranslitIndex, db_path: Optional[str] = None):
+        self.translit = translit
+        self.tmp_dir = None
+        if db_path is None:
+            self.tmp_dir = tempfile.TemporaryDirectory(prefix='load-test-')
+            db_path = os.path.join(self.tmp_dir.name, 'addresses.sqlite')
+        self.db_path = db_path
+
+        conn = sqlite3.connect(db_path)
+        with conn:
+            conn.execute("DROP TABLE IF EXISTS addresses")
+            conn.execute("CREATE TABLE addresses (city_key TEXT, street_key TEXT, house_key TEXT, queue_full TEXT)")
+            conn.executemany(
+                "INSERT INTO addresses VALUES (?, ?, ?, ?)",
+                (address_key(r['city'], r['street'], r['house']) + (r['queue_full'],) for r in rows)
+            )
+            conn.execute("CREATE INDEX addresses_key ON addresses (street_key, house_key, city_key)")
+        self.cities = {city for (city,) in conn.execute("SELECT DISTINCT city_key FROM addresses") if city}
+        conn.close()
+
+    def open(self) -> Callable[[str], Optional[str]]:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+
+        def query(key: Tuple[str, str, str]) -> Optional[str]:
+            city, street, house = key
+            if not street or not house:
+                return None
+            found = conn.execute(
+                "SELECT city_key, queue_full FROM addresses WHERE street_key = ? AND house_key = ?",
+                (street, house)
+            ).fetchall()
+            # Тот же порядок, что в AddressIndex.lookup_key: точный город, затем адреса без города
+            queues = {q for c, q in found if c == city} or (
+                {q for _, q in found} if not city else {q for c, q in found if not c}
+            )
+            return '|'.join(sorted(queues)) if queues else None
+
+        def lookup(text: str) -> Optional[str]:
+            found = query(address_key(*split_free_form(text, self.cities)))
+            if found is None:
+                for candidate in self.translit.resolve(text):
+                    found = query(address_key(*candidate))
+                    if found:
+                        break
+            return found
+        return lookup
+
+    def close(self):
+        if self.tmp_dir is not None:
+            self.tmp_dir.cleanup()
+
+class HttpBackend:
+    """
+    Локальный HTTP-сервис GET /lookup?q=... Без --url сервер (`load_test.py --serve`)
+    запускается отдельным процессом, чтобы не делить GIL с генератором нагрузки.
+    """
+
+    name = 'http'
+
+    def __init__(self, addresses_file: str, url: Optional[str] = None):
+        self.process = None
+        if url is None:
+            port = free_port()
+            self.process = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), '--serve', str(port), '--addresses', addresses_file],
+                stdout=subprocess.DEVNULL
+            )
+            url = f"http://127.0.0.1:{port}"
+            wait_for_server('127.0.0.1', port, self.process)
+
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.path = parts.path.rstrip('/') + '/lookup?q='
+
+    def open(self) -> Callable[[str], Optional[str]]:
+        conn = http.client.HTTPConnection(self.host, self.port)
+
+        def lookup(text: str) -> Optional[str]:
+            conn.request('GET', self.path + quote(text))
+            response = conn.getresponse()
+            body = response.read()
+            if response.status != 200:
+                raise RuntimeError(f"HTTP {response.status}: {body[:200]!r}")
+            return json.loads(body)['queue_full']
+        return lookup
+
+    def close(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait()
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_for_server(host: str, port: int, process: subprocess.Popen):
+    """Ждет, пока сервер начнет принимать соединения"""
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Сервер поиска завершился с кодом {process.returncode}")
+        try:
+            socket.create_connection((host, port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    process.terminate()
+    raise RuntimeError(f"Сервер поиска не запустился за {SERVER_START_TIMEOUT:.0f} с")
+
+def serve(port: int, addresses_file: str):
+    """HTTP-сервис поиска: GET /lookup?q=<адрес> -> {"queue_full": "1.1" | null}"""
+    index = AddressIndex.from_file(addresses_file)
+    translit = load_translit(addresses_file)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Заголовки и тело уходят отдельными записями: без этого Nagle + отложенный ACK дают 40 мс
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            if parts.path != '/lookup':
+                self.send_error(404)
+                return
+            text = parse_qs(parts.query).get('q', [''])[0]
+            match = lookup_text(index, translit, text)
+            body = json.dumps({'queue_full': match.queue_full if match else None}).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    print(f"Сервис поиска: http://127.0.0.1:{server.server_port}/lookup?q=... ({len(index)} ключей)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+# --- Проигрывание ---
+
+def replay(backend, queries: List[Query], rate: float, concurrency: int) -> Tuple[List[tuple], float]:
+    """
+    Проигрывает запросы в concurrency потоках.
+    rate > 0 — открытый цикл: запрос i отправляется не раньше start + i / rate,
+    задержка считается от этого планового момента. rate = 0 — как можно быстрее.
+    Возвращает ([(запрос, ответ, задержка, время обслуживания, ошибка)], длительность).
+    """
+    results: List[Optional[tuple]] = [None] * len(queries)
+    counter = itertools.count()
+    lock = threading.Lock()
+    start = time.perf_counter()
+
+    def worker():
+        lookup = backend.open()
+        while True:
+            with lock:
+                i = next(counter)
+            if i >= len(queries):
+                return
+            scheduled = start + i / rate if rate > 0 else None
+            if scheduled is not None:
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            sent = time.perf_counter()
+            answer, error = None, None
+            try:
+                answer = lookup(queries[i].text)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            done = time.perf_counter()
+            results[i] = (queries[i], answer, done - (scheduled or sent), done - sent, error)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - start
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Перцентиль по ближайшему рангу"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), int(round(p / 100 * len(sorted_values) + 0.5))))
+    return sorted_values[rank - 1]
+
+def summarize(results: List[tuple]) -> Dict[str, object]:
+    """Задержки (мс), доля найденных и доля верных черг"""
+    latencies = sorted(r[2] for r in results)
+    service = sorted(r[3] for r in results)
+    found = sum(1 for r in results if r[1])
+    correct = sum(1 for r in results if r[1] and r[0].expected in r[1].split('|'))
+    count = len(results)
+    return {
+        'queries': count,
+        'errors': sum(1 for r in results if r[4]),
+        'hit_rate': round(found / count, 4) if count else 0.0,
+        'correct_rate': round(correct / count, 4) if count else 0.0,
+        'latency_ms': {f'p{p}': round(percentile(latencies, p) * 1000, 3) for p in (50, 95, 99)},
+        'service_ms': {f'p{p}': round(percentile(service, p) * 1000, 3) for p in (50, 95, 99)},
+        'max_ms': round(latencies[-1] * 1000, 3) if latencies else 0.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест поиска черги по адресу")
+    parser.add_argument('--addresses', default=ADDRESSES_FILE, help="распарсенные адреса (addresses.json)")
+    parser.add_argument('--backend', choices=['index', 'sqlite', 'http'], default='index', help="бэкенд поиска")
+    parser.add_argument('--url', help="адрес уже запущенного HTTP-сервиса (для --backend http)")
+    parser.add_argument('--sqlite', help="файл базы для --backend sqlite (по умолчанию временный)")
+    parser.add_argument('--queries', type=int, default=QUERIES, help="число запросов")
+    parser.add_argument('--duration', type=float, help="длительность, с (вместо --queries, нужен --rate)")
+    parser.add_argument('--rate', type=float, default=0, help="запросов в секунду (0 — как можно быстрее)")
+    parser.add_argument('--concurrency', type=int, default=1, help="параллельных потоков")
+    parser.add_argument('--seed', type=int, default=SEED, help="зерно генератора запросов")
+    parser.add_argument('--report', default=REPORT_FILE, help="отчет в JSON")
+    parser.add_argument('--serve', type=int, metavar='PORT', help="только запустить HTTP-сервис поиска")
+    args = parser.parse_args()
+
+    if args.serve is not None:
+        serve(args.serve, args.addresses)
+        return
+
+    count = args.queries
+    if args.duration:
+        if args.rate <= 0:
+            raise SystemExit("--duration требует --rate")
+        count = int(args.duration * args.rate)
+
+    with open(args.addresses, 'r', encoding='utf-8') as f:
+        rows = json.load(f)
+    queries = build_queries(rows, count, args.seed)
+
+    print(f"Подготовка бэкенда {args.backend} ({len(rows)} адресов)...")
+    prepared = time.perf_counter()
+    if args.backend == 'index':
+        backend = IndexBackend(rows, load_translit(args.addresses, rows))
+    elif args.backend == 'sqlite':
+        backend = SqliteBackend(rows, load_translit(args.addresses, rows), args.sqlite)
+    else:
+        backend = HttpBackend(args.addresses, args.url)
+    prepare_time = time.perf_counter() - prepared
+
+    try:
+        print(f"Проигрывание {count} запросов "
+              f"({'без ограничения частоты' if args.rate <= 0 else f'{args.rate:.0f} запр/с'}, "
+              f"потоков: {args.concurrency})...")
+        results, elapsed = replay(backend, queries, args.rate, args.concurrency)
+    finally:
+        backend.close()
+
+    overall = summarize(results)
+    by_mutation = {
+        mutation: summarize([r for r in results if r[0].mutation == mutation])
+        for mutation in MUTATION_WEIGHTS
+    }
+    errors = [r for r in results if r[4]]
+    report = {
+        'backend': args.backend,
+        'rate': args.rate,
+        'concurrency': args.concurrency,
+        'prepare_s': round(prepare_time, 3),
+        'elapsed_s': round(elapsed, 3),
+        'qps': round(len(results) / elapsed, 1) if elapsed else 0.0,
+        'overall': overall,
+        'by_mutation': by_mutation,
+        'misses': [r[0].text for r in results if not r[1]][:50],
+        'errors': sorted({r[4] for r in errors})[:20],
+    }
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print("\n" + "="*76)
+    print(f"НАГРУЗОЧНЫЙ ТЕСТ: {args.backend}")
+    print("="*76)
+    print(f"Подготовка: {prepare_time:.2f} с, проигрывание: {elapsed:.2f} с, QPS: {report['qps']:.0f}")
+    latency = overall['latency_ms']
+    print(f"Задержка: p50 {latency['p50']:.3f} мс, p95 {latency['p95']:.3f} мс, "
+          f"p99 {latency['p99']:.3f} мс, макс {overall['max_ms']:.3f} мс")
+    print(f"Найдено: {overall['hit_rate']:.1%}, верная черга: {overall['correct_rate']:.1%}, "
+          f"ошибок: {overall['errors']}")
+    print(f"\n{'искажение':20}{'запросов':>10}{'найдено':>10}{'верно':>10}{'p50, мс':>10}{'p99, мс':>10}")
+    for mutation, stats in by_mutation.items():
+        print(f"{mutation:20}{stats['queries']:>10}{stats['hit_rate']:>10.1%}{stats['correct_rate']:>10.1%}"
+              f"{stats['latency_ms']['p50']:>10.3f}{stats['latency_ms']['p99']:>10.3f}")
+    if errors:
+        print(f"\nПример ошибки: {errors[0][4]}")
+    print(f"\nПолный отчет: {args.report}")
+    print("="*76)
+
+if __name__ == '__main__':
+    main()
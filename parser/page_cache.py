@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Кеш извлеченных из PDF таблиц и текста по страницам.
+Извлечение через pdfplumber — самая дорогая часть парсинга, поэтому результат
+сохраняется в .cache/pages-<sha256 PDF>-<часть>.json.gz и переиспользуется всеми парсерами.
+Таблицы и текст извлекаются и кешируются отдельно: табличным парсерам текст не нужен,
+и extract_text для них не вызывается вовсе.
+"""
+
+import gzip
+import json
+import os
+from typing import Dict, List, Optional, Sequence
+
+from publish import atomic_write_bytes, file_sha256
+
+CACHE_DIR = ".cache"
+EXTRACTOR_VERSION = 2
+
+# Части страницы; по умолчанию извлекаются только таблицы, текст — по запросу парсера
+PARTS = ('tables', 'text')
+DEFAULT_PARTS = ('tables',)
+
+def cache_path(pdf_path: str, cache_dir: str = CACHE_DIR, part: str = 'tables',
+               digest: Optional[str] = None) -> str:
+    """Путь к кешу одной части страниц (tables или text) для конкретного PDF"""
+    digest = digest or file_sha256(pdf_path)
+    return os.path.join(cache_dir, f"pages-v{EXTRACTOR_VERSION}-{digest[:16]}-{part}.json.gz")
+
+def extract_pages(pdf_path: str, page_numbers: Optional[List[int]] = None,
+                  parts: Sequence[str] = DEFAULT_PARTS) -> List[Dict[str, object]]:
+    """
+    Извлекает из PDF запрошенные части каждой страницы (или только page_numbers, с 1).
+    Возвращает [{'page': номер с 1, 'tables': [...], 'text': '...'}, ...] — только ключи из parts
+    """
+    import pdfplumber
+
+    unknown = set(parts) - set(PARTS)
+    if unknown:
+        raise ValueError(f"Неизвестные части страницы: {', '.join(sorted(unknown))}")
+
+    pages = []
+    with pdfplumber.open(pdf_path, pages=page_numbers) as pdf:
+        for page in pdf.pages:
+            item = {'page': page.page_number}
+            if 'tables' in parts:
+                item['tables'] = page.extract_tables() or []
+            if 'text' in parts:
+                item['text'] = page.extract_text() or ''
+            pages.append(item)
+    return pages
+
+def load_pages(pdf_path: str, cache_dir: str = CACHE_DIR, use_cache: bool = True,
+               parts: Sequence[str] = DEFAULT_PARTS) -> List[Dict[str, object]]:
+    """
+    Возвращает страницы PDF с частями parts из кеша.
+    Недостающие в кеше части извлекаются (только они) и сохраняются в кеш.
+    """
+    if not use_cache:
+        return extract_pages(pdf_path, parts=parts)
+
+    digest = file_sha256(pdf_path)
+    columns = {}
+    missing = []
+    for part in parts:
+        path = cache_path(pdf_path, cache_dir, part, digest)
+        if os.path.exists(path):
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                columns[part] = json.load(f)
+        else:
+            missing.append(part)
+
+    if missing:
+        extracted = extract_pages(pdf_path, parts=missing)
+        for part in missing:
+            columns[part] = [page[part] for page in extracted]
+            data = json.dumps(columns[part], ensure_ascii=False).encode('utf-8')
+            atomic_write_bytes(cache_path(pdf_path, cache_dir, part, digest), gzip.compress(data))
+
+    count = len(columns[parts[0]]) if parts else 0
+    return [{'page': i + 1, **{part: columns[part][i] for part in parts}} for i in range(count)]
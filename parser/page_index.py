@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Двухпроходный выборочный разбор PDF.
+1. Дешевый проход: текст страниц с координатами через pypdfium2 (ставится вместе с
+   pdfplumber), поиск заголовков черг, підчерг и філій теми же правилами, что и в
+   parse_pdf_v2. Результат — индекс страница -> (філія, черга, підчерга), он сохраняется
+   в .cache/index-v1-<хеш правил заголовков>-<sha256 PDF>.json
+2. Таблицы извлекаются pdfplumber только для страниц, выбранных фильтром --branch/--queue
+   (плюс предыдущая страница каждого участка — с нее продолжается город)
+
+Запуск:
+    python3 page_index.py --branch Кременчуцька
+    python3 page_index.py --queue 3 --branch Лубенська
+    python3 page_index.py --queue 3.2 --show
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from address_rows import dump_rows
+from page_cache import CACHE_DIR, cache_path, extract_pages, load_pages
+from keyword_matcher import CELL_KEYWORDS
+from parse_cache import source_version
+from parse_pdf_v2 import (
+    BRANCH_PATTERN, ENTERPRISE_FIELDNAMES, FIELDNAMES, PARSE_CACHE_DB, PDF_FILE, QUEUE_MAP, QUEUE_PATTERN,
+    SUBQUEUE_MAP, SUBQUEUE_PATTERN, apply_header, match_header, new_cache, new_context, parse_queue_number,
+    parse_subqueue_number, parse_tables
+)
+from publish import atomic_write_json, file_sha256
+
+INDEX_VERSION = 1
+OUT_JSON = "addresses_selected.json"
+OUT_CSV = "addresses_selected.csv"
+OUT_ENTERPRISES_JSON = "enterprises_selected.json"
+
+# Строки текста, которые pdfium склеил из соседних фрагментов, считаются одной строкой,
+# если их верхние края отличаются меньше чем на это число пунктов
+LINE_TOLERANCE = 2.0
+
+def index_path(pdf_path: str, cache_dir: str = CACHE_DIR) -> str:
+    """Путь к индексу страниц для конкретного PDF и текущих правил заголовков"""
+    digest = file_sha256(pdf_path)
+    return os.path.join(cache_dir, f"index-v{INDEX_VERSION}-{HEADER_VERSION}-{digest[:16]}.json")
+
+def page_lines(textpage) -> List[str]:
+    """Фрагменты текста страницы сверху вниз, слева направо"""
+    fragments = []
+    for i in range(textpage.count_rects()):
+        left, bottom, right, top = textpage.get_rect(i)
+        fragments.append((-top, left, textpage.get_text_bounded(left, bottom, right, top)))
+    fragments.sort()
+
+    lines = []
+    last_top = None
+    for top, _, text in fragments:
+        text = text.strip()
+        if not text:
+            continue
+        if last_top is not None and abs(top - last_top) < LINE_TOLERANCE and lines:
+            lines[-1] = f"{lines[-1]} {text}"
+        else:
+            lines.append(text)
+        last_top = top
+    return lines
+
+def scan_headers(pdf_path: str) -> List[Dict[str, object]]:
+    """
+    Первый проход: заголовки на каждой странице.
+    Возвращает [{'page', 'start': состояние на начало страницы, 'contexts': [[філія, черга, підчерга], ...]}]
+    """
+    import pypdfium2
+
+    pages = []
+    context = new_context()
+    pdf = pypdfium2.PdfDocument(pdf_path)
+    try:
+        for page_idx in range(len(pdf)):
+            start = dict(context)
+            contexts = []
+
+            def remember():
+                if context['queue'] is not None and context['subqueue'] is not None:
+                    item = [context['branch'], context['queue'], context['subqueue']]
+                    if item not in contexts:
+                        contexts.append(item)
+
+            remember()
+            for line in page_lines(pdf[page_idx].get_textpage()):
+                header = match_header(line)
+                if header:
+                    apply_header(context, header)
+                    remember()
+
+            pages.append({'page': page_idx + 1, 'start': start, 'contexts': contexts})
+    finally:
+        pdf.close()
+
+    return pages
+
+# Версия правил первого прохода: меняется при любой правке распознавания заголовков
+# (как PARSER_VERSION в parse_pdf_v2), старый индекс тогда не переиспользуется
+HEADER_VERSION = source_version(
+    match_header, apply_header, new_context, parse_queue_number, parse_subqueue_number, page_lines, scan_headers,
+    CELL_KEYWORDS, QUEUE_MAP, SUBQUEUE_MAP, QUEUE_PATTERN, SUBQUEUE_PATTERN, BRANCH_PATTERN, LINE_TOLERANCE
+)
+
+def load_index(pdf_path: str, cache_dir: str = CACHE_DIR, rebuild: bool = False) -> Dict[str, object]:
+    """Индекс страниц из кеша или новый первый проход"""
+    path = index_path(pdf_path, cache_dir)
+
+    if not rebuild and os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    started = time.perf_counter()
+    index = {
+        'version': INDEX_VERSION,
+        'rules': HEADER_VERSION,
+        'pdf': os.path.basename(pdf_path),
+        'pages': scan_headers(pdf_path),
+    }
+    index['scan_seconds'] = round(time.perf_counter() - started, 3)
+    atomic_write_json(path, index)
+    return index
+
+def parse_queue_filter(value: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """'3' -> (3, None), '3.2' -> (3, 2)"""
+    if not value:
+        return None, None
+    queue, _, subqueue = value.partition('.')
+    return int(queue), int(subqueue) if subqueue else None
+
+def context_matches(branch: Optional[str], queue: Optional[int], subqueue: Optional[int],
+                    want_branch: Optional[str], want_queue: Optional[int], want_subqueue: Optional[int]) -> bool:
+    """Подходит ли філія/черга/підчерга под фильтр"""
+    if want_branch and (branch or '').lower() != want_branch.lower():
+        return False
+    if want_queue is not None and queue != want_queue:
+        return False
+    if want_subqueue is not None and subqueue != want_subqueue:
+        return False
+    return True
+
+def select_pages(index: Dict[str, object], branch: Optional[str] = None,
+                 queue: Optional[int] = None, subqueue: Optional[int] = None) -> List[int]:
+    """Номера страниц, на которых есть строки под фильтр"""
+    return [
+        page['page'] for page in index['pages']
+        if any(context_matches(*ctx, branch, queue, subqueue) for ctx in page['contexts'])
+    ]
+
+def with_lead_pages(selected: List[int]) -> List[int]:
+    """Добавляет страницу перед каждым участком подряд идущих страниц"""
+    chosen = set(selected)
+    for page_num in selected:
+        if page_num > 1 and page_num - 1 not in chosen:
+            chosen.add(page_num - 1)
+    return sorted(chosen)
+
+def load_selected_pages(pdf_path: str, index: Dict[str, object], page_numbers: List[int],
+                        cache_dir: str = CACHE_DIR) -> List[Dict[str, object]]:
+    """
+    Второй проход: таблицы выбранных страниц.
+    Если весь документ уже в кеше страниц — берутся оттуда, иначе извлекаются только они.
+    Каждая страница получает 'context' из индекса на случай разрыва перед ней.
+    """
+    wanted = set(page_numbers)
+    if os.path.exists(cache_path(pdf_path, cache_dir)):
+        pages = [page for page in load_pages(pdf_path, cache_dir) if page['page'] in wanted]
+    else:
+        pages = extract_pages(pdf_path, page_numbers)
+
+    starts = {page['page']: page['start'] for page in index['pages']}
+    previous = None
+    for page in pages:
+        if previous is None or page['page'] != previous + 1:
+            page['context'] = starts[page['page']]
+        previous = page['page']
+    return pages
+
+def main():
+    parser = argparse.ArgumentParser(description="Выборочный разбор страниц PDF по філії и черзі")
+    parser.add_argument('--pdf', default=PDF_FILE, help="PDF с графиком")
+    parser.add_argument('--branch', help="філія, например Кременчуцька")
+    parser.add_argument('--queue', help="черга (3) или підчерга (3.2)")
+    parser.add_argument('--rebuild', action='store_true', help="пересобрать индекс страниц")
+    parser.add_argument('--show', action='store_true', help="только показать выбранные страницы")
+    args = parser.parse_args()
+
+    want_queue, want_subqueue = parse_queue_filter(args.queue)
+
+    started = time.perf_counter()
+    index = load_index(args.pdf, rebuild=args.rebuild)
+    index_time = time.perf_counter() - started
+
+    selected = select_pages(index, args.branch, want_queue, want_subqueue)
+    print(f"Индекс: {len(index['pages'])} страниц ({index_time:.2f} с)")
+    print(f"Выбрано страниц: {len(selected)}: {', '.join(map(str, selected))}")
+
+    if args.show:
+        for page in index['pages']:
+            contexts = '; '.join(f"{b or '?'} {q}.{s}" for b, q, s in page['contexts'])
+            print(f"  стр. {page['page']}: {contexts}")
+        return
+
+    if not selected:
+        return
+
+    started = time.perf_counter()
+    pages = load_selected_pages(args.pdf, index, with_lead_pages(selected))
+    extract_time = time.perf_counter() - started
+
+    enterprises = []
+    with new_cache(PARSE_CACHE_DB) as cache:
+        rows = parse_tables(pages, verbose=False, enterprises=enterprises, cache=cache)
+
+    def keep(item):
+        return context_matches(item['branch'], item['queue'], item['subqueue'],
+                               args.branch, want_queue, want_subqueue)
+
+    rows = [row for row in rows if keep(row)]
+    enterprises = [e for e in enterprises if keep(e)]
+
+    with open(OUT_CSV, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+
+    with open(OUT_JSON, 'w', encoding='utf-8') as f:
+        dump_rows(rows, f)
+
+    with open(OUT_ENTERPRISES_JSON, 'w', encoding='utf-8') as f:
+        json.dump([{k: e[k] for k in ENTERPRISE_FIELDNAMES} for e in enterprises], f, ensure_ascii=False, indent=2)
+
+    print(f"Извлечено страниц: {len(pages)} ({extract_time:.1f} с)")
+    print(f"Адресов: {len(rows)}, предприятий: {len(enterprises)}")
+    print(f"Результаты: {OUT_JSON}, {OUT_CSV}, {OUT_ENTERPRISES_JSON}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Ограничение времени разбора одной ячейки.
+- Сторожевой таймер: ITIMER_REAL + SIGALRM прерывает даже зависшую регулярку
+  (движок re периодически проверяет сигналы во время поиска)
+- Обработчик SIGALRM ставится один раз на прогон (alarm_guard), на каждую ячейку
+  только взводится и снимается таймер
+- Вне alarm_guard, без SIGALRM (Windows) или не в главном потоке время меряется
+  после разбора: прервать ячейку нельзя, но она так же отклоняется
+"""
+
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, TypeVar
+
+T = TypeVar('T')
+
+# Секунд на одну ячейку: самая длинная ячейка настоящего графика (4 тыс. символов)
+# разбирается за 2 мс
+CELL_BUDGET = 0.25
+
+class CellTimeout(Exception):
+    """Разбор ячейки не уложился в бюджет"""
+
+    def __init__(self, text: str, budget: float, elapsed: float):
+        super().__init__(f"разбор ячейки занял {elapsed * 1000:.0f} мс (бюджет {budget * 1000:.0f} мс)")
+        self.text = text
+        self.budget = budget
+        self.elapsed = elapsed
+
+class _Alarm(BaseException):
+    """Сигнал сторожевого таймера (BaseException — чтобы не поймал `except Exception` в разборе)"""
+
+# Поток, в котором alarm_guard поставил обработчик; None — обработчика нет
+_guard_thread: Optional[int] = None
+
+def _on_alarm(signum, frame):
+    raise _Alarm()
+
+@contextmanager
+def alarm_guard() -> Iterator[None]:
+    """
+    Ставит обработчик SIGALRM на время блока и возвращает прежний после него.
+    Вложенный вызов ничего не делает; без SIGALRM или вне главного потока — тоже.
+    """
+    global _guard_thread
+    if _guard_thread is not None:
+        yield
+        return
+
+    try:
+        previous = signal.signal(signal.SIGALRM, _on_alarm)
+    except (AttributeError, ValueError):
+        yield
+        return
+
+    _guard_thread = threading.get_ident()
+    try:
+        yield
+    finally:
+        _guard_thread = None
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        # None — обработчик поставлен не из Python; вернуть его нельзя, только SIG_DFL
+        signal.signal(signal.SIGALRM, previous if previous is not None else signal.SIG_DFL)
+
+def with_budget(parse_fn: Callable[[str], T], budget: Optional[float] = CELL_BUDGET) -> Callable[[str], T]:
+    """
+    Оборачивает parse_fn(text): при превышении budget секунд — CellTimeout. None — без ограничения.
+    Прерывается зависший разбор только внутри alarm_guard.
+    """
+    if not budget or budget <= 0:
+        return parse_fn
+
+    def parse(text: str) -> T:
+        started = time.perf_counter()
+
+        if _guard_thread != threading.get_ident():
+            result = parse_fn(text)
+            elapsed = time.perf_counter() - started
+            if elapsed > budget:
+                raise CellTimeout(text, budget, elapsed)
+            return result
+
+        try:
+            signal.setitimer(signal.ITIMER_REAL, budget)
+            try:
+                return parse_fn(text)
+            finally:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        except _Alarm:
+            raise CellTimeout(text, budget, time.perf_counter() - started) from None
+
+    return parse
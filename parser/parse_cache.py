@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Мемоизация разбора ячеек с адресами.
+- Ключ — SHA-256 от версии парсера и нормализованного текста ячейки
+- Первый уровень — LRU в памяти процесса
+- Второй (необязательный) — SQLite на диске, общий для всех прогонов и документов
+- Версия парсера считается по исходному коду функций разбора, поэтому
+  любое изменение правил автоматически делает старые записи недоступными
+- Несколько версий уживаются в одной базе (diff_parsers гоняет старую и новую подряд):
+  записи версии удаляются, когда она не использовалась MAX_VERSION_AGE или вытеснена
+  KEEP_VERSIONS более свежими версиями
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+CACHE_SIZE = 8192
+FLUSH_EVERY = 500
+KEEP_VERSIONS = 4
+MAX_VERSION_AGE = 30 * 24 * 3600.0
+
+def source_version(*objects) -> str:
+    """Хеш исходного кода функций и значений констант, от которых зависит разбор"""
+    digest = hashlib.sha256()
+    for obj in objects:
+        try:
+            text = inspect.getsource(obj)
+        except (OSError, TypeError):
+            text = repr(obj)
+        digest.update(text.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()[:16]
+
+def normalize_cell(text: str) -> str:
+    """
+    Нормализация текста ячейки перед хешированием (как в начале parse_address_line).
+    Ею же parse_pdf_v2 нормализует ячейки с предприятиями — правило одно для ключа и разбора.
+    """
+    return re.sub(r'\s+', ' ', text).strip()
+
+class ParseCache:
+    """
+    Двухуровневый кеш результатов parse_fn(text).
+    Результаты отдаются как есть — вызывающий код не должен их изменять.
+    """
+
+    def __init__(self, parse_fn: Callable[[str], List[Dict[str, object]]], version: str,
+                 maxsize: int = CACHE_SIZE, db_path: Optional[str] = None):
+        self.parse_fn = parse_fn
+        self.version = version
+        self.maxsize = maxsize
+        self.memory: 'OrderedDict[str, List[Dict[str, object]]]' = OrderedDict()
+        self.pending = []
+        self.counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+
+        self.db = None
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self.db = sqlite3.connect(db_path)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS cells (key TEXT PRIMARY KEY, version TEXT NOT NULL, result TEXT NOT NULL)"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS cells_version ON cells (version)")
+            self.db.execute("CREATE TABLE IF NOT EXISTS versions (version TEXT PRIMARY KEY, last_used REAL NOT NULL)")
+            self.prune()
+
+    def prune(self, now: Optional[float] = None):
+        """
+        Отмечает текущую версию использованной и удаляет записи версий, которые не
+        использовались MAX_VERSION_AGE или не входят в KEEP_VERSIONS последних
+        """
+        now = time.time() if now is None else now
+        db = self.db
+        # Записи из базы без таблицы versions считаются использованными сейчас
+        db.execute("INSERT OR IGNORE INTO versions SELECT DISTINCT version, ? FROM cells", (now,))
+        db.execute("INSERT OR REPLACE INTO versions (version, last_used) VALUES (?, ?)", (self.version, now))
+        stale = [version for (version,) in db.execute(
+            "SELECT version FROM versions WHERE last_used < ? OR version NOT IN "
+            "(SELECT version FROM versions ORDER BY last_used DESC LIMIT ?)",
+            (now - MAX_VERSION_AGE, KEEP_VERSIONS)
+        ) if version != self.version]
+        for version in stale:
+            db.execute("DELETE FROM cells WHERE version = ?", (version,))
+            db.execute("DELETE FROM versions WHERE version = ?", (version,))
+        db.commit()
+
+    def key(self, text: str) -> str:
+        """Ключ кеша: хеш версии парсера и нормализованного текста"""
+        return hashlib.sha256(f"{self.version}\0{normalize_cell(text)}".encode('utf-8')).hexdigest()
+
+    def _remember(self, key: str, result: List[Dict[str, object]]):
+        self.memory[key] = result
+        if len(self.memory) > self.maxsize:
+            self.memory.popitem(last=False)
+
+    def get(self, text: str) -> List[Dict[str, object]]:
+        """Результат разбора ячейки из кеша или новый разбор"""
+        key = self.key(text)
+
+        result = self.memory.get(key)
+        if result is not None:
+            self.memory.move_to_end(key)
+            self.counters['memory_hits'] += 1
+            return result
+
+        if self.db is not None:
+            row = self.db.execute("SELECT result FROM cells WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                result = json.loads(row[0])
+                self._remember(key, result)
+                self.counters['disk_hits'] += 1
+                return result
+
+        result = self.parse_fn(text)
+        self._remember(key, result)
+        self.counters['misses'] += 1
+
+        if self.db is not None:
+            self.pending.append((key, self.version, json.dumps(result, ensure_ascii=False)))
+            if len(self.pending) >= FLUSH_EVERY:
+                self.flush()
+
+        return result
+
+    def flush(self):
+        """Записывает новые результаты в SQLite"""
+        if self.db is None or not self.pending:
+            return
+        self.db.executemany("INSERT OR REPLACE INTO cells (key, version, result) VALUES (?, ?, ?)", self.pending)
+        self.db.commit()
+        self.pending = []
+
+    def close(self):
+        """Сбрасывает несохраненное и закрывает базу"""
+        self.flush()
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def stats(self) -> Dict[str, object]:
+        """Счетчики попаданий для статистики прогона"""
+        total = sum(self.counters.values())
+        hits = self.counters['memory_hits'] + self.counters['disk_hits']
+        return dict(self.counters, lookups=total, hit_rate=hits / total if total else 0.0)
+
+    def __enter__(self) -> 'ParseCache':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
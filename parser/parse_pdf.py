@@ -1,7 +1,8 @@
-import pdfplumber
 import re
 import csv
 
+from page_cache import load_pages
+
 PDF_FILE = "HPV_25_26-zminy-hruden.pdf"
 OUT_CSV = "result.csv"
 UNPARSED = "unparsed.txt"
@@ -29,19 +30,25 @@ def expand_houses(house_part: str):
     return result
 
 
-rows = []
-unparsed_lines = []
+def parse_text_pages(pages, unparsed_lines=None):
+    """
+    Разбирает текст страниц (см. page_cache.load_pages) построчно.
+    'source' = (страница, -1, строка текста): таблиц этот парсер не использует.
+    """
+    if unparsed_lines is None:
+        unparsed_lines = []
+
+    rows = []
 
-current_queue = None
-current_city = None
+    current_queue = None
+    current_city = None
 
-with pdfplumber.open(PDF_FILE) as pdf:
-    for page in pdf.pages:
-        text = page.extract_text()
+    for page in pages:
+        text = page["text"]
         if not text:
             continue
 
-        for line in text.split("\n"):
+        for line_idx, line in enumerate(text.split("\n")):
             line = line.strip()
 
             q_match = queue_pattern.search(line)
@@ -63,24 +70,37 @@ with pdfplumber.open(PDF_FILE) as pdf:
                         "city": current_city,
                         "street": f"{street_type} {street_name}",
                         "house": house,
-                        "queue": current_queue
+                        "queue": current_queue,
+                        "source": (page["page"], -1, line_idx)
                     })
             else:
                 if any(x in line for x in ["вул.", "просп.", "пров."]):
                     unparsed_lines.append(line)
 
-with open(OUT_CSV, "w", newline="", encoding="utf-8") as f:
-    writer = csv.DictWriter(
-        f,
-        fieldnames=["city", "street", "house", "queue"]
-    )
-    writer.writeheader()
-    writer.writerows(rows)
-
-with open(UNPARSED, "w", encoding="utf-8") as f:
-    for l in unparsed_lines:
-        f.write(l + "\n")
-
-print(f"Complete!")
-print(f"Addresses: {len(rows)}")
-print(f"Unparsed lines: {len(unparsed_lines)}")
+    return rows
+
+
+def main():
+    unparsed_lines = []
+    rows = parse_text_pages(load_pages(PDF_FILE, parts=('text',)), unparsed_lines)
+
+    with open(OUT_CSV, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(
+            f,
+            fieldnames=["city", "street", "house", "queue"],
+            extrasaction="ignore"
+        )
+        writer.writeheader()
+        writer.writerows(rows)
+
+    with open(UNPARSED, "w", encoding="utf-8") as f:
+        for l in unparsed_lines:
+            f.write(l + "\n")
+
+    print(f"Complete!")
+    print(f"Addresses: {len(rows)}")
+    print(f"Unparsed lines: {len(unparsed_lines)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,17 @@
-import pdfplumber
 import re
 import csv
 import json
 
+from keyword_matcher import ADDRESS, BRANCH, CELL_MATCHER, QUEUE
+from page_cache import load_pages
+
 PDF_FILE = "HPV_25_26-zminy-hruden.pdf"
 OUT_CSV = "result_improved.csv"
 OUT_JSON = "result_improved.json"
 UNPARSED = "unparsed_improved.txt"
 
+FIELDNAMES = ['branch', 'queue', 'subqueue', 'queue_full', 'city', 'street', 'house']
+
 QUEUE_PATTERN = re.compile(r'^(Перша|Друга|Третя|Четверта|П[.\'\u2019ʼ]ята|Шоста)\s+черга\s*$', re.IGNORECASE)
 SUBQUEUE_PATTERN = re.compile(r'^(Перша|Друга|Третя|Четверта|П[.\'\u2019ʼ]ята|Шоста)\s+черга\s+(І|ІІ)\s+підчерга', re.IGNORECASE)
 BRANCH_PATTERN = re.compile(r'(Полтавська|Кременчуцька|Лубенська|Миргородська|Хорольська|Гадяцька).*(філія|дільниця)', re.IGNORECASE)
@@ -114,37 +118,42 @@ def parse_addresses(text, current_city=None):
 
     return results
 
-def main():
+def parse_tables(pages, unparsed_lines=None, verbose=True):
+    """
+    Разбирает таблицы страниц (см. page_cache.load_pages) в список адресов.
+    Каждая строка результата содержит 'source' = (страница, таблица, строка таблицы).
+    """
+    if unparsed_lines is None:
+        unparsed_lines = []
+
     rows = []
-    unparsed_lines = []
 
     current_queue = None
     current_subqueue = None
     current_branch = None
     current_city = None
 
-    total_addresses = 0
-
-    with pdfplumber.open(PDF_FILE) as pdf:
-        print(f"Обработка {len(pdf.pages)} страниц...")
-
-        for page_num, page in enumerate(pdf.pages):
-            tables = page.extract_tables()
+    for page in pages:
+        page_num = page['page']
+        tables = page['tables']
 
-            if not tables:
-                continue
+        if not tables:
+            continue
 
-            for table in tables:
-                for row in table:
-                    if not row or not row[0]:
-                        continue
+        for table_idx, table in enumerate(tables):
+            for row_idx, row in enumerate(table):
+                if not row or not row[0]:
+                    continue
 
-                    cell_text = row[0].strip() if row[0] else ""
+                cell_text = row[0].strip() if row[0] else ""
+                cell_kinds = CELL_MATCHER.categories(cell_text)
 
+                if QUEUE in cell_kinds:
                     if QUEUE_PATTERN.match(cell_text):
                         current_queue = parse_queue_number(cell_text)
                         current_subqueue = None
-                        print(f"\n[Страница {page_num + 1}] Черга: {current_queue}")
+                        if verbose:
+                            print(f"\n[Страница {page_num}] Черга: {current_queue}")
                         continue
 
                     if SUBQUEUE_PATTERN.match(cell_text):
@@ -153,63 +162,76 @@ def main():
                         if queue_num:
                             current_queue = queue_num
                         current_subqueue = sub_num
-                        print(f"[Страница {page_num + 1}] Підчерга: {current_queue}.{current_subqueue}")
+                        if verbose:
+                            print(f"[Страница {page_num}] Підчерга: {current_queue}.{current_subqueue}")
                         continue
 
+                if BRANCH in cell_kinds:
                     branch_match = BRANCH_PATTERN.search(cell_text)
                     if branch_match:
                         current_branch = branch_match.group(1)
-                        print(f"[Страница {page_num + 1}] Філія: {current_branch}")
+                        if verbose:
+                            print(f"[Страница {page_num}] Філія: {current_branch}")
                         continue
 
-                    if current_branch != 'Полтавська':
-                        continue
+                if current_branch != 'Полтавська':
+                    continue
 
-                    if current_queue is None or current_subqueue is None:
-                        continue
+                if current_queue is None or current_subqueue is None:
+                    continue
 
-                    if len(row) < 2 or not row[1]:
-                        continue
+                if len(row) < 2 or not row[1]:
+                    continue
 
-                    address_text = row[1].strip()
+                address_text = row[1].strip()
 
-                    if not any(marker in address_text.lower() for marker in ['вул.', 'пров.', 'просп.', 'пл.', 'м.', 'с.', 'смт']):
-                        continue
+                if not CELL_MATCHER.has(address_text, ADDRESS):
+                    continue
 
-                    parsed_addresses = parse_addresses(address_text, current_city)
+                parsed_addresses = parse_addresses(address_text, current_city)
 
-                    if not parsed_addresses:
-                        unparsed_lines.append(f"[{current_queue}.{current_subqueue}] {address_text}")
-                        continue
+                if not parsed_addresses:
+                    unparsed_lines.append(f"[{current_queue}.{current_subqueue}] {address_text}")
+                    continue
+
+                for addr in parsed_addresses:
+                    city = addr['city']
+                    street = addr['street']
+
+                    if city:
+                        current_city = city
+
+                    for house in addr['houses']:
+                        rows.append({
+                            'branch': current_branch,
+                            'queue': current_queue,
+                            'subqueue': current_subqueue,
+                            'queue_full': f"{current_queue}.{current_subqueue}",
+                            'city': city,
+                            'street': street,
+                            'house': house,
+                            'source': (page_num, table_idx, row_idx)
+                        })
+
+    return rows
+
+def main():
+    unparsed_lines = []
+
+    pages = load_pages(PDF_FILE)
+    print(f"Обработка {len(pages)} страниц...")
 
-                    for addr in parsed_addresses:
-                        city = addr['city']
-                        street = addr['street']
-
-                        if city:
-                            current_city = city
-
-                        for house in addr['houses']:
-                            rows.append({
-                                'branch': current_branch,
-                                'queue': current_queue,
-                                'subqueue': current_subqueue,
-                                'queue_full': f"{current_queue}.{current_subqueue}",
-                                'city': city,
-                                'street': street,
-                                'house': house
-                            })
-                            total_addresses += 1
+    rows = parse_tables(pages, unparsed_lines)
+    total_addresses = len(rows)
 
     print(f"\nСохранение результатов...")
     with open(OUT_CSV, "w", newline="", encoding="utf-8") as f:
-        fieldnames = ['branch', 'queue', 'subqueue', 'queue_full', 'city', 'street', 'house']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES, extrasaction='ignore')
         writer.writeheader()
         writer.writerows(rows)
 
     with open(OUT_JSON, "w", encoding="utf-8") as f:
-        json.dump(rows, f, ensure_ascii=False, indent=2)
+        json.dump([{k: row[k] for k in FIELDNAMES} for row in rows], f, ensure_ascii=False, indent=2)
 
     with open(UNPARSED, "w", encoding="utf-8") as f:
         for line in unparsed_lines:
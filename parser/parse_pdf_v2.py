@@ -4,21 +4,59 @@
 Полтавской области для Telegram бота
 """
 
-import pdfplumber
 import re
 import csv
 import json
 from typing import List, Dict, Tuple, Optional
 
+from address_rows import FIELDNAMES, AddressRow, StringPool, dump_rows
+from data_quality import OUTPUT_FILE as QUALITY_FILE, format_report, save_report, validate
+from keyword_matcher import (
+    BRANCH, CELL_KEYWORDS, CELL_MATCHER, ORGANISATION, QUEUE, SUBQUEUE, KeywordHit, classify_cell
+)
+from page_cache import CACHE_DIR, load_pages
+from parse_budget import CELL_BUDGET, CellTimeout, alarm_guard, with_budget
+from parse_cache import ParseCache, normalize_cell, source_version
+from stats_cube import OUTPUT_FILE as CUBE_FILE, StatsCube, save_cube
+
 PDF_FILE = "HPV_25_26-zminy-hruden.pdf"
 OUT_CSV = "addresses.csv"
 OUT_JSON = "addresses.json"
+OUT_ENTERPRISES_CSV = "enterprises.csv"
+OUT_ENTERPRISES_JSON = "enterprises.json"
 STATS_FILE = "parsing_stats.txt"
+# Постоянный кеш разбора ячеек (None — только кеш в памяти)
+PARSE_CACHE_NAME = "parse_cache.sqlite"
+PARSE_CACHE_DB = f"{CACHE_DIR}/{PARSE_CACHE_NAME}"
+
+ENTERPRISE_FIELDNAMES = ['branch', 'queue', 'subqueue', 'queue_full', 'kind', 'name']
 
 QUEUE_PATTERN = re.compile(r'^(Перша|Друга|Третя|Четверта|П[.\'\u2019ʼ]ята|Шоста)\s+черга\s*$', re.IGNORECASE)
 SUBQUEUE_PATTERN = re.compile(r'^(Перша|Друга|Третя|Четверта|П[.\'\u2019ʼ]ята|Шоста)\s+черга\s+(І|ІІ)\s+підчерга', re.IGNORECASE)
 BRANCH_PATTERN = re.compile(r'(Полтавська|Кременчуцька|Лубенська|Миргородська|Хорольська|Гадяцька).*(філія|дільниця)', re.IGNORECASE)
 
+# Разбор ячеек с адресами (худшее время каждой регулярки — fuzz_parser.py)
+# Пробелы после префикса забираются целиком: (?!\s) сразу отсекает откат по одному пробелу
+# (иначе n^3 на длинной серии пробелов); без притяжательных квантификаторов — они только с 3.11.
+# 'м. :' по-прежнему дает название из одного пробела
+CITY_PATTERN = re.compile(
+    r'(м\.|с\.|смт\.)(?:\s*(?!\s)|\s*(?=\s[:;.]))([А-ЯІЇЄҐа-яіїєґ\'\s-]+?)(?:\s*[:;.]|(?=\s+вул\.|\s+пров\.|\s+просп\.))',
+    re.IGNORECASE
+)
+STREET_PATTERN = re.compile(
+    r'(вул\.|пров\.|просп\.|пл\.)\s*([А-ЯІЇЄҐа-яіїєґ\s\'\-]+?)(?=\s*,|\s*;|\s+\d|\s*\()',
+    re.IGNORECASE
+)
+# Совпадение может начаться только с первого пробела серии — с остальных не пробуем (n^2)
+NEXT_CITY_PATTERN = re.compile(r'(?<!\s)\s+(м\.|с\.|смт\.)\s*[А-ЯІЇЄҐ]')
+# Вторая ветка забирает целиком ряд букв, после которого номера дома нет: с любой другой
+# буквы этого ряда улица тоже не найдется, и finditer не перебирает их заново (иначе n^2)
+SIMPLE_STREET_PATTERN = re.compile(
+    r'([А-ЯІЇЄҐ][а-яіїєґ\'\s-]+?)(?:\s*,|\s+)(\d[^м\.с\.смт\.]+)'
+    r'|[А-ЯІЇЄҐ][а-яіїєґ\'\s-]*',
+    re.IGNORECASE
+)
+
 QUEUE_MAP = {
     'Перша': 1, 'Друга': 2, 'Третя': 3,
     'Четверта': 4, 'П.ята': 5, 'Пʼята': 5, "П'ята": 5, 'П\u2019ята': 5, 'Шоста': 6
@@ -39,6 +77,45 @@ def parse_subqueue_number(text: str) -> Optional[int]:
             return SUBQUEUE_MAP[name]
     return None
 
+def match_header(text: str) -> Optional[Tuple[str, object]]:
+    """
+    Распознает заголовок таблицы:
+    (QUEUE, черга) | (SUBQUEUE, (черга или None, підчерга)) | (BRANCH, філія) | None.
+    Регулярки запускаются только если автомат нашел в тексте нужные слова.
+    """
+    kinds = CELL_MATCHER.categories(text)
+
+    if QUEUE in kinds:
+        if QUEUE_PATTERN.match(text):
+            return QUEUE, parse_queue_number(text)
+        if SUBQUEUE_PATTERN.match(text):
+            return SUBQUEUE, (parse_queue_number(text), parse_subqueue_number(text))
+
+    if BRANCH in kinds:
+        branch_match = BRANCH_PATTERN.search(text)
+        if branch_match:
+            return BRANCH, branch_match.group(1)
+
+    return None
+
+def apply_header(context: Dict[str, any], header: Tuple[str, object]):
+    """Обновляет текущие філію/чергу/підчергу по заголовку"""
+    kind, value = header
+    if kind == QUEUE:
+        context['queue'] = value
+        context['subqueue'] = None
+    elif kind == SUBQUEUE:
+        queue_num, sub_num = value
+        if queue_num:
+            context['queue'] = queue_num
+        context['subqueue'] = sub_num
+    else:
+        context['branch'] = value
+
+def new_context() -> Dict[str, any]:
+    """Состояние разбора до первого заголовка"""
+    return {'branch': None, 'queue': None, 'subqueue': None}
+
 def expand_house_range(house_str: str) -> List[str]:
     """Разворачивает диапазон домов: '45-64' -> ['45', '46', ..., '64']"""
     house_str = house_str.strip()
@@ -81,9 +158,7 @@ def parse_address_line(text: str) -> List[Dict[str, any]]:
 
     text = re.sub(r'\s+', ' ', text).strip()
 
-    city_pattern = re.compile(r'(м\.|с\.|смт\.)\s*([А-ЯІЇЄҐа-яіїєґ\'\s-]+?)(?:\s*[:;.]|(?=\s+вул\.|\s+пров\.|\s+просп\.))', re.IGNORECASE)
-
-    cities = list(city_pattern.finditer(text))
+    cities = list(CITY_PATTERN.finditer(text))
 
     current_city = None
 
@@ -106,6 +181,10 @@ def parse_address_line(text: str) -> List[Dict[str, any]]:
 
     return results
 
+def simple_streets(text: str) -> List[re.Match]:
+    """Улицы без префикса ('Миру 5, 7'): совпадения SIMPLE_STREET_PATTERN без пропущенных рядов букв"""
+    return [match for match in SIMPLE_STREET_PATTERN.finditer(text) if match.group(1) is not None]
+
 def parse_streets_in_text(text: str, city: Optional[str]) -> List[Dict[str, any]]:
     """
     Парсит улицы и дома из текста.
@@ -115,12 +194,7 @@ def parse_streets_in_text(text: str, city: Optional[str]) -> List[Dict[str, any]
 
     text = text.lstrip(': ')
 
-    street_pattern = re.compile(
-        r'(вул\.|пров\.|просп\.|пл\.)\s*([А-ЯІЇЄҐа-яіїєґ\s\'\-]+?)(?=\s*,|\s*;|\s+\d|\s*\()',
-        re.IGNORECASE
-    )
-
-    street_matches = list(street_pattern.finditer(text))
+    street_matches = list(STREET_PATTERN.finditer(text))
 
     if street_matches:
         for i, match in enumerate(street_matches):
@@ -133,7 +207,7 @@ def parse_streets_in_text(text: str, city: Optional[str]) -> List[Dict[str, any]
             if i + 1 < len(street_matches):
                 end_pos = street_matches[i + 1].start()
             else:
-                next_city = re.search(r'\s+(м\.|с\.|смт\.)\s*[А-ЯІЇЄҐ]', text[start_pos:])
+                next_city = NEXT_CITY_PATTERN.search(text[start_pos:])
                 if next_city:
                     end_pos = start_pos + next_city.start()
                 else:
@@ -157,17 +231,11 @@ def parse_streets_in_text(text: str, city: Optional[str]) -> List[Dict[str, any]
                     })
 
     if not street_matches:
-
-        simple_street = re.compile(
-            r'([А-ЯІЇЄҐ][а-яіїєґ\'\s-]+?)(?:\s*,|\s+)(\d[^м\.с\.смт\.]+)',
-            re.IGNORECASE
-        )
-
-        for match in simple_street.finditer(text):
+        for match in simple_streets(text):
             street_name = match.group(1).strip().rstrip(',;:')
             houses_text = match.group(2).strip()
 
-            if any(kw in street_name.lower() for kw in ['тов', 'пат', 'прат', 'ат ', 'філі', 'завод']):
+            if CELL_MATCHER.has(street_name, ORGANISATION):
                 continue
 
             houses = extract_houses_from_text(houses_text)
@@ -182,64 +250,125 @@ def parse_streets_in_text(text: str, city: Optional[str]) -> List[Dict[str, any]
 
     return results
 
-def main():
-    with open('skipped_lines.txt', 'w', encoding='utf-8') as f:
-        f.write("=== Пропущені рядки при парсингу ===\n\n")
+# Версия правил разбора: меняется при любой правке этих функций и ключевых слов
+PARSER_VERSION = source_version(
+    expand_house_range, extract_houses_from_text, parse_address_line, parse_streets_in_text, simple_streets,
+    CELL_KEYWORDS,
+    CITY_PATTERN, STREET_PATTERN, NEXT_CITY_PATTERN, SIMPLE_STREET_PATTERN
+)
 
-    rows = []
-    stats = {
+def parse_enterprise_cell(text: str, hits: Optional[List[KeywordHit]] = None) -> List[Dict[str, str]]:
+    """
+    Делит ячейку с организациями на отдельные предприятия.
+    Пример: 'АТ ККУ "Кварц", ПрАТ "Інтер-ліс"' -> [{'kind': 'АТ', ...}, {'kind': 'ПрАТ', ...}]
+    Граница — каждое отдельное обозначение формы (ТОВ, ПАТ, КП...) в написании документа;
+    'завод', 'філія' остаются частью названия.
+    hits — совпадения автомата в normalize_cell(text) из classify_cell, чтобы не
+    прогонять автомат по ячейке второй раз.
+    """
+    text = normalize_cell(text)
+    if hits is None:
+        hits = CELL_MATCHER.iter_hits(text)
+
+    forms = [
+        hit for hit in hits
+        if hit.keyword.category == ORGANISATION and hit.keyword.word_end
+    ]
+    forms.sort(key=lambda hit: hit.start)
+
+    starts = [0] + [hit.start for hit in forms[1:]] if forms else [0]
+    enterprises = []
+    for i, start in enumerate(starts):
+        end = starts[i + 1] if i + 1 < len(starts) else len(text)
+        name = text[start:end].strip(' ,;')
+        if not name:
+            continue
+        kind = text[forms[i].start:forms[i].end] if forms else ''
+        enterprises.append({'kind': kind, 'name': name})
+
+    return enterprises
+
+def new_stats() -> Dict[str, any]:
+    """Пустая статистика парсинга"""
+    return {
         'total_pages': 0,
         'processed_lines': 0,
         'skipped_lines': 0,
+        'timeouts': 0,
         'total_addresses': 0,
+        'total_enterprises': 0,
         'by_queue': {}
     }
 
-    current_queue = None
-    current_subqueue = None
-    current_branch = None
-    current_city = None
+def new_cache(db_path: Optional[str] = None, cell_budget: Optional[float] = CELL_BUDGET) -> ParseCache:
+    """Кеш разбора ячеек с ограничением времени на каждую ячейку (см. parse_budget)"""
+    return ParseCache(with_budget(parse_address_line, cell_budget), PARSER_VERSION, db_path=db_path)
 
-    print(f"Открываем PDF файл: {PDF_FILE}")
+def parse_tables(pages: List[Dict[str, any]], stats: Optional[Dict[str, any]] = None,
+                 skipped: Optional[List[str]] = None, verbose: bool = True,
+                 enterprises: Optional[List[Dict[str, any]]] = None,
+                 cache: Optional[ParseCache] = None) -> List[AddressRow]:
+    """
+    Разбирает таблицы страниц в список адресов.
+    pages: [{'page': номер, 'tables': [...]}, ...] (см. page_cache.load_pages)
+    Строки — AddressRow с общими для всего документа строками (см. address_rows),
+    каждая содержит source = (страница, таблица, строка таблицы).
+    Ячейки с предприятиями (ТОВ, ПАТ, КП...) попадают в enterprises.
+    Повторяющиеся ячейки разбираются один раз через cache (см. parse_cache).
+    Ячейка, не уложившаяся в бюджет времени, отклоняется с причиной в skipped.
+    """
+    if stats is None:
+        stats = new_stats()
+    if skipped is None:
+        skipped = []
+    if enterprises is None:
+        enterprises = []
+    if cache is None:
+        cache = new_cache()
+
+    rows = []
+    # Ячейки, уже отклоненные по таймауту: повторы не ждут бюджет заново
+    timed_out: Dict[str, CellTimeout] = {}
+    pool = StringPool()
+
+    context = new_context()
+    current_city = None
 
-    with pdfplumber.open(PDF_FILE) as pdf:
-        stats['total_pages'] = len(pdf.pages)
-        print(f"Всего страниц: {stats['total_pages']}")
-        print("\nНачинаем обработку...\n")
+    # Обработчик SIGALRM ставится один раз на весь прогон, ячейки только взводят таймер
+    with alarm_guard():
+        for page in pages:
+            page_num = page['page']
+            tables = page['tables']
 
-        for page_num, page in enumerate(pdf.pages, 1):
-            tables = page.extract_tables()
+            # Страницы не подряд (выборочный разбор, см. page_index) несут состояние на начало страницы
+            if page.get('context'):
+                context.update(page['context'])
 
             if not tables:
                 continue
 
-            for table in tables:
-                for row in table:
+            for table_idx, table in enumerate(tables):
+                for row_idx, row in enumerate(table):
                     if not row or not row[0]:
                         continue
 
                     cell_text = str(row[0]).strip()
-
-                    if QUEUE_PATTERN.match(cell_text):
-                        current_queue = parse_queue_number(cell_text)
-                        current_subqueue = None
-                        print(f"[Стр. {page_num}] Черга: {current_queue}")
+                    header = match_header(cell_text)
+
+                    if header:
+                        apply_header(context, header)
+                        if verbose:
+                            if header[0] == QUEUE:
+                                print(f"[Стр. {page_num}] Черга: {context['queue']}")
+                            elif header[0] == SUBQUEUE:
+                                print(f"[Стр. {page_num}] Підчерга: {context['queue']}.{context['subqueue']}")
+                            else:
+                                print(f"[Стр. {page_num}] Філія: {context['branch']}")
                         continue
 
-                    if SUBQUEUE_PATTERN.match(cell_text):
-                        queue_num = parse_queue_number(cell_text)
-                        sub_num = parse_subqueue_number(cell_text)
-                        if queue_num:
-                            current_queue = queue_num
-                        current_subqueue = sub_num
-                        print(f"[Стр. {page_num}] Підчерга: {current_queue}.{current_subqueue}")
-                        continue
-
-                    branch_match = BRANCH_PATTERN.search(cell_text)
-                    if branch_match:
-                        current_branch = branch_match.group(1)
-                        print(f"[Стр. {page_num}] Філія: {current_branch}")
-                        continue
+                    current_queue = context['queue']
+                    current_subqueue = context['subqueue']
+                    current_branch = context['branch']
 
                     if current_queue is None or current_subqueue is None:
                         continue
@@ -254,17 +383,48 @@ def main():
 
                     stats['processed_lines'] += 1
 
-                    parsed = parse_address_line(address_text)
+                    queue_key = pool.queue_full(current_queue, current_subqueue)
 
-                    if not parsed:
-                        stats['skipped_lines'] += 1
+                    timeout = timed_out.get(address_text)
+                    if timeout is None:
+                        try:
+                            parsed = cache.get(address_text)
+                        except CellTimeout as exc:
+                            timeout = timed_out[address_text] = exc
 
-                        with open('skipped_lines.txt', 'a', encoding='utf-8') as f:
-                            f.write(f"[Стр. {page_num}] Черга {current_queue}.{current_subqueue} - {current_branch}\n")
-                            f.write(f"  {address_text}\n\n")
+                    if timeout is not None:
+                        stats['timeouts'] += 1
+                        stats['skipped_lines'] += 1
+                        skipped.append(
+                            f"[Стр. {page_num}] Черга {current_queue}.{current_subqueue} - {current_branch} "
+                            f"(таймаут: {timeout})\n"
+                            f"  {address_text}\n\n"
+                        )
                         continue
 
-                    queue_key = f"{current_queue}.{current_subqueue}"
+                    if not parsed:
+                        # Автомат нужен только ячейкам без адресов: один прогон, совпадения идут в разбор предприятий
+                        cell_kinds, cell_hits = classify_cell(normalize_cell(address_text))
+                        if ORGANISATION in cell_kinds:
+                            for enterprise in parse_enterprise_cell(address_text, cell_hits):
+                                enterprises.append({
+                                    'branch': current_branch,
+                                    'queue': current_queue,
+                                    'subqueue': current_subqueue,
+                                    'queue_full': queue_key,
+                                    'kind': enterprise['kind'],
+                                    'name': enterprise['name'],
+                                    'source': (page_num, table_idx, row_idx)
+                                })
+                                stats['total_enterprises'] += 1
+                            continue
+
+                        stats['skipped_lines'] += 1
+                        skipped.append(
+                            f"[Стр. {page_num}] Черга {current_queue}.{current_subqueue} - {current_branch}\n"
+                            f"  {address_text}\n\n"
+                        )
+                        continue
 
                     for addr in parsed:
                         if addr['city']:
@@ -272,36 +432,81 @@ def main():
 
                         city = addr['city'] if addr['city'] else current_city
 
-                        rows.append({
-                            'branch': current_branch,
-                            'queue': current_queue,
-                            'subqueue': current_subqueue,
-                            'queue_full': queue_key,
-                            'city': city or '',
-                            'street': addr['street'],
-                            'house': addr['house']
-                        })
+                        rows.append(AddressRow(
+                            pool.intern(current_branch), current_queue, current_subqueue, queue_key,
+                            pool.intern(city or ''), pool.intern(addr['street']), pool.intern(addr['house']),
+                            (page_num, table_idx, row_idx)
+                        ))
 
                         stats['total_addresses'] += 1
                         stats['by_queue'][queue_key] = stats['by_queue'].get(queue_key, 0) + 1
 
+    stats['cache'] = cache.stats()
+
+    return rows
+
+def format_cache_stats(cache_stats: Dict[str, any]) -> str:
+    """Строка статистики кеша разбора"""
+    return (
+        f"Кеш разбора (версия {PARSER_VERSION}): "
+        f"в памяти {cache_stats['memory_hits']}, на диске {cache_stats['disk_hits']}, "
+        f"разобрано {cache_stats['misses']}, попаданий {cache_stats['hit_rate']:.1%}"
+    )
+
+def main(cache_dir: str = CACHE_DIR):
+    """cache_dir — папка кеша страниц и разбора ячеек (watch_inbox передает абсолютный путь)"""
+    stats = new_stats()
+    skipped = []
+    enterprises = []
+
+    print(f"Открываем PDF файл: {PDF_FILE}")
+
+    pages = load_pages(PDF_FILE, cache_dir)
+    stats['total_pages'] = len(pages)
+    print(f"Всего страниц: {stats['total_pages']}")
+    print("\nНачинаем обработку...\n")
+
+    with new_cache(f"{cache_dir}/{PARSE_CACHE_NAME}") as cache:
+        rows = parse_tables(pages, stats, skipped, enterprises=enterprises, cache=cache)
+
+    with open('skipped_lines.txt', 'w', encoding='utf-8') as f:
+        f.write("=== Пропущені рядки при парсингу ===\n\n")
+        f.writelines(skipped)
+
     print(f"\n\nСохранение результатов в {OUT_CSV}...")
     with open(OUT_CSV, 'w', newline='', encoding='utf-8') as f:
-        fieldnames = ['branch', 'queue', 'subqueue', 'queue_full', 'city', 'street', 'house']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES, extrasaction='ignore')
         writer.writeheader()
         writer.writerows(rows)
 
     print(f"Сохранение результатов в {OUT_JSON}...")
     with open(OUT_JSON, 'w', encoding='utf-8') as f:
-        json.dump(rows, f, ensure_ascii=False, indent=2)
+        dump_rows(rows, f)
+    save_cube(StatsCube.from_rows(rows), OUT_JSON)
+
+    # Проверка качества — здесь, пока у строк есть номер страницы (source)
+    quality = validate(rows)
+    save_report(quality, QUALITY_FILE)
+
+    print(f"Сохранение предприятий в {OUT_ENTERPRISES_CSV} и {OUT_ENTERPRISES_JSON}...")
+    with open(OUT_ENTERPRISES_CSV, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=ENTERPRISE_FIELDNAMES, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(enterprises)
+
+    with open(OUT_ENTERPRISES_JSON, 'w', encoding='utf-8') as f:
+        json.dump([{k: e[k] for k in ENTERPRISE_FIELDNAMES} for e in enterprises], f, ensure_ascii=False, indent=2)
 
     with open(STATS_FILE, 'w', encoding='utf-8') as f:
         f.write("=== Статистика парсинга ===\n\n")
         f.write(f"Всего страниц: {stats['total_pages']}\n")
         f.write(f"Обработано строк: {stats['processed_lines']}\n")
         f.write(f"Пропущено строк: {stats['skipped_lines']}\n")
-        f.write(f"Всего адресов: {stats['total_addresses']}\n\n")
+        f.write(f"Из них по таймауту разбора: {stats['timeouts']}\n")
+        f.write(f"Всего адресов: {stats['total_addresses']}\n")
+        f.write(f"Всего предприятий: {stats['total_enterprises']}\n")
+        f.write(format_cache_stats(stats['cache']) + "\n\n")
+        f.write(format_report(quality) + "\n\n")
         f.write("Распределение по очередям:\n")
         for queue_key, count in sorted(stats['by_queue'].items()):
             f.write(f"  {queue_key}: {count} адресов\n")
@@ -310,14 +515,20 @@ def main():
     print("✓ Парсинг завершен!")
     print("="*50)
     print(f"Всего адресов: {stats['total_addresses']}")
+    print(f"Всего предприятий: {stats['total_enterprises']}")
+    print(format_cache_stats(stats['cache']))
     print(f"Обработано строк: {stats['processed_lines']}")
-    print(f"Пропущено строк: {stats['skipped_lines']}")
+    print(f"Пропущено строк: {stats['skipped_lines']} (таймаут разбора: {stats['timeouts']})")
+    print(format_report(quality))
     print("\nРаспределение по очередям:")
     for queue_key, count in sorted(stats['by_queue'].items()):
         print(f"  {queue_key}: {count} адресов")
     print(f"\nРезультаты сохранены в:")
     print(f"  - {OUT_CSV}")
     print(f"  - {OUT_JSON}")
+    print(f"  - {CUBE_FILE}")
+    print(f"  - {QUALITY_FILE}")
+    print(f"  - {OUT_ENTERPRISES_JSON}")
     print(f"  - {STATS_FILE}")
     print("="*50)
 
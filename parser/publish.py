@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Атомарная публикация результатов парсинга.
+- Каждый файл пишется во временный файл, сбрасывается на диск (fsync) и переименовывается
+- Каждый прогон публикуется в отдельную версию published/<версия>/
+- Указатель published/current (симлинк) и published/CURRENT переключаются атомарно
+Потребитель никогда не видит наполовину записанный файл.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from typing import Dict, Optional
+
+PUBLISH_DIR = "published"
+CURRENT_LINK = "current"
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+KEEP_VERSIONS = 5
+
+def fsync_dir(path: str):
+    """Сбрасывает на диск запись каталога (нужно после rename)"""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def atomic_write_bytes(path: str, data: bytes):
+    """Пишет файл атомарно: временный файл → fsync → rename"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fchmod(f.fileno(), 0o644)
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    fsync_dir(directory)
+
+def atomic_write_text(path: str, text: str):
+    """Атомарная запись текстового файла в UTF-8"""
+    atomic_write_bytes(path, text.encode('utf-8'))
+
+def atomic_write_json(path: str, data, indent: Optional[int] = 2):
+    """Атомарная запись JSON в формате, который используют остальные скрипты"""
+    atomic_write_text(path, json.dumps(data, ensure_ascii=False, indent=indent))
+
+def file_sha256(path: str) -> str:
+    """SHA-256 содержимого файла, читает блоками"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def switch_current(publish_dir: str, version: str):
+    """Атомарно переключает указатель current на новую версию"""
+    link_path = os.path.join(publish_dir, CURRENT_LINK)
+    tmp_link = os.path.join(publish_dir, f".{CURRENT_LINK}-{os.getpid()}")
+
+    if os.path.lexists(tmp_link):
+        os.unlink(tmp_link)
+    os.symlink(version, tmp_link)
+    os.replace(tmp_link, link_path)
+
+    atomic_write_text(os.path.join(publish_dir, CURRENT_FILE), version + "\n")
+
+def prune_versions(publish_dir: str, keep: int = KEEP_VERSIONS):
+    """Удаляет старые версии, оставляя последние keep и текущую"""
+    current = read_current_version(publish_dir)
+    versions = sorted(
+        name for name in os.listdir(publish_dir)
+        if not name.startswith('.') and os.path.isdir(os.path.join(publish_dir, name))
+        and not os.path.islink(os.path.join(publish_dir, name))
+    )
+    for name in versions[:-keep] if keep > 0 else versions:
+        if name != current:
+            shutil.rmtree(os.path.join(publish_dir, name), ignore_errors=True)
+
+def publish_version(files: Dict[str, str], source_hash: str, publish_dir: str = PUBLISH_DIR,
+                    keep: int = KEEP_VERSIONS) -> str:
+    """
+    Публикует набор файлов как новую версию.
+    files: {имя в публикации: путь к готовому файлу}
+    Возвращает имя опубликованной версии.
+    """
+    os.makedirs(publish_dir, exist_ok=True)
+
+    version = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{source_hash[:12]}"
+    version_dir = os.path.join(publish_dir, version)
+    os.makedirs(version_dir, exist_ok=True)
+
+    manifest = {
+        'version': version,
+        'source_sha256': source_hash,
+        'published_at': datetime.now().isoformat(timespec='seconds'),
+        'files': {}
+    }
+
+    for name, src_path in files.items():
+        with open(src_path, 'rb') as f:
+            data = f.read()
+        atomic_write_bytes(os.path.join(version_dir, name), data)
+        manifest['files'][name] = hashlib.sha256(data).hexdigest()
+
+    atomic_write_json(os.path.join(version_dir, MANIFEST_FILE), manifest)
+    fsync_dir(publish_dir)
+
+    switch_current(publish_dir, version)
+    prune_versions(publish_dir, keep)
+
+    return version
+
+def read_current_version(publish_dir: str = PUBLISH_DIR) -> Optional[str]:
+    """Возвращает имя текущей опубликованной версии"""
+    path = os.path.join(publish_dir, CURRENT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read().strip() or None
+
+def current_path(name: str, publish_dir: str = PUBLISH_DIR) -> str:
+    """Путь к файлу текущей версии через указатель current"""
+    return os.path.join(publish_dir, CURRENT_LINK, name)
@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+"""
+Индекс адресов в разделяемой памяти для пула процессов поиска.
+- Родитель один раз строит AddressIndex и упаковывает его в сегмент
+  multiprocessing.shared_memory: две хеш-таблицы с открытой адресацией
+  (місто+вулиця+будинок и вулиця+будинок), записи адресов и пул строк UTF-8
+- Рабочие процессы подключаются к сегменту без копирования: поиск читает таблицу
+  через struct.unpack_from прямо из общей памяти, строки декодируются только для ответа
+- Обновление данных: новый сегмент строится рядом, затем в управляющем сегменте
+  атомарно меняется поколение (seqlock). Рабочие замечают смену на следующем запросе,
+  подключаются к новому сегменту и закрывают старый
+- Результаты поиска совпадают с AddressIndex.lookup_text
+
+Бенчмарк: память (RSS/PSS) на рабочий процесс и пропускная способность от 1 до N ядер,
+общий сегмент против собственной копии AddressIndex в каждом процессе:
+    python3 shared_index.py --bench --workers 8
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import secrets
+import struct
+import time
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from address_index import (
+    ADDRESSES_FILE, CONFIDENCE_EXACT, CONFIDENCE_NO_CITY, AddressIndex, Match,
+    address_key, split_free_form
+)
+
+MAGIC = b'SVLX'
+FORMAT_VERSION = 1
+KEY_SEPARATOR = '\x1f'
+BATCH_SIZE = 500
+BENCH_QUERIES = 50000
+
+# magic, версия, поколение, слотов exact, слотов no_city, записей, городов,
+# смещения: exact, no_city, записи, списки записей, города, пул строк
+HEADER = struct.Struct('<4sIQIIIIQQQQQQ')
+# хеш ключа, ключ в пуле (смещение, длина), первая запись в списке, число записей (0 — пустой слот)
+SLOT = struct.Struct('<QIIII')
+# branch, queue_full, city, street, house — по (смещение, длина) в пуле
+RECORD = struct.Struct('<10I')
+POSTING = struct.Struct('<I')
+STRING_REF = struct.Struct('<II')
+# seq (нечетный — идет запись), поколение, имя сегмента данных
+CONTROL = struct.Struct('<QQ64s')
+
+def key_hash(key: bytes) -> int:
+    """Стабильный между процессами хеш (встроенный hash() зависит от PYTHONHASHSEED)"""
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+
+def encode_key(parts: Sequence[str]) -> bytes:
+    return KEY_SEPARATOR.join(parts).encode('utf-8')
+
+def attach(name: str) -> shared_memory.SharedMemory:
+    """
+    Подключение к чужому сегменту. Рабочие, запущенные через multiprocessing, делят
+    resource_tracker с родителем: повторная регистрация ничего не меняет, а снимает ее
+    unlink() в IndexPublisher. В Python 3.13+ подключение не регистрируется вовсе.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+# --- Упаковка ---
+
+class _Pool:
+    """Пул строк: одинаковые строки хранятся один раз"""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.refs: Dict[bytes, Tuple[int, int]] = {}
+
+    def add(self, value) -> Tuple[int, int]:
+        raw = value if isinstance(value, bytes) else (value or '').encode('utf-8')
+        ref = self.refs.get(raw)
+        if ref is None:
+            ref = self.refs[raw] = (len(self.data), len(raw))
+            self.data += raw
+        return ref
+
+def _pack_table(buckets: Dict[tuple, list], record_ids: Dict[tuple, int], pool: _Pool,
+                postings: List[int]) -> Tuple[int, bytes]:
+    """Хеш-таблица с линейным пробированием, размер — степень двойки не меньше 2 × ключей"""
+    slots = 1
+    while slots < 2 * max(len(buckets), 1):
+        slots *= 2
+    table = bytearray(slots * SLOT.size)
+    mask = slots - 1
+
+    for key, values in buckets.items():
+        raw = encode_key(key)
+        h = key_hash(raw)
+        offset, length = pool.add(raw)
+        start = len(postings)
+        postings.extend(record_ids[value] for value in values)
+
+        i = h & mask
+        while SLOT.unpack_from(table, i * SLOT.size)[4]:
+            i = (i + 1) & mask
+        SLOT.pack_into(table, i * SLOT.size, h, offset, length, start, len(values))
+    return slots, bytes(table)
+
+def pack_index(index: AddressIndex, generation: int) -> bytes:
+    """Содержимое сегмента для AddressIndex"""
+    pool = _Pool()
+    record_ids: Dict[tuple, int] = {}
+    records = bytearray()
+    for buckets in (index.exact, index.no_city):
+        for values in buckets.values():
+            for value in values:
+                if value not in record_ids:
+                    record_ids[value] = len(record_ids)
+                    records += RECORD.pack(*(n for part in value for n in pool.add(part)))
+
+    postings: List[int] = []
+    exact_slots, exact_table = _pack_table(index.exact, record_ids, pool, postings)
+    no_city_slots, no_city_table = _pack_table(index.no_city, record_ids, pool, postings)
+    cities = b''.join(STRING_REF.pack(*pool.add(city)) for city in sorted(index.cities))
+    posting_bytes = struct.pack(f'<{len(postings)}I', *postings)
+
+    sections = [exact_table, no_city_table, bytes(records), posting_bytes, cities, bytes(pool.data)]
+    offsets = []
+    position = HEADER.size
+    for section in sections:
+        position = (position + 7) & ~7
+        offsets.append(position)
+        position += len(section)
+
+    data = bytearray(position)
+    HEADER.pack_into(data, 0, MAGIC, FORMAT_VERSION, generation, exact_slots, no_city_slots,
+                     len(record_ids), len(index.cities), *offsets)
+    for offset, section in zip(offsets, sections):
+        data[offset:offset + len(section)] = section
+    return bytes(data)
+
+class IndexPublisher:
+    """
+    Владелец сегментов: строит сегмент данных нового поколения и переключает
+    на него управляющий сегмент. Старый сегмент удаляется сразу: рабочие, которые
+    еще к нему подключены, дочитают его (POSIX удаляет память после последнего close).
+    """
+
+    def __init__(self, control_name: Optional[str] = None):
+        self.prefix = control_name or f"svlx-{os.getpid()}-{secrets.token_hex(3)}"
+        self.control = shared_memory.SharedMemory(name=self.prefix, create=True, size=CONTROL.size)
+        CONTROL.pack_into(self.control.buf, 0, 0, 0, b'')
+        self.generation = 0
+        self.segment: Optional[shared_memory.SharedMemory] = None
+
+    @property
+    def control_name(self) -> str:
+        return self.control.name
+
+    def publish(self, index: AddressIndex) -> int:
+        """Публикует индекс новым поколением; возвращает номер поколения"""
+        generation = self.generation + 1
+        data = pack_index(index, generation)
+        segment = shared_memory.SharedMemory(name=f"{self.prefix}-{generation}", create=True, size=len(data))
+        segment.buf[:len(data)] = data
+
+        seq = CONTROL.unpack_from(self.control.buf, 0)[0]
+        struct.pack_into('<Q', self.control.buf, 0, seq + 1)
+        CONTROL.pack_into(self.control.buf, 0, seq + 1, generation, segment.name.encode('ascii'))
+        struct.pack_into('<Q', self.control.buf, 0, seq + 2)
+
+        previous, self.segment, self.generation = self.segment, segment, generation
+        if previous is not None:
+            previous.close()
+            previous.unlink()
+        return generation
+
+    def close(self):
+        for shm in (self.segment, self.control):
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+        self.segment = None
+
+# --- Чтение ---
+
+class SharedIndexReader:
+    """Поиск по сегменту текущего поколения (тот же результат, что AddressIndex)"""
+
+    def __init__(self, control_name: str):
+        self.control = attach(control_name)
+        self.segment: Optional[shared_memory.SharedMemory] = None
+        self.generation = 0
+        self.seq = -1
+        self.refresh()
+
+    def _read_control(self) -> Tuple[int, int, str]:
+        """Согласованный снимок управляющего сегмента (повтор, пока идет запись)"""
+        buf = self.control.buf
+        while True:
+            seq, generation, name = CONTROL.unpack_from(buf, 0)
+            if seq % 2 == 0 and struct.unpack_from('<Q', buf, 0)[0] == seq:
+                return seq, generation, name.rstrip(b'\0').decode('ascii')
+
+    def refresh(self) -> bool:
+        """Переподключается, если опубликовано новое поколение"""
+        if struct.unpack_from('<Q', self.control.buf, 0)[0] == self.seq:
+            return False
+        while True:
+            seq, generation, name = self._read_control()
+            if not name:
+                raise RuntimeError("Индекс еще не опубликован")
+            try:
+                segment = attach(name)
+            except FileNotFoundError:
+                # Между чтением имени и подключением вышло еще одно поколение
+                continue
+            break
+
+        previous, self.segment = self.segment, segment
+        self.buf = segment.buf
+        (_, version, self.generation, self.exact_slots, self.no_city_slots, _, cities_count,
+         self.exact_offset, self.no_city_offset, self.records_offset, self.postings_offset,
+         cities_offset, self.pool_offset) = HEADER.unpack_from(self.buf, 0)
+        if version != FORMAT_VERSION:
+            raise RuntimeError(f"Версия формата сегмента {version}, ожидается {FORMAT_VERSION}")
+        self.cities = {
+            self._string(*STRING_REF.unpack_from(self.buf, cities_offset + i * STRING_REF.size))
+            for i in range(cities_count)
+        }
+        self.seq = seq
+        if previous is not None:
+            previous.close()
+        return True
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self.pool_offset + offset
+        return str(self.buf[start:start + length], 'utf-8')
+
+    def _probe(self, table_offset: int, slots: int, key: bytes) -> List[tuple]:
+        """Записи по ключу: линейное пробирование до пустого слота"""
+        buf = self.buf
+        h = key_hash(key)
+        mask = slots - 1
+        i = h & mask
+        while True:
+            slot_hash, key_offset, key_length, start, count = SLOT.unpack_from(buf, table_offset + i * SLOT.size)
+            if not count:
+                return []
+            if slot_hash == h and key_length == len(key):
+                key_start = self.pool_offset + key_offset
+                if buf[key_start:key_start + key_length] == key:
+                    return [self._record(record_id) for (record_id,) in struct.iter_unpack(
+                        '<I', buf[self.postings_offset + start * POSTING.size:
+                                  self.postings_offset + (start + count) * POSTING.size])]
+            i = (i + 1) & mask
+
+    def _record(self, record_id: int) -> tuple:
+        refs = RECORD.unpack_from(self.buf, self.records_offset + record_id * RECORD.size)
+        return tuple(self._string(refs[i], refs[i + 1]) for i in range(0, 10, 2))
+
+    def lookup_key(self, key: Tuple[str, str, str]) -> Optional[Match]:
+        """Как AddressIndex.lookup_key: точный ключ, затем без города"""
+        city, street, house = key
+        if not street or not house:
+            return None
+
+        found = self._probe(self.exact_offset, self.exact_slots, encode_key(key))
+        if found:
+            return AddressIndex._pick(found, CONFIDENCE_EXACT)
+
+        found = self._probe(self.no_city_offset, self.no_city_slots, encode_key(key[1:]))
+        if found:
+            if not city:
+                return AddressIndex._pick(found, CONFIDENCE_NO_CITY)
+            cityless = [v for v in found if not v[2]]
+            if cityless:
+                return AddressIndex._pick(cityless, CONFIDENCE_NO_CITY)
+        return None
+
+    def lookup_text(self, text: str) -> Optional[Match]:
+        self.refresh()
+        return self.lookup_key(address_key(*split_free_form(text, self.cities)))
+
+    def close(self):
+        for shm in (self.segment, self.control):
+            if shm is not None:
+                shm.close()
+        self.segment = None
+
+# --- Пул рабочих процессов ---
+
+_reader: Optional[SharedIndexReader] = None
+_private: Optional[AddressIndex] = None
+
+def init_shared_worker(control_name: str):
+    global _reader
+    _reader = SharedIndexReader(control_name)
+
+def init_private_worker(addresses_file: str):
+    """Для сравнения: каждый процесс грузит и индексирует свою копию addresses.json"""
+    global _private
+    _private = AddressIndex.from_file(addresses_file)
+
+def lookup_batch(texts: List[str]) -> Tuple[int, List[Optional[Match]]]:
+    """(поколение индекса, результаты) для пачки запросов"""
+    if _reader is not None:
+        _reader.refresh()
+        return _reader.generation, [_reader.lookup_text(text) for text in texts]
+    return 0, [_private.lookup_text(text) for text in texts]
+
+def worker_pid(_) -> int:
+    time.sleep(0.05)
+    return os.getpid()
+
+class LookupPool:
+    """Пул процессов поиска поверх опубликованного индекса"""
+
+    def __init__(self, control_name: str, workers: int, context: str = 'spawn'):
+        self.pool = multiprocessing.get_context(context).Pool(
+            workers, initializer=init_shared_worker, initargs=(control_name,)
+        )
+
+    def lookup(self, texts: List[str], batch_size: int = BATCH_SIZE) -> List[Optional[Match]]:
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        return [match for _, matches in self.pool.map(lookup_batch, batches) for match in matches]
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+# --- Бенчмарк ---
+
+def memory_kb(pid: int) -> Tuple[int, int]:
+    """(RSS, PSS) процесса в КБ; PSS делит общие страницы между процессами"""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup', 'r') as f:
+        for line in f:
+            parts = line.split()
+            if parts and parts[0] in ('Rss:', 'Pss:'):
+                values[parts[0]] = int(parts[1])
+    return values.get('Rss:', 0), values.get('Pss:', 0)
+
+def bench_mode(mode: str, workers: int, batches: List[List[str]], control_name: str,
+               addresses_file: str) -> Dict[str, float]:
+    """Запуск пула, прогрев, замер пропускной способности и памяти рабочих"""
+    started = time.perf_counter()
+    if mode == 'shared':
+        initializer, initargs = init_shared_worker, (control_name,)
+    else:
+        initializer, initargs = init_private_worker, (addresses_file,)
+    pool = multiprocessing.get_context('spawn').Pool(workers, initializer=initializer, initargs=initargs)
+    try:
+        # Каждый рабочий должен пройти инициализацию до замера
+        pids = set(pool.map(worker_pid, range(workers * 4), chunksize=1))
+        startup = time.perf_counter() - started
+        pool.map(lookup_batch, batches[:workers])
+
+        started = time.perf_counter()
+        results = pool.map(lookup_batch, batches, chunksize=1)
+        elapsed = time.perf_counter() - started
+
+        memory = [memory_kb(pid) for pid in pids]
+    finally:
+        pool.terminate()
+        pool.join()
+
+    queries = sum(len(batch) for batch in batches)
+    return {
+        'workers': workers,
+        'mode': mode,
+        'startup_s': round(startup, 3),
+        'qps': round(queries / elapsed, 1),
+        'rss_mb': round(sum(rss for rss, _ in memory) / len(memory) / 1024, 1),
+        'pss_mb': round(sum(pss for _, pss in memory) / len(memory) / 1024, 1),
+        'found': sum(1 for _, matches in results for match in matches if match),
+    }
+
+def check_refresh(publisher: IndexPublisher, index: AddressIndex, control_name: str,
+                  workers: int, texts: List[str]) -> Tuple[int, List[int]]:
+    """Публикует новое поколение под нагрузкой и возвращает поколения, которые видят рабочие"""
+    pool = LookupPool(control_name, workers)
+    try:
+        pool.lookup(texts)
+        generation = publisher.publish(index)
+        batches = [texts[i:i + 50] for i in range(0, min(len(texts), 50 * workers * 4), 50)]
+        seen = sorted({gen for gen, _ in pool.pool.map(lookup_batch, batches, chunksize=1)})
+    finally:
+        pool.close()
+    return generation, seen
+
+def main():
+    parser = argparse.ArgumentParser(description="Индекс адресов в разделяемой памяти и пул процессов поиска")
+    parser.add_argument('--addresses', default=ADDRESSES_FILE, help="распарсенные адреса (addresses.json)")
+    parser.add_argument('--bench', action='store_true', help="бенчмарк памяти и пропускной способности")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="максимум рабочих процессов")
+    parser.add_argument('--queries', type=int, default=BENCH_QUERIES, help="запросов в бенчмарке")
+    parser.add_argument('--report', default="shared_index_bench.json", help="отчет бенчмарка в JSON")
+    args = parser.parse_args()
+
+    from load_test import build_queries
+
+    print(f"Загрузка данных из {args.addresses}...")
+    with open(args.addresses, 'r', encoding='utf-8') as f:
+        rows = json.load(f)
+    index = AddressIndex(rows)
+    texts = [query.text for query in build_queries(rows, args.queries, seed=2025)]
+
+    publisher = IndexPublisher()
+    try:
+        started = time.perf_counter()
+        publisher.publish(index)
+        print(f"Сегмент {publisher.segment.name}: {publisher.segment.size / 1024 / 1024:.1f} МБ, "
+              f"построен за {time.perf_counter() - started:.2f} с")
+
+        reader = SharedIndexReader(publisher.control_name)
+        mismatches = sum(1 for text in texts if reader.lookup_text(text) != index.lookup_text(text))
+        reader.close()
+        print(f"Совпадение с AddressIndex: {len(texts) - mismatches}/{len(texts)}")
+
+        generation, seen = check_refresh(publisher, index, publisher.control_name, min(args.workers, 4), texts)
+        print(f"Обновление: опубликовано поколение {generation}, рабочие видят {seen}")
+
+        if not args.bench:
+            return
+
+        batches = [texts[i:i + BATCH_SIZE] for i in range(0, len(texts), BATCH_SIZE)]
+        counts = sorted({1, 2, 4, 8, 16, args.workers} & set(range(1, args.workers + 1)))
+        results = []
+        print("\n" + "="*72)
+        print("ПУЛ ПРОЦЕССОВ ПОИСКА")
+        print("="*72)
+        print(f"{'процессов':>10}{'режим':>10}{'старт, с':>10}{'запр/с':>12}{'RSS, МБ':>10}{'PSS, МБ':>10}")
+        for workers in counts:
+            for mode in ('shared', 'private'):
+                result = bench_mode(mode, workers, batches, publisher.control_name, args.addresses)
+                results.append(result)
+                print(f"{workers:>10}{mode:>10}{result['startup_s']:>10.2f}{result['qps']:>12.0f}"
+                      f"{result['rss_mb']:>10.1f}{result['pss_mb']:>10.1f}")
+
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'queries': len(texts), 'segment_bytes': publisher.segment.size, 'results': results},
+                      f, ensure_ascii=False, indent=2)
+        print(f"\nRSS/PSS — на один рабочий процесс. Полный отчет: {args.report}")
+        print("="*72)
+    finally:
+        publisher.close()
+
+if __name__ == '__main__':
+    main()
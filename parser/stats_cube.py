@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Куб статистики адресов: філія × місто × черга × підчерга.
+- Для каждой из 16 группировок (любое подмножество измерений, включая итог)
+  хранится число адресов и число разных улиц
+- Обновляется инкрементально: add/remove/set_field трогают только 16 ячеек строки,
+  поэтому шаги конвейера, меняющие отдельные адреса, не пересчитывают весь набор
+- Любой запрос к готовой группировке — один поиск в словаре
+
+Формат stats_cube.json:
+    {"version": 2, "source_sha256": "...", "dimensions": [...],
+     "groupings": {"queue+subqueue": {"1|1": {"addresses": 2920, "streets": 412}, ...}, ...},
+     "streets": {"<філія>|<місто>|<черга>|<підчерга>": {"вул. Миру": 12, ...}, ...}}
+Раздел streets — счетчики улиц в самых мелких ячейках: по ним при загрузке
+восстанавливаются остальные, чтобы число разных улиц тоже можно было уменьшать.
+В ключе пустое измерение (None) — пустая строка, '|' и '\\' внутри значения экранируются '\\'.
+
+Запуск (полный пересчет по файлу):
+    python3 stats_cube.py addresses_clean.json
+"""
+
+import argparse
+import json
+import os
+from collections import Counter
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from publish import atomic_write_json, file_sha256
+
+OUTPUT_FILE = "stats_cube.json"
+CUBE_VERSION = 2
+
+DIMENSIONS = ('branch', 'city', 'queue', 'subqueue')
+KEY_SEPARATOR = '|'
+KEY_ESCAPE = '\\'
+TOTAL = 'total'
+
+def dim_value(value) -> str:
+    """Значение измерения строкой: None — пустая строка"""
+    return '' if value is None else str(value)
+
+def make_key(values: Iterable[str]) -> str:
+    """Ключ ячейки: значения через KEY_SEPARATOR, разделитель и экран внутри значений экранируются"""
+    return KEY_SEPARATOR.join(
+        value.replace(KEY_ESCAPE, KEY_ESCAPE * 2).replace(KEY_SEPARATOR, KEY_ESCAPE + KEY_SEPARATOR)
+        for value in values
+    )
+
+def split_key(key: str) -> Tuple[str, ...]:
+    """Значения измерений из ключа (обратное make_key)"""
+    values = []
+    current = []
+    chars = iter(key)
+    for char in chars:
+        if char == KEY_ESCAPE:
+            current.append(next(chars, ''))
+        elif char == KEY_SEPARATOR:
+            values.append(''.join(current))
+            current = []
+        else:
+            current.append(char)
+    values.append(''.join(current))
+    return tuple(values)
+
+def grouping_name(dims: Tuple[int, ...]) -> str:
+    """'branch+queue' для индексов измерений, 'total' для итога"""
+    return '+'.join(DIMENSIONS[i] for i in dims) or TOTAL
+
+# (имя группировки, индексы измерений) — от итога к самой мелкой
+GROUPINGS: List[Tuple[str, Tuple[int, ...]]] = [
+    (grouping_name(dims), dims)
+    for size in range(len(DIMENSIONS) + 1)
+    for dims in combinations(range(len(DIMENSIONS)), size)
+]
+BASE = grouping_name(tuple(range(len(DIMENSIONS))))
+
+class CubeCell:
+    """Число адресов и счетчики улиц (город, улица) одной ячейки куба"""
+
+    __slots__ = ('addresses', 'streets')
+
+    def __init__(self):
+        self.addresses = 0
+        self.streets: Counter = Counter()
+
+class StatsCube:
+    """Инкрементальный куб: {группировка: {ключ: CubeCell}}"""
+
+    def __init__(self):
+        self.groups: Dict[str, Dict[str, CubeCell]] = {name: {} for name, _ in GROUPINGS}
+        self.source_sha256: Optional[str] = None
+
+    @classmethod
+    def from_rows(cls, rows: Iterable) -> 'StatsCube':
+        """Полный расчет: строки группируются в самые мелкие ячейки, остальные — из них"""
+        base: Dict[Tuple[str, ...], Counter] = {}
+        for row in rows:
+            values = tuple(dim_value(row[dim]) for dim in DIMENSIONS)
+            streets = base.get(values)
+            if streets is None:
+                streets = base[values] = Counter()
+            streets[(dim_value(row['city']), row['street'])] += 1
+        return cls._from_base(base)
+
+    @classmethod
+    def _from_base(cls, base: Dict[Tuple[str, ...], Counter]) -> 'StatsCube':
+        """Сворачивает счетчики улиц самых мелких ячеек во все группировки"""
+        cube = cls()
+        for values, streets in base.items():
+            addresses = sum(streets.values())
+            for name, dims in GROUPINGS:
+                key = make_key(values[i] for i in dims)
+                cell = cube.groups[name].get(key)
+                if cell is None:
+                    cell = cube.groups[name][key] = CubeCell()
+                cell.addresses += addresses
+                cell.streets.update(streets)
+        return cube
+
+    @staticmethod
+    def _keys(row) -> Iterable[Tuple[str, str]]:
+        values = [dim_value(row[dim]) for dim in DIMENSIONS]
+        for name, dims in GROUPINGS:
+            yield name, make_key(values[i] for i in dims)
+
+    def _apply(self, row, delta: int):
+        street = (dim_value(row['city']), row['street'])
+        for name, key in self._keys(row):
+            group = self.groups[name]
+            cell = group.get(key)
+            if cell is None:
+                cell = group[key] = CubeCell()
+            cell.addresses += delta
+            cell.streets[street] += delta
+            if cell.streets[street] <= 0:
+                del cell.streets[street]
+            if cell.addresses <= 0:
+                del group[key]
+
+    def add(self, row):
+        """Учесть новую строку"""
+        self._apply(row, 1)
+
+    def remove(self, row):
+        """Убрать строку (до ее удаления из набора)"""
+        self._apply(row, -1)
+
+    def set_field(self, row, field: str, value):
+        """Меняет поле строки и переносит ее между ячейками"""
+        if row[field] == value:
+            return
+        self.remove(row)
+        row[field] = value
+        self.add(row)
+
+    def cell(self, **filters) -> Optional[CubeCell]:
+        """Ячейка по значениям измерений, например cell(branch='Полтавська', queue=1)"""
+        dims = tuple(i for i, dim in enumerate(DIMENSIONS) if filters.get(dim) is not None)
+        key = make_key(dim_value(filters[DIMENSIONS[i]]) for i in dims)
+        return self.groups[grouping_name(dims)].get(key)
+
+    def addresses(self, **filters) -> int:
+        """Число адресов под фильтр"""
+        cell = self.cell(**filters)
+        return cell.addresses if cell else 0
+
+    def streets(self, **filters) -> int:
+        """Число разных улиц под фильтр"""
+        cell = self.cell(**filters)
+        return len(cell.streets) if cell else 0
+
+    def group(self, *dims: str) -> Dict[str, CubeCell]:
+        """Вся группировка по указанным измерениям: {ключ: ячейка}"""
+        order = tuple(sorted(DIMENSIONS.index(dim) for dim in dims))
+        return self.groups[grouping_name(order)]
+
+    def top(self, dim: str, limit: int = 10) -> List[Tuple[str, int]]:
+        """Самые большие значения одного измерения по числу адресов"""
+        cells = self.group(dim)
+        top = sorted(cells.items(), key=lambda item: -item[1].addresses)[:limit]
+        return [(split_key(key)[0], cell.addresses) for key, cell in top]
+
+    def to_json(self) -> Dict[str, object]:
+        """Готовые агрегаты для бота и счетчики улиц для инкрементальных обновлений"""
+        return {
+            'version': CUBE_VERSION,
+            'source_sha256': self.source_sha256,
+            'dimensions': list(DIMENSIONS),
+            'groupings': {
+                name: {
+                    key: {'addresses': cell.addresses, 'streets': len(cell.streets)}
+                    for key, cell in sorted(group.items())
+                }
+                for name, group in self.groups.items()
+            },
+            'streets': {
+                key: {street: count for (_, street), count in sorted(cell.streets.items())}
+                for key, cell in sorted(self.groups[BASE].items())
+            }
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, object]) -> 'StatsCube':
+        """Восстанавливает куб по счетчикам улиц самых мелких ячеек"""
+        city_index = DIMENSIONS.index('city')
+        base = {}
+        for base_key, streets in data['streets'].items():
+            values = split_key(base_key)
+            base[values] = Counter({(values[city_index], street): count for street, count in streets.items()})
+
+        cube = cls._from_base(base)
+        cube.source_sha256 = data.get('source_sha256')
+        return cube
+
+def save_cube(cube: StatsCube, source_path: str, path: str = OUTPUT_FILE):
+    """Сохраняет куб, привязанный к файлу с адресами, который он описывает"""
+    cube.source_sha256 = file_sha256(source_path)
+    atomic_write_json(path, cube.to_json(), indent=None)
+
+def load_cube(source_path: str, rows: Iterable, path: str = OUTPUT_FILE) -> StatsCube:
+    """
+    Куб для файла source_path: сохраненный, если он описывает именно этот файл,
+    иначе полный пересчет по rows.
+    """
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') == CUBE_VERSION and data.get('source_sha256') == file_sha256(source_path):
+            return StatsCube.from_json(data)
+
+    print(f"Куб статистики {path} не относится к {source_path}, полный пересчет...")
+    return StatsCube.from_rows(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="Полный пересчет куба статистики адресов")
+    parser.add_argument('path', nargs='?', default="addresses_clean.json", help="JSON с адресами")
+    parser.add_argument('--out', default=OUTPUT_FILE, help="файл куба")
+    args = parser.parse_args()
+
+    with open(args.path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    cube = StatsCube.from_rows(data)
+    save_cube(cube, args.path, args.out)
+
+    print("\n" + "="*60)
+    print("КУБ СТАТИСТИКИ")
+    print("="*60)
+    print(f"Адресов: {cube.addresses()}, улиц: {cube.streets()}")
+    print(f"Ячеек: {sum(len(group) for group in cube.groups.values())} в {len(GROUPINGS)} группировках")
+    print("\nПо чергам:")
+    for key, cell in sorted(cube.group('queue', 'subqueue').items()):
+        print(f"  {key.replace(KEY_SEPARATOR, '.')}: {cell.addresses} адресов, {len(cell.streets)} улиц")
+    print(f"\n✓ Куб сохранен в {args.out}")
+    print("="*60)
+
+if __name__ == '__main__':
+    main()
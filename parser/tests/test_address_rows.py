@@ -0,0 +1,31 @@
+"""
+address_rows.AddressRow: сравнение по полям без source и намеренная нехешируемость.
+
+Запуск (из папки parser):
+    python3 -m pytest -q tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from address_rows import AddressRow  # noqa: E402
+
+def row(city='м.Полтава', source=None):
+    return AddressRow('Полтавська філія', 1, 1, '1.1', city, 'вул. Миру', '12', source)
+
+class AddressRowTest(unittest.TestCase):
+
+    def test_equal_ignores_source(self):
+        self.assertEqual(row(source=(1, 0, 0)), row(source=(2, 1, 3)))
+        self.assertNotEqual(row(), row(city='с.Терешки'))
+
+    def test_unhashable(self):
+        self.assertIsNone(AddressRow.__hash__)
+        with self.assertRaises(TypeError):
+            {row()}
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+"""
+data_quality: неразвернутые диапазоны и серии подряд идущих номеров (одна запись на серию).
+
+Запуск (из папки parser):
+    python3 -m pytest -q tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_quality  # noqa: E402
+from address_rows import AddressRow  # noqa: E402
+from data_quality import RANGE_RUN_LIMIT, validate  # noqa: E402
+
+def rows(street, houses, source):
+    return [AddressRow('Полтавська філія', 1, 1, '1.1', 'м.Полтава', street, house, source) for house in houses]
+
+def rule(report, name):
+    return next(rule for rule in report['rules'] if rule['rule'] == name)
+
+class DataQualityTest(unittest.TestCase):
+
+    def test_unexpanded_range(self):
+        report = validate(rows('вул. Миру', ['10-250', '9-1', '12', '14а'], (1, 0, 0)))
+        found = rule(report, 'house_range')
+        self.assertEqual(found['count'], 2)
+        self.assertEqual(found['groups'][0]['page'], 1)
+
+    def test_runs_reported_once_with_length(self):
+        # Один развернутый диапазон (до 101 дома) — норма; два встык в одной ячейке — серия
+        single = rows('вул. Миру', [str(i) for i in range(1, RANGE_RUN_LIMIT + 1)], (1, 0, 0))
+        joined = rows('вул. Сонячна', [str(i) for i in range(1, 2 * RANGE_RUN_LIMIT + 1)], (2, 0, 0))
+        report = validate(single + joined)
+
+        found = rule(report, 'range_run')
+        self.assertEqual(found['count'], 1)
+        self.assertEqual(found['rows'], 2 * RANGE_RUN_LIMIT)
+        run, = found['runs']
+        self.assertEqual((run['page'], run['length']), (2, 2 * RANGE_RUN_LIMIT))
+        self.assertTrue(run['example'].endswith(f"| 1-{2 * RANGE_RUN_LIMIT}"))
+        self.assertIn('серий: 1, строк: ', data_quality.format_report(report))
+
+if __name__ == '__main__':
+    unittest.main()
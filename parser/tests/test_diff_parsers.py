@@ -0,0 +1,35 @@
+"""
+diff_parsers.diff_rows: другая черга и другое число строк — разные категории.
+
+Запуск (из папки parser):
+    python3 -m pytest -q tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from diff_parsers import diff_rows, format_counts  # noqa: E402
+
+def row(queue_full, house='12', cell=(1, 0, 0)):
+    return {'city': 'м.Полтава', 'street': 'вул. Миру', 'house': house, 'queue_full': queue_full, 'source': cell}
+
+class DiffRowsTest(unittest.TestCase):
+
+    def test_duplicates_are_not_other_queue(self):
+        diff = diff_rows([row('1.1')] * 6, [row('1.1')])
+        self.assertEqual(diff['changed'], [])
+        self.assertEqual(len(diff['duplicates']), 1)
+        _, _, queues_a, queues_b = diff['duplicates'][0]
+        self.assertEqual(format_counts(queues_a), '1.1 ×6')
+        self.assertEqual(format_counts(queues_b), '1.1')
+
+    def test_other_queue(self):
+        diff = diff_rows([row('1.1'), row('1.1')], [row('2.1')])
+        self.assertEqual(diff['duplicates'], [])
+        self.assertEqual(diff['changed'][0][2:], (['1.1'], ['2.1']))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+fetch_schedule.fetch_once против локального http.server:
+200 -> 304 -> тот же документ без условных запросов -> оборванное тело -> упавший конвейер.
+
+Запуск (из папки parser):
+    python3 -m pytest -q tests
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fetch_schedule  # noqa: E402
+
+PDF = b'%PDF-1.4\n' + b'0' * 4096 + b'\n%%EOF\n'
+
+class ScheduleHandler(BaseHTTPRequestHandler):
+    """Отдает server.body; server.conditional и server.truncate управляют поведением"""
+
+    def do_GET(self):
+        server = self.server
+        etag = '"' + hashlib.sha256(server.body).hexdigest()[:16] + '"'
+        if server.conditional and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/pdf')
+        if server.conditional:
+            self.send_header('ETag', etag)
+        if server.truncate:
+            self.send_header('Content-Length', '1000000')
+            self.end_headers()
+            self.wfile.write(server.body[:1000])
+            self.close_connection = True
+            return
+        self.send_header('Content-Length', str(len(server.body)))
+        self.end_headers()
+        self.wfile.write(server.body)
+
+    def log_message(self, *args):
+        pass
+
+class FetchScheduleTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), ScheduleHandler)
+        self.server.body = PDF
+        self.server.conditional = True
+        self.server.truncate = False
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/grafik.pdf"
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.inbox = os.path.join(self.tmp.name, 'inbox')
+        self.publish = os.path.join(self.tmp.name, 'published')
+        self.state = os.path.join(self.tmp.name, 'state.json')
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def fetch(self, run: bool = False) -> str:
+        return fetch_schedule.fetch_once(self.url, self.inbox, self.publish, self.state, run=run)
+
+    def pdfs(self):
+        if not os.path.isdir(self.inbox):
+            return []
+        return sorted(name for name in os.listdir(self.inbox) if name.endswith('.pdf'))
+
+    def test_conditional_unchanged_and_truncated(self):
+        self.assertEqual(self.fetch(), 'queued')
+        self.assertEqual(len(self.pdfs()), 1)
+
+        # ETag сохранен: сервер отвечает 304, тело не скачивается
+        self.assertEqual(self.fetch(), 'not_modified')
+
+        # Сервер без условных запросов отдает тот же документ: хеш совпал, в inbox ничего нового
+        self.server.conditional = False
+        self.assertEqual(self.fetch(), 'unchanged')
+        self.assertEqual(len(self.pdfs()), 1)
+
+        # Новый документ обрывается после 1000 байт из заявленного 1000000
+        self.server.body = PDF + b'new version'
+        self.server.truncate = True
+        self.assertEqual(self.fetch(), 'failed')
+        self.assertEqual(len(self.pdfs()), 1)
+        self.assertEqual(os.listdir(self.inbox), self.pdfs())
+
+        # Целый документ после обрыва принимается
+        self.server.truncate = False
+        self.assertEqual(self.fetch(), 'queued')
+        self.assertEqual(len(self.pdfs()), 2)
+
+    def test_failed_document_is_not_reparsed(self):
+        self.server.conditional = False
+        with mock.patch('watch_inbox.process_pdf', return_value=None) as process_pdf:
+            self.assertEqual(self.fetch(run=True), 'failed')
+            self.assertEqual(self.fetch(run=True), 'skipped')
+            self.assertEqual(process_pdf.call_count, 1)
+
+            with open(self.state, 'r', encoding='utf-8') as f:
+                self.assertEqual(json.load(f)['failed_sha256'], hashlib.sha256(PDF).hexdigest())
+
+            # Новая версия документа снова уходит в конвейер
+            self.server.body = PDF + b'fixed'
+            self.assertEqual(self.fetch(run=True), 'failed')
+            self.assertEqual(process_pdf.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
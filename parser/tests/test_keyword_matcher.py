@@ -0,0 +1,30 @@
+"""
+keyword_matcher: позиции совпадений в исходном тексте, даже если lower() меняет длину строки.
+
+Запуск (из папки parser):
+    python3 -m pytest -q tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_matcher import CELL_MATCHER, ORGANISATION  # noqa: E402
+from parse_pdf_v2 import parse_enterprise_cell  # noqa: E402
+
+class IterHitsTest(unittest.TestCase):
+
+    def test_offsets_after_lengthening_lower(self):
+        text = 'İstanbul İİ ТОВ "Кварц"'
+        self.assertNotEqual(len(text.lower()), len(text))
+        hit = CELL_MATCHER.first(text, ORGANISATION)
+        self.assertEqual(text[hit.start:hit.end], 'ТОВ')
+
+    def test_enterprise_kind_keeps_source_spelling(self):
+        enterprises = parse_enterprise_cell('İİ ТОВ "Кварц", ПрАТ "Інтер-ліс"')
+        self.assertEqual([e['kind'] for e in enterprises], ['ТОВ', 'ПрАТ'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+parse_budget: таймаут зависшего разбора внутри alarm_guard и возврат прежнего обработчика SIGALRM.
+
+Запуск (из папки parser):
+    python3 -m pytest -q tests
+"""
+
+import os
+import signal
+import sys
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parse_budget import CellTimeout, alarm_guard, with_budget  # noqa: E402
+
+def slow_parse(text):
+    time.sleep(5)
+    return [text]
+
+def sleepy_parse(text):
+    time.sleep(0.1)
+    return [text]
+
+@unittest.skipUnless(hasattr(signal, 'SIGALRM'), "нужен SIGALRM")
+class WithBudgetTest(unittest.TestCase):
+
+    def test_timeout_restores_handler(self):
+        previous = signal.getsignal(signal.SIGALRM)
+        started = time.perf_counter()
+        with self.assertRaises(CellTimeout):
+            with alarm_guard():
+                with_budget(slow_parse, 0.05)('вул. Миру 1')
+        self.assertLess(time.perf_counter() - started, 1.0)
+        self.assertIs(signal.getsignal(signal.SIGALRM), previous)
+
+    def test_handler_installed_once_per_guard(self):
+        guarded = with_budget(lambda text: [text], 1.0)
+        with mock.patch('parse_budget.signal.signal', wraps=signal.signal) as install:
+            with alarm_guard():
+                for _ in range(100):
+                    guarded('вул. Миру 1')
+        self.assertEqual(install.call_count, 2)
+
+    def test_without_guard_measured_after_parse(self):
+        previous = signal.getsignal(signal.SIGALRM)
+        with self.assertRaises(CellTimeout):
+            with_budget(sleepy_parse, 0.05)('вул. Миру 1')
+        self.assertIs(signal.getsignal(signal.SIGALRM), previous)
+
+    def test_handler_installed_outside_python(self):
+        # signal.signal возвращает None, если прежний обработчик поставлен не из Python
+        real_signal = signal.signal
+        calls = []
+
+        def fake_signal(signum, handler):
+            calls.append(handler)
+            real_signal(signum, handler)
+            return None if len(calls) == 1 else signal.SIG_DFL
+
+        with mock.patch('parse_budget.signal.signal', side_effect=fake_signal):
+            with alarm_guard():
+                self.assertEqual(with_budget(lambda text: [text], 1.0)('вул. Миру 1'), ['вул. Миру 1'])
+        self.assertIs(calls[-1], signal.SIG_DFL)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+"""
+parse_cache.ParseCache: несколько версий парсера в одной базе и вытеснение старых.
+
+Запуск (из папки parser):
+    python3 -m pytest -q tests
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parse_cache  # noqa: E402
+from parse_cache import KEEP_VERSIONS, MAX_VERSION_AGE, ParseCache  # noqa: E402
+
+def parse(text):
+    return [{'text': text}]
+
+class ParseCacheVersionsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'parse_cache.sqlite')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_version(self, version, texts=('вул. Миру 1', 'вул. Миру 2')):
+        with ParseCache(parse, version, db_path=self.db_path) as cache:
+            for text in texts:
+                cache.get(text)
+            return dict(cache.counters)
+
+    def versions(self):
+        with sqlite3.connect(self.db_path) as db:
+            return {version for (version,) in db.execute("SELECT DISTINCT version FROM cells")}
+
+    def test_versions_share_database(self):
+        self.run_version('old')
+        self.run_version('new')
+        # Как в diff_parsers: старая и новая версии подряд не стирают записи друг друга
+        self.assertEqual(self.run_version('old')['disk_hits'], 2)
+        self.assertEqual(self.run_version('new')['disk_hits'], 2)
+        self.assertEqual(self.versions(), {'old', 'new'})
+
+    def test_least_recently_used_versions_are_pruned(self):
+        for i in range(KEEP_VERSIONS + 2):
+            self.run_version(f'v{i}')
+        self.assertEqual(self.versions(), {f'v{i}' for i in range(2, KEEP_VERSIONS + 2)})
+
+    def test_unused_versions_expire(self):
+        self.run_version('old')
+        cache = ParseCache(parse, 'new', db_path=self.db_path)
+        cache.prune(now=parse_cache.time.time() + MAX_VERSION_AGE + 1)
+        cache.close()
+        self.assertEqual(self.versions(), set())
+
+if __name__ == '__main__':
+    unittest.main()
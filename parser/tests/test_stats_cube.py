@@ -0,0 +1,41 @@
+"""
+stats_cube: ключи ячеек с пустыми измерениями и с разделителем внутри значения.
+
+Запуск (из папки parser):
+    python3 -m pytest -q tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stats_cube import StatsCube, make_key, split_key  # noqa: E402
+
+def row(branch, city, street='вул. Миру'):
+    return {'branch': branch, 'city': city, 'queue': 1, 'subqueue': 2, 'street': street, 'house': '1'}
+
+class StatsCubeTest(unittest.TestCase):
+
+    def test_split_key_roundtrip(self):
+        values = ('Полтавська', 'м.А|Б', 'C:\\x\\|', '')
+        self.assertEqual(split_key(make_key(values)), values)
+
+    def test_missing_branch_is_empty(self):
+        cube = StatsCube.from_rows([row(None, 'м.Полтава')])
+        self.assertEqual(list(cube.group('branch')), [''])
+        self.assertEqual(cube.addresses(queue=1, subqueue=2), 1)
+
+    def test_separator_in_value_survives_json(self):
+        rows = [row('Полтавська', 'м.А|Б'), row('Полтавська', 'м.А|Б', 'вул. Нова'), row(None, None)]
+        cube = StatsCube.from_json(StatsCube.from_rows(rows).to_json())
+        self.assertEqual(cube.addresses(city='м.А|Б'), 2)
+        self.assertEqual(cube.streets(city='м.А|Б'), 2)
+        self.assertEqual(cube.top('city', 1), [('м.А|Б', 2)])
+        cube.remove(rows[2])
+        self.assertEqual(cube.addresses(), 2)
+        self.assertEqual(cube.streets(), 2)
+
+if __name__ == '__main__':
+    unittest.main()
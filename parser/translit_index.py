@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Индекс транслитерации и неверной раскладки для поиска адресов.
+- Для каждого населенного пункта и улицы заранее считаются два ключа:
+  транслит ("Poltava", "Hrabchaka", "Grabchaka") и набор в английской раскладке ("Gjknfdf")
+- Ключ строится одной и той же функцией из названия и из запроса, поэтому поиск —
+  один хеш-запрос на фрагмент запроса, без перебора вариантов конвертации
+- Неоднозначные ключи хранят все названия; верное выбирается по номеру дома в AddressIndex
+
+Формат translit_index.json:
+    {"version": 1, "cities": {"<ключ>": ["м.Полтава"], ...}, "streets": {"<ключ>": ["вул. Грабчака"], ...}}
+
+Запуск:
+    python3 translit_index.py
+    python3 translit_index.py --lookup "Poltava, Hrabchaka 10"
+"""
+
+import argparse
+import json
+import os
+import re
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from address_index import ADDRESSES_FILE, HOUSE_LATIN, AddressIndex, Match, normalize_city, normalize_street
+
+OUTPUT_FILE = "translit_index.json"
+TRANSLIT_VERSION = 1
+
+# Официальная транслитерация (постановление КМУ №55 от 2010), формы не в начале слова:
+# начальные ye/yi/y/yu/ya после свертки ключа совпадают с ie/i/i/iu/ia
+TRANSLIT = str.maketrans({
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'h', 'ґ': 'g', 'д': 'd', 'е': 'e', 'є': 'ie', 'ж': 'zh',
+    'з': 'z', 'и': 'y', 'і': 'i', 'ї': 'i', 'й': 'i', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n',
+    'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'kh', 'ц': 'ts',
+    'ч': 'ch', 'ш': 'sh', 'щ': 'shch', 'ь': '', 'ю': 'iu', 'я': 'ia', "'": '',
+    'ы': 'y', 'э': 'e', 'ъ': '', 'ё': 'io',
+})
+
+# Свертка латиницы: разные способы записать одну букву дают один ключ
+TRANSLIT_FOLDS = [
+    (re.compile(r'[^a-z0-9]'), ''),
+    (re.compile(r'shch|sch'), 'sh'),
+    (re.compile(r'kh|x|g'), 'h'),
+    (re.compile(r'ts|tz'), 'c'),
+    (re.compile(r'w'), 'v'),
+    (re.compile(r'[yj]'), 'i'),
+    (re.compile(r'(.)\1+'), r'\1'),
+]
+
+# Украинская раскладка ЙЦУКЕН → клавиши английской QWERTY (строчные)
+LAYOUT_UA = "йцукенгшщзхїфівапролджєячсмитьбю.'"
+LAYOUT_EN = "qwertyuiop[]asdfghjkl;'zxcvbnm,./`"
+LAYOUT_UA_TO_EN = dict(zip(LAYOUT_UA, LAYOUT_EN))
+# Символы с Shift → те же клавиши без Shift (регистр букв снимает lower())
+LAYOUT_SHIFT = str.maketrans('<>:"{}~', ",.;'[]`")
+LAYOUT_KEY = str.maketrans({ua: en for ua, en in LAYOUT_UA_TO_EN.items() if ua.isalpha()})
+# Клавиши ' и . — это и буквы є, ю, и апостроф/точка в названии: в ключе их нет вовсе
+LAYOUT_DROP = str.maketrans('', '', " '`./?")
+# Обратно — только буквы номера дома: «10f» -> «10а», дробь «5/7» остается дробью
+LAYOUT_BACK = str.maketrans({en: ua for en, ua in zip(LAYOUT_EN, LAYOUT_UA) if ua.isalpha()})
+
+# Слова-префиксы, которые пользователь может набрать в любом виде; отбрасываются из запроса
+PREFIX_WORDS = [
+    'м', 'с', 'смт', 'місто', 'село', 'вул', 'вулиця', 'пров', 'провулок',
+    'просп', 'проспект', 'пл', 'площа', 'бульв', 'бульвар',
+]
+
+# Разбиение запроса на слова: в английской раскладке ',', ';', '.' — это буквы б, ж, ю,
+# а разделители «,» и «.» набираются как '?' и '/'
+TRANSLIT_SPLIT = re.compile(r'[\s,;.]+')
+LAYOUT_SPLIT = re.compile(r'[\s/?]+')
+
+def translit_key(text: str) -> str:
+    """'вул. Грабчака' / 'Hrabchaka' / 'Grabchaka' -> 'hrabcaka'"""
+    key = text.lower().replace('’', "'").replace('ʼ', "'").translate(TRANSLIT)
+    for pattern, replacement in TRANSLIT_FOLDS:
+        key = pattern.sub(replacement, key)
+    return key
+
+def layout_key(text: str) -> str:
+    """'Полтава' / 'Gjknfdf' -> 'gjknfdf' (кириллица — через клавиши QWERTY, латиница как есть)"""
+    text = text.lower().replace('’', "'").replace('ʼ', "'")
+    return text.translate(LAYOUT_SHIFT).translate(LAYOUT_KEY).translate(LAYOUT_DROP)
+
+KEY_MODES: List[Tuple[Callable[[str], str], re.Pattern]] = [
+    (translit_key, TRANSLIT_SPLIT),
+    (layout_key, LAYOUT_SPLIT),
+]
+
+PREFIX_KEYS = {key(word) for word in PREFIX_WORDS for key, _ in KEY_MODES}
+
+def add_keys(target: Dict[str, List[str]], name: str, normalized: str):
+    """Оба ключа нормализованного названия -> исходное название"""
+    if not normalized:
+        return
+    for key, _ in KEY_MODES:
+        names = target.setdefault(key(normalized), [])
+        if name not in names:
+            names.append(name)
+
+def build_translit_index(rows: Iterable[Dict[str, object]]) -> Dict[str, object]:
+    """Ключи транслита и раскладки для всех населенных пунктов и улиц набора"""
+    cities: Dict[str, List[str]] = {}
+    streets: Dict[str, List[str]] = {}
+    seen_cities, seen_streets = set(), set()
+
+    for row in rows:
+        city, street = row['city'], row['street']
+        if city and city not in seen_cities:
+            seen_cities.add(city)
+            add_keys(cities, city, normalize_city(city))
+        if street and street not in seen_streets:
+            seen_streets.add(street)
+            add_keys(streets, street, normalize_street(street))
+
+    return {
+        'version': TRANSLIT_VERSION,
+        'cities': {key: sorted(names) for key, names in sorted(cities.items())},
+        'streets': {key: sorted(names) for key, names in sorted(streets.items())},
+    }
+
+def split_house(text: str) -> Tuple[str, str]:
+    """(название, будинок): будинок — с последнего слова, начинающегося с цифры"""
+    tokens = text.split()
+    for i in range(len(tokens) - 1, 0, -1):
+        if tokens[i][0].isdigit():
+            return ' '.join(tokens[:i]), ' '.join(tokens[i:])
+    return text, ''
+
+class TranslitIndex:
+    """Ключ -> исходные названия для населенных пунктов и улиц"""
+
+    def __init__(self, data: Dict[str, object]):
+        self.cities: Dict[str, List[str]] = data['cities']
+        self.streets: Dict[str, List[str]] = data['streets']
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, object]]) -> 'TranslitIndex':
+        return cls(build_translit_index(rows))
+
+    @classmethod
+    def from_file(cls, path: str = OUTPUT_FILE) -> 'TranslitIndex':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def resolve(self, text: str) -> Iterator[Tuple[str, str, str]]:
+        """
+        Кандидаты (місто, вулиця, будинок) с исходными названиями.
+        Для каждого способа ключа слова запроса без префиксов делятся на город и улицу
+        во всех точках: каждая часть — один поиск по ключу.
+        """
+        names, house = split_house(text.strip())
+        if not house:
+            return
+
+        for key, splitter in KEY_MODES:
+            words = [w for w in splitter.split(names) if w]
+            # Последнее слово не отбрасывается: «Шкільний бульвар», «Соборна площа»
+            words = [w for w in words[:-1] if key(w) not in PREFIX_KEYS] + words[-1:]
+            # «10a» латиницей и «10f» в английской раскладке — это «10а» (как в боте, TranslitIndex.kt)
+            query_house = house.lower().translate(HOUSE_LATIN if key is translit_key else LAYOUT_BACK)
+            for i in range(len(words)):
+                streets = self.streets.get(key(''.join(words[i:])))
+                if not streets:
+                    continue
+                cities = [''] if i == 0 else self.cities.get(key(''.join(words[:i])))
+                for city in cities or ():
+                    for street in streets:
+                        yield city, street, query_house
+
+    def lookup_text(self, index: AddressIndex, text: str) -> Optional[Match]:
+        """Первый кандидат, который есть в AddressIndex"""
+        for city, street, house in self.resolve(text):
+            match = index.lookup(city, street, house)
+            if match:
+                return match
+        return None
+
+def lookup_text(index: AddressIndex, translit: Optional[TranslitIndex], text: str) -> Optional[Match]:
+    """Поиск по свободному вводу: сначала как есть, затем транслит и неверная раскладка"""
+    match = index.lookup_text(text)
+    if match is None and translit is not None:
+        match = translit.lookup_text(index, text)
+    return match
+
+def load_translit(addresses_file: str, rows: Optional[Iterable[Dict[str, object]]] = None) -> TranslitIndex:
+    """translit_index.json рядом с файлом адресов, если он есть, иначе расчет по строкам"""
+    path = os.path.join(os.path.dirname(os.path.abspath(addresses_file)), OUTPUT_FILE)
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(addresses_file):
+        return TranslitIndex.from_file(path)
+    if rows is None:
+        with open(addresses_file, 'r', encoding='utf-8') as f:
+            rows = json.load(f)
+    return TranslitIndex.from_rows(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="Индекс транслитерации и неверной раскладки")
+    parser.add_argument('path', nargs='?', default=ADDRESSES_FILE, help="JSON с адресами")
+    parser.add_argument('--out', default=OUTPUT_FILE, help="файл индекса")
+    parser.add_argument('--lookup', action='append', default=[], help="проверить запрос (можно несколько раз)")
+    args = parser.parse_args()
+
+    print(f"Загрузка данных из {args.path}...")
+    with open(args.path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    index = build_translit_index(data)
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+
+    ambiguous = sum(1 for group in ('cities', 'streets') for names in index[group].values() if len(names) > 1)
+    print("\n" + "="*60)
+    print("ИНДЕКС ТРАНСЛИТЕРАЦИИ")
+    print("="*60)
+    print(f"Ключей населенных пунктов: {len(index['cities'])}")
+    print(f"Ключей улиц: {len(index['streets'])}")
+    print(f"Неоднозначных ключей: {ambiguous}")
+
+    if args.lookup:
+        address_index = AddressIndex(data)
+        translit = TranslitIndex(index)
+        print()
+        for text in args.lookup:
+            match = lookup_text(address_index, translit, text)
+            if match:
+                print(f"  {text} → {match.city}, {match.street}, {match.house}: черга {match.queue_full}")
+            else:
+                print(f"  {text} → не найдено")
+
+    print("\n" + "="*60)
+    print(f"✓ Готово! Индекс сохранен в {args.out}")
+    print("="*60)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Режим наблюдения за папкой inbox/:
+- Ждет появления нового PDF с графиком
+- Запускает весь конвейер: parse_pdf_v2 → fix_cities → fix_short_cities_manual
+  → cleanup_invalid_cities → build_catalog, индекс транслитерации
+- Атомарно публикует результат в published/<версия>/ и переключает published/current
+- Конвейер работает во временной папке, но кеш страниц и разбора ячеек (.cache/) общий
+  для всех прогонов: повторный или слегка измененный PDF разбирается из кеша
+
+Запуск:
+    python3 watch_inbox.py            # наблюдение
+    python3 watch_inbox.py --once     # обработать то, что уже лежит в inbox, и выйти
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import traceback
+from typing import Dict, Optional, Tuple
+
+from page_cache import CACHE_DIR
+from publish import PUBLISH_DIR, file_sha256, publish_version, atomic_write_json
+
+INBOX_DIR = "inbox"
+PROCESSED_DIR = "processed"
+FAILED_DIR = "failed"
+POLL_INTERVAL = 2.0
+
+def scan_inbox(inbox_dir: str) -> Dict[str, Tuple[int, float]]:
+    """Возвращает {путь: (размер, mtime)} для всех PDF в папке"""
+    result = {}
+    for name in os.listdir(inbox_dir):
+        path = os.path.join(inbox_dir, name)
+        if name.startswith('.') or not name.lower().endswith('.pdf') or not os.path.isfile(path):
+            continue
+        stat = os.stat(path)
+        result[path] = (stat.st_size, stat.st_mtime)
+    return result
+
+def run_pipeline(pdf_path: str, work_dir: str, cache_dir: str = CACHE_DIR) -> Dict[str, str]:
+    """
+    Запускает все шаги конвейера в рабочей папке.
+    Кеш берется из cache_dir (путь считается до смены рабочей папки, временная папка удаляется).
+    Возвращает {имя в публикации: путь к файлу}.
+    """
+    import parse_pdf_v2
+    import fix_cities
+    import fix_short_cities_manual
+    import cleanup_invalid_cities
+    import stats_cube
+    from build_catalog import build_catalog
+    from translit_index import build_translit_index
+
+    cache_dir = os.path.abspath(cache_dir)
+    prev_cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        parse_pdf_v2.PDF_FILE = pdf_path
+        parse_pdf_v2.main(cache_dir)
+        fix_cities.main()
+        fix_short_cities_manual.main()
+        cleanup_invalid_cities.main()
+
+        with open(cleanup_invalid_cities.OUTPUT_FILE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        atomic_write_json('browse_catalog.json', build_catalog(data))
+        atomic_write_json('translit_index.json', build_translit_index(data))
+    finally:
+        os.chdir(prev_cwd)
+
+    return {
+        'addresses.json': os.path.join(work_dir, cleanup_invalid_cities.OUTPUT_FILE),
+        'browse_catalog.json': os.path.join(work_dir, 'browse_catalog.json'),
+        'stats_cube.json': os.path.join(work_dir, stats_cube.OUTPUT_FILE),
+        'translit_index.json': os.path.join(work_dir, 'translit_index.json'),
+        'enterprises.json': os.path.join(work_dir, parse_pdf_v2.OUT_ENTERPRISES_JSON),
+        'parsing_stats.txt': os.path.join(work_dir, parse_pdf_v2.STATS_FILE),
+        'quality_report.json': os.path.join(work_dir, parse_pdf_v2.QUALITY_FILE),
+    }
+
+def move_to(path: str, target_dir: str):
+    """Переносит обработанный PDF в указанную папку"""
+    os.makedirs(target_dir, exist_ok=True)
+    shutil.move(path, os.path.join(target_dir, os.path.basename(path)))
+
+def process_pdf(pdf_path: str, inbox_dir: str, publish_dir: str, cache_dir: str = CACHE_DIR) -> Optional[str]:
+    """Обрабатывает один PDF и публикует результат. Возвращает версию или None"""
+    print(f"\n[watch] Новый файл: {pdf_path}")
+    source_hash = file_sha256(pdf_path)
+    started = time.time()
+
+    work_dir = tempfile.mkdtemp(prefix='pipeline-')
+    try:
+        files = run_pipeline(os.path.abspath(pdf_path), work_dir, cache_dir)
+        version = publish_version(files, source_hash, publish_dir)
+    except Exception:
+        traceback.print_exc()
+        print(f"[watch] ✗ Ошибка обработки {pdf_path}")
+        move_to(pdf_path, os.path.join(inbox_dir, FAILED_DIR))
+        return None
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    move_to(pdf_path, os.path.join(inbox_dir, PROCESSED_DIR))
+    print(f"[watch] ✓ Опубликована версия {version} за {time.time() - started:.1f} с")
+    return version
+
+def watch(inbox_dir: str, publish_dir: str, interval: float, once: bool = False, cache_dir: str = CACHE_DIR):
+    """
+    Основной цикл наблюдения.
+    Файл обрабатывается только когда его размер и mtime не менялись между двумя опросами,
+    чтобы не читать PDF, который еще копируется.
+    """
+    os.makedirs(inbox_dir, exist_ok=True)
+    print(f"[watch] Наблюдение за {inbox_dir}/, публикация в {publish_dir}/")
+
+    previous = {}
+    if once:
+        # Второй опрос через интервал: PDF, который еще копируется, успеет измениться
+        previous = scan_inbox(inbox_dir)
+        if not previous:
+            return
+        time.sleep(interval)
+
+    while True:
+        current = scan_inbox(inbox_dir)
+        stable = sorted(path for path, sig in current.items() if previous.get(path) == sig)
+
+        for path in stable:
+            process_pdf(path, inbox_dir, publish_dir, cache_dir)
+            current.pop(path, None)
+
+        if once:
+            return
+
+        previous = current
+        time.sleep(interval)
+
+def main():
+    parser = argparse.ArgumentParser(description="Наблюдение за папкой с PDF и атомарная публикация")
+    parser.add_argument('--inbox', default=INBOX_DIR, help="папка для новых PDF")
+    parser.add_argument('--publish', default=PUBLISH_DIR, help="папка публикации")
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL, help="интервал опроса, с")
+    parser.add_argument('--cache', default=CACHE_DIR, help="папка кеша страниц и разбора ячеек")
+    parser.add_argument('--once', action='store_true', help="обработать inbox один раз и выйти")
+    args = parser.parse_args()
+
+    try:
+        watch(args.inbox, os.path.abspath(args.publish), args.interval, args.once, os.path.abspath(args.cache))
+    except KeyboardInterrupt:
+        print("\n[watch] Остановлено")
+
+if __name__ == '__main__':
+    main()